@@ -13,10 +13,25 @@ def create_app(config_class: type = None) -> Flask:
     
     app.config.from_object(config_class)
 
+    # orjson-backed jsonify (stdlib fallback) that also serializes result rows
+    from .json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # Extensions
     db.init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
+
+    # Compresses HTML/JSON responses and serves precompressed static files
+    from . import compression
+    compression.init_app(app)
+
+    # Keeps the full-text search tables in sync on every flush
+    from . import search  # noqa: F401
+    # Invalidates the cached form choices whenever master data is written
+    from . import choices  # noqa: F401
+    # Keeps concerned persons' copy of their entity's name current
+    from . import contacts  # noqa: F401
     
     # Create default user if not exists
     with app.app_context():
@@ -44,8 +59,11 @@ def create_app(config_class: type = None) -> Flask:
     app.register_blueprint(auth_bp)
 
     # CLI
-    from .cli import create_db as create_db_command, seed_data as seed_data_command
+    from .cli import create_db as create_db_command, seed_data as seed_data_command, rebuild_search_index as rebuild_search_index_command, export_orders as export_orders_command, compress_static as compress_static_command
     app.cli.add_command(create_db_command)
     app.cli.add_command(seed_data_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(export_orders_command)
+    app.cli.add_command(compress_static_command)
 
     return app
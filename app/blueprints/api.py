@@ -1,7 +1,22 @@
-from flask import Blueprint, request, jsonify, render_template_string
+import hashlib
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+from flask import Blueprint, current_app, request, jsonify, render_template, make_response
+from sqlalchemy.exc import IntegrityError
+from werkzeug.http import is_resource_modified
 from ..extensions import db, csrf
+from ..auth import login_required
 from ..models import Consignor, Consignee, Goods, Station, PinCode, BookingAgent, Vehicle, Driver, Owner, Order
 from ..constants import INDIA_STATES_AND_UTS, to_title
+from ..choices import (
+    choice_fields, choice_ids, choice_row, choice_snapshot, choice_stamp, record_bulk_writes, search_choices,
+)
+from ..json_provider import rows_payload
+from ..search import ORDER_NO_RE, id_prefix_filter
+from .builty import RECENT_OPEN_ORDERS, recent_open_orders
+from .orders import filter_orders
+from .phonebook import concerned_persons_data, phone_numbers_data
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 csrf.exempt(bp)
@@ -14,58 +29,115 @@ def _apply_search(query, model, label_attr: str):
     return query
 
 
-def _list(model, label_attr):
-    query = model.query
-    if model is Station:
-        state = request.args.get('state')
-        if state:
-            query = query.filter(Station.state == state)
-    query = _apply_search(query, model, label_attr)
-    items = query.order_by(getattr(model, label_attr)).limit(100).all()
-    return jsonify([{"id": i.id, "label": getattr(i, label_attr)} for i in items])
+def _conditional(names, build):
+    """Validate a response against the version stamps of the tables it reads.
+
+    The stamps become the ``ETag`` and ``Last-Modified`` headers, and a
+    revalidation of unchanged data is answered with ``304 Not Modified``
+    before ``build`` runs. ``no-cache`` makes the browser revalidate on
+    every use instead of guessing a freshness lifetime.
+    """
+    stamps = [choice_stamp(name) for name in names]
+    etag = "-".join(f"{name}.{version}" for name, (version, _) in zip(names, stamps))
+    last_modified = max((updated_at for _, updated_at in stamps if updated_at), default=None)
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = make_response(build())
+    else:
+        response = make_response("", 304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+def _versioned(*names):
+    """Serve a view through ``_conditional`` for the given choice sets"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return _conditional(names, lambda: view(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _state_filter(state):
+    return (lambda row: row[2]["state"] == state) if state else None
+
+
+def _owner_filter(owner_id):
+    return (lambda row: row[2]["owner_id"] == owner_id) if owner_id else None
+
+
+def _vehicle_driver_filter(vehicle_id):
+    # Only the driver assigned to the vehicle, when it has one
+    vehicle = choice_row("vehicles", vehicle_id) if vehicle_id else None
+    driver_id = vehicle[2]["driver_id"] if vehicle else None
+    return (lambda row: row[0] == driver_id) if driver_id else None
+
+
+def _is_true(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def _list_rows(name, q, predicate=None, fuzzy=False):
+    """Autocomplete rows of a choice set from the in-memory index"""
+    rows = search_choices(name, q or '', limit=100, predicate=predicate, fuzzy=fuzzy)
+    return [{"id": row_id, "label": label, **extra} for row_id, label, extra in rows]
+
+
+def _cached_list(name, predicate=None):
+    """``?q=`` matches word prefixes, or typo-tolerant trigrams with ``?fuzzy=1``.
+
+    ``?format=rows`` answers with compact ``fields``/``rows`` arrays instead
+    of one object per row.
+    """
+    q, fuzzy = request.args.get('q'), _is_true(request.args.get('fuzzy'))
+    if request.args.get('format') == 'rows':
+        rows = search_choices(name, q or '', limit=100, predicate=predicate, fuzzy=fuzzy)
+        return jsonify(rows_payload(choice_fields(name), [(row_id, label, *extra.values()) for row_id, label, extra in rows]))
+    return jsonify(_list_rows(name, q, predicate, fuzzy))
 
 
 @bp.get("/consignors")
+@_versioned("consignors")
 def list_consignors():
-    query = Consignor.query
-    q = request.args.get('q')
-    if q:
-        query = query.filter(Consignor.name.ilike(f"%{q}%"))
-    items = query.order_by(Consignor.name).limit(100).all()
-    return jsonify([{"id": i.id, "label": i.name, "station_id": i.station_id} for i in items])
+    return _cached_list("consignors")
 
 
 @bp.get("/consignees")
+@_versioned("consignees")
 def list_consignees():
-    query = Consignee.query
-    q = request.args.get('q')
-    if q:
-        query = query.filter(Consignee.name.ilike(f"%{q}%"))
-    items = query.order_by(Consignee.name).limit(100).all()
-    return jsonify([{"id": i.id, "label": i.name, "station_id": i.station_id} for i in items])
+    return _cached_list("consignees")
 
 
 @bp.get("/goods")
+@_versioned("goods")
 def list_goods():
-    return _list(Goods, "description")
+    return _cached_list("goods")
 
 
 @bp.get("/booking_agents")
+@_versioned("agents")
 def list_agents():
-    query = BookingAgent.query
-    q = request.args.get('q')
-    if q:
-        query = query.filter(BookingAgent.name.ilike(f"%{q}%"))
-    items = query.order_by(BookingAgent.name).limit(100).all()
-    return jsonify([{"id": i.id, "label": i.name, "station_id": i.station_id} for i in items])
+    return _cached_list("agents")
 
 
 @bp.get("/stations")
+@_versioned("stations")
 def list_stations():
-    return _list(Station, "name")
+    return _cached_list("stations", _state_filter(request.args.get('state')))
 
 
 @bp.get("/stations/<int:station_id>")
+@_versioned("stations")
 def get_station(station_id):
     station = Station.query.get_or_404(station_id)
     return jsonify({
@@ -76,6 +148,7 @@ def get_station(station_id):
 
 
 @bp.get("/pin_codes")
+@_versioned("pin_codes")
 def list_pin_codes():
     query = PinCode.query
     station_id = request.args.get('station_id')
@@ -87,301 +160,226 @@ def list_pin_codes():
 
 
 @bp.get("/vehicles")
+@_versioned("vehicles")
 def list_vehicles():
-    query = Vehicle.query
-    q = request.args.get('q')
-    owner_id = request.args.get('owner_id')
-    if q:
-        query = query.filter(Vehicle.lorry_no.ilike(f"%{q}%"))
-    if owner_id:
-        query = query.filter(Vehicle.owner_id == owner_id)
-    items = query.order_by(Vehicle.lorry_no).limit(100).all()
-    return jsonify([{"id": i.id, "label": i.lorry_no, "owner_id": i.owner_id, "driver_id": i.driver_id} for i in items])
+    return _cached_list("vehicles", _owner_filter(request.args.get('owner_id', type=int)))
 
 
 @bp.get("/drivers")
+@_versioned("drivers", "vehicles")
 def list_drivers():
-    query = Driver.query
-    q = request.args.get('q')
-    vehicle_id = request.args.get('vehicle_id')
-    if q:
-        query = query.filter(Driver.name.ilike(f"%{q}%"))
-    if vehicle_id:
-        # Filter drivers by vehicle assignment
-        vehicle = Vehicle.query.get(vehicle_id)
-        if vehicle and vehicle.driver_id:
-            query = query.filter(Driver.id == vehicle.driver_id)
-    items = query.order_by(Driver.name).limit(100).all()
-    return jsonify([{"id": i.id, "label": i.name} for i in items])
+    return _cached_list("drivers", _vehicle_driver_filter(request.args.get('vehicle_id', type=int)))
 
 
 @bp.get("/owners")
+@_versioned("owners")
 def list_owners():
-    return _list(Owner, "name")
+    return _cached_list("owners")
+
+
+def _parse_date(value):
+    """ISO date from a query argument; None when absent, ValueError when malformed"""
+    return date.fromisoformat(value) if value else None
 
 
 @bp.get("/orders")
 def list_orders():
-    # label as Order #ID
-    query = Order.query
-    query = _apply_search(query, Order, "id")
-    items = query.order_by(Order.id.desc()).limit(100).all()
-    return jsonify([{"id": i.id, "label": f"Order #{i.id}"} for i in items])
-
-
-_form_templates = {
-    "consignors": """
-    <form>
-      <label>Name</label><input name=\"name\" required />
-      <label>State</label><select name=\"state\" required>
-        <option value=\"\">Select State</option>
-        <option value=\"Andhra Pradesh\">Andhra Pradesh</option>
-        <option value=\"Arunachal Pradesh\">Arunachal Pradesh</option>
-        <option value=\"Assam\">Assam</option>
-        <option value=\"Bihar\">Bihar</option>
-        <option value=\"Chhattisgarh\">Chhattisgarh</option>
-        <option value=\"Goa\">Goa</option>
-        <option value=\"Gujarat\">Gujarat</option>
-        <option value=\"Haryana\">Haryana</option>
-        <option value=\"Himachal Pradesh\">Himachal Pradesh</option>
-        <option value=\"Jharkhand\">Jharkhand</option>
-        <option value=\"Karnataka\">Karnataka</option>
-        <option value=\"Kerala\">Kerala</option>
-        <option value=\"Madhya Pradesh\">Madhya Pradesh</option>
-        <option value=\"Maharashtra\">Maharashtra</option>
-        <option value=\"Manipur\">Manipur</option>
-        <option value=\"Meghalaya\">Meghalaya</option>
-        <option value=\"Mizoram\">Mizoram</option>
-        <option value=\"Nagaland\">Nagaland</option>
-        <option value=\"Odisha\">Odisha</option>
-        <option value=\"Punjab\">Punjab</option>
-        <option value=\"Rajasthan\">Rajasthan</option>
-        <option value=\"Sikkim\">Sikkim</option>
-        <option value=\"Tamil Nadu\">Tamil Nadu</option>
-        <option value=\"Telangana\">Telangana</option>
-        <option value=\"Tripura\">Tripura</option>
-        <option value=\"Uttar Pradesh\">Uttar Pradesh</option>
-        <option value=\"Uttarakhand\">Uttarakhand</option>
-        <option value=\"West Bengal\">West Bengal</option>
-        <option value=\"Andaman and Nicobar Islands\">Andaman and Nicobar Islands</option>
-        <option value=\"Chandigarh\">Chandigarh</option>
-        <option value=\"Dadra and Nagar Haveli and Daman and Diu\">Dadra and Nagar Haveli and Daman and Diu</option>
-        <option value=\"Delhi\">Delhi</option>
-        <option value=\"Jammu and Kashmir\">Jammu and Kashmir</option>
-        <option value=\"Ladakh\">Ladakh</option>
-        <option value=\"Lakshadweep\">Lakshadweep</option>
-        <option value=\"Puducherry\">Puducherry</option>
-      </select>
-      <label>Station</label><select name=\"station_pick\" data-populate-source=\"/api/stations\"></select>
-      <label>Phone</label><input name=\"phone\" />
-      <label>GSTIN</label><input name=\"gstin\" />
-      <label>PAN</label><input name=\"pan\" />
-      <label>Email</label><input name=\"email\" />
-      <div style=\"display:flex;gap:8px;align-items:center;margin-top:8px;\">
-        <button class=\"btn\" type=\"submit\">Save</button>
-        <button class=\"btn secondary\" data-quick-add=\"stations\" type=\"button\">Add Station</button>
-      </div>
-    </form>
-    """,
-    "consignees": """
-    <form>
-      <label>Name</label><input name=\"name\" required />
-      <label>State</label><select name=\"state\" required>
-        <option value=\"\">Select State</option>
-        <option value=\"Andhra Pradesh\">Andhra Pradesh</option>
-        <option value=\"Arunachal Pradesh\">Arunachal Pradesh</option>
-        <option value=\"Assam\">Assam</option>
-        <option value=\"Bihar\">Bihar</option>
-        <option value=\"Chhattisgarh\">Chhattisgarh</option>
-        <option value=\"Goa\">Goa</option>
-        <option value=\"Gujarat\">Gujarat</option>
-        <option value=\"Haryana\">Haryana</option>
-        <option value=\"Himachal Pradesh\">Himachal Pradesh</option>
-        <option value=\"Jharkhand\">Jharkhand</option>
-        <option value=\"Karnataka\">Karnataka</option>
-        <option value=\"Kerala\">Kerala</option>
-        <option value=\"Madhya Pradesh\">Madhya Pradesh</option>
-        <option value=\"Maharashtra\">Maharashtra</option>
-        <option value=\"Manipur\">Manipur</option>
-        <option value=\"Meghalaya\">Meghalaya</option>
-        <option value=\"Mizoram\">Mizoram</option>
-        <option value=\"Nagaland\">Nagaland</option>
-        <option value=\"Odisha\">Odisha</option>
-        <option value=\"Punjab\">Punjab</option>
-        <option value=\"Rajasthan\">Rajasthan</option>
-        <option value=\"Sikkim\">Sikkim</option>
-        <option value=\"Tamil Nadu\">Tamil Nadu</option>
-        <option value=\"Telangana\">Telangana</option>
-        <option value=\"Tripura\">Tripura</option>
-        <option value=\"Uttar Pradesh\">Uttar Pradesh</option>
-        <option value=\"Uttarakhand\">Uttarakhand</option>
-        <option value=\"West Bengal\">West Bengal</option>
-        <option value=\"Andaman and Nicobar Islands\">Andaman and Nicobar Islands</option>
-        <option value=\"Chandigarh\">Chandigarh</option>
-        <option value=\"Dadra and Nagar Haveli and Daman and Diu\">Dadra and Nagar Haveli and Daman and Diu</option>
-        <option value=\"Delhi\">Delhi</option>
-        <option value=\"Jammu and Kashmir\">Jammu and Kashmir</option>
-        <option value=\"Ladakh\">Ladakh</option>
-        <option value=\"Lakshadweep\">Lakshadweep</option>
-        <option value=\"Puducherry\">Puducherry</option>
-      </select>
-      <label>Station</label><select name=\"station_pick\" data-populate-source=\"/api/stations\"></select>
-      <label>Phone</label><input name=\"phone\" />
-      <label>GSTIN</label><input name=\"gstin\" />
-      <label>PAN</label><input name=\"pan\" />
-      <label>Email</label><input name=\"email\" />
-      <div style=\"display:flex;gap:8px;align-items:center;margin-top:8px;\">
-        <button class=\"btn\" type=\"submit\">Save</button>
-        <button class=\"btn secondary\" data-quick-add=\"stations\" type=\"button\">Add Station</button>
-      </div>
-    </form>
-    """,
-    "goods": """
-    <form>
-      <label>Description</label><input name=\"description\" required />
-      <button class=\"btn\" type=\"submit\">Save</button>
-    </form>
-    """,
-    "booking_agents": """
-    <form>
-      <label>Name</label><input name=\"name\" required />
-      <label>Phone</label><input name=\"phone\" />
-      <label>GSTIN</label><input name=\"gstin\" />
-      <label>PAN</label><input name=\"pan\" />
-      <label>Email</label><input name=\"email\" />
-      <label>Station</label><select name=\"station_pick\" data-populate-source=\"/api/stations\"></select>
-      <div style=\"display:flex;gap:8px;align-items:center;margin-top:8px;\">
-        <button class=\"btn\" type=\"submit\">Save</button>
-        <button class=\"btn secondary\" data-quick-add=\"stations\" type=\"button\">Add Station</button>
-      </div>
-    </form>
-    """,
-    "stations": """
-    <form>
-      <label>Name</label><input name=\"name\" required />
-      <label>State</label><select name=\"state\" required>
-        <option value=\"\">Select State</option>
-        <option value=\"Andhra Pradesh\">Andhra Pradesh</option>
-        <option value=\"Arunachal Pradesh\">Arunachal Pradesh</option>
-        <option value=\"Assam\">Assam</option>
-        <option value=\"Bihar\">Bihar</option>
-        <option value=\"Chhattisgarh\">Chhattisgarh</option>
-        <option value=\"Goa\">Goa</option>
-        <option value=\"Gujarat\">Gujarat</option>
-        <option value=\"Haryana\">Haryana</option>
-        <option value=\"Himachal Pradesh\">Himachal Pradesh</option>
-        <option value=\"Jharkhand\">Jharkhand</option>
-        <option value=\"Karnataka\">Karnataka</option>
-        <option value=\"Kerala\">Kerala</option>
-        <option value=\"Madhya Pradesh\">Madhya Pradesh</option>
-        <option value=\"Maharashtra\">Maharashtra</option>
-        <option value=\"Manipur\">Manipur</option>
-        <option value=\"Meghalaya\">Meghalaya</option>
-        <option value=\"Mizoram\">Mizoram</option>
-        <option value=\"Nagaland\">Nagaland</option>
-        <option value=\"Odisha\">Odisha</option>
-        <option value=\"Punjab\">Punjab</option>
-        <option value=\"Rajasthan\">Rajasthan</option>
-        <option value=\"Sikkim\">Sikkim</option>
-        <option value=\"Tamil Nadu\">Tamil Nadu</option>
-        <option value=\"Telangana\">Telangana</option>
-        <option value=\"Tripura\">Tripura</option>
-        <option value=\"Uttar Pradesh\">Uttar Pradesh</option>
-        <option value=\"Uttarakhand\">Uttarakhand</option>
-        <option value=\"West Bengal\">West Bengal</option>
-        <option value=\"Andaman and Nicobar Islands\">Andaman and Nicobar Islands</option>
-        <option value=\"Chandigarh\">Chandigarh</option>
-        <option value=\"Dadra and Nagar Haveli and Daman and Diu\">Dadra and Nagar Haveli and Daman and Diu</option>
-        <option value=\"Delhi\">Delhi</option>
-        <option value=\"Jammu and Kashmir\">Jammu and Kashmir</option>
-        <option value=\"Ladakh\">Ladakh</option>
-        <option value=\"Lakshadweep\">Lakshadweep</option>
-        <option value=\"Puducherry\">Puducherry</option>
-      </select>
-      <button class=\"btn\" type=\"submit\">Save</button>
-    </form>
-    """,
-    "pin_codes": """
-    <form>
-      <label>Pin Code</label><input name=\"code\" required />
-      <label>State</label><select name=\"state\" required>
-        <option value=\"\">Select State</option>
-        <option value=\"Andhra Pradesh\">Andhra Pradesh</option>
-        <option value=\"Arunachal Pradesh\">Arunachal Pradesh</option>
-        <option value=\"Assam\">Assam</option>
-        <option value=\"Bihar\">Bihar</option>
-        <option value=\"Chhattisgarh\">Chhattisgarh</option>
-        <option value=\"Goa\">Goa</option>
-        <option value=\"Gujarat\">Gujarat</option>
-        <option value=\"Haryana\">Haryana</option>
-        <option value=\"Himachal Pradesh\">Himachal Pradesh</option>
-        <option value=\"Jharkhand\">Jharkhand</option>
-        <option value=\"Karnataka\">Karnataka</option>
-        <option value=\"Kerala\">Kerala</option>
-        <option value=\"Madhya Pradesh\">Madhya Pradesh</option>
-        <option value=\"Maharashtra\">Maharashtra</option>
-        <option value=\"Manipur\">Manipur</option>
-        <option value=\"Meghalaya\">Meghalaya</option>
-        <option value=\"Mizoram\">Mizoram</option>
-        <option value=\"Nagaland\">Nagaland</option>
-        <option value=\"Odisha\">Odisha</option>
-        <option value=\"Punjab\">Punjab</option>
-        <option value=\"Rajasthan\">Rajasthan</option>
-        <option value=\"Sikkim\">Sikkim</option>
-        <option value=\"Tamil Nadu\">Tamil Nadu</option>
-        <option value=\"Telangana\">Telangana</option>
-        <option value=\"Tripura\">Tripura</option>
-        <option value=\"Uttar Pradesh\">Uttar Pradesh</option>
-        <option value=\"Uttarakhand\">Uttarakhand</option>
-        <option value=\"West Bengal\">West Bengal</option>
-        <option value=\"Andaman and Nicobar Islands\">Andaman and Nicobar Islands</option>
-        <option value=\"Chandigarh\">Chandigarh</option>
-        <option value=\"Dadra and Nagar Haveli and Daman and Diu\">Dadra and Nagar Haveli and Daman and Diu</option>
-        <option value=\"Delhi\">Delhi</option>
-        <option value=\"Jammu and Kashmir\">Jammu and Kashmir</option>
-        <option value=\"Ladakh\">Ladakh</option>
-        <option value=\"Lakshadweep\">Lakshadweep</option>
-        <option value=\"Puducherry\">Puducherry</option>
-      </select>
-      <label>Station</label><select name=\"station_pick\" data-populate-source=\"/api/stations\"></select>
-      <div style=\"display:flex;gap:8px;align-items:center;margin-top:8px;\">
-        <button class=\"btn\" type=\"submit\">Save</button>
-        <button class=\"btn secondary\" data-quick-add=\"stations\" type=\"button\">Add Station</button>
-      </div>
-    </form>
-    """,
-    "vehicles": """
-    <form>
-      <label>Lorry No</label><input name=\"lorry_no\" required />
-      <label>Chassis No</label><input name=\"chassis_no\" />
-      <label>Engine No</label><input name=\"engine_no\" />
-      <button class=\"btn\" type=\"submit\">Save</button>
-    </form>
-    """,
-    "drivers": """
-    <form>
-      <label>Name</label><input name=\"name\" required />
-      <label>License No</label><input name=\"license_no\" required />
-      <label>Phone</label><input name=\"phone\" />
-      <button class=\"btn\" type=\"submit\">Save</button>
-    </form>
-    """,
-    "owners": """
-    <form>
-      <label>Name</label><input name=\"name\" required />
-      <label>Phone</label><input name=\"phone\" />
-      <button class=\"btn\" type=\"submit\">Save</button>
-    </form>
-    """,
+    """Order picker, newest first, labelled ``Order #ID``.
+
+    ``q`` is an order number ("12", "#12", "Order 12") matched exactly and
+    as a prefix (12, 120-129, ...) over id ranges, or else words for the
+    order search index. ``status`` takes a comma-separated list, or
+    ``open`` for the undispatched orders the builty form offers;
+    ``date_from``/``date_to`` bound the order date. The most recent open
+    orders come from a per-worker cache.
+    """
+    q = request.args.get("q", "").strip()
+    statuses = [s.strip().upper() for s in request.args.get("status", "").split(",") if s.strip()]
+    limit = max(1, min(request.args.get("limit", 100, type=int) or 100, 100))
+    try:
+        date_from = _parse_date(request.args.get("date_from"))
+        date_to = _parse_date(request.args.get("date_to"))
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+
+    if statuses == ["OPEN"] and not (q or date_from or date_to) and limit <= RECENT_OPEN_ORDERS:
+        return jsonify([{"id": o["id"], "label": f"Order #{o['id']}"} for o in recent_open_orders(limit)])
+
+    query = db.session.query(Order.id)
+    if statuses == ["OPEN"]:
+        query = query.filter(Order.status != "DISPATCHED")
+    elif statuses:
+        query = query.filter(Order.status.in_(statuses))
+    if date_from:
+        query = query.filter(Order.date >= date_from)
+    if date_to:
+        query = query.filter(Order.date <= date_to)
+
+    order = [Order.id.desc()]
+    order_no = ORDER_NO_RE.fullmatch(q)
+    if order_no:
+        max_id = db.session.query(db.func.max(Order.id)).scalar() or 0
+        query = query.filter(id_prefix_filter(Order.id, order_no.group(1), max_id))
+        # the exact number first, then the longer ones starting with it
+        order.insert(0, db.case((Order.id == int(order_no.group(1)), 0), else_=1))
+    elif q:
+        query = filter_orders(query, "all", q)
+    ids = [row.id for row in query.order_by(*order).limit(limit)]
+    return jsonify([{"id": i, "label": f"Order #{i}"} for i in ids])
+
+
+# Lists that can be batched, by query name: (choice set, row filter from the sub-query's arguments)
+_BATCH_LISTS = {
+    "consignors": ("consignors", None),
+    "consignees": ("consignees", None),
+    "booking_agents": ("agents", None),
+    "goods": ("goods", None),
+    "stations": ("stations", lambda args: _state_filter(args.get("state"))),
+    "vehicles": ("vehicles", lambda args: _owner_filter(_to_int(args.get("owner_id")))),
+    "owners": ("owners", None),
+    "drivers": ("drivers", lambda args: _vehicle_driver_filter(_to_int(args.get("vehicle_id")))),
 }
 
+BATCH_MAX_QUERIES = 20
+
+
+def _run_batch_query(kind, args):
+    if kind in _BATCH_LISTS:
+        name, make_filter = _BATCH_LISTS[kind]
+        return _list_rows(name, args.get("q"), make_filter(args) if make_filter else None, _is_true(args.get("fuzzy")))
+    if kind == "contacts":
+        return concerned_persons_data(args.get("entity_type"), _to_int(args.get("entity_id")), with_phones=True)
+    if kind == "phone_numbers":
+        person_id = _to_int(args.get("concerned_person_id"))
+        return phone_numbers_data([person_id])[person_id] if person_id else []
+    raise KeyError(kind)
+
+
+_BATCH_KINDS = set(_BATCH_LISTS) | {"contacts", "phone_numbers"}
+
+
+@bp.route("/batch", methods=["GET", "POST"])
+def batch():
+    """Several named lookups in one round trip and one database session.
+
+    POST a JSON object mapping result names to sub-queries, e.g.
+    ``{"consignors": {}, "from": {"query": "stations", "state": "Gujarat"},
+    "persons": {"query": "contacts", "entity_type": "CONSIGNOR", "entity_id": 3}}``;
+    ``query`` defaults to the result name. ``contacts`` returns each person
+    with their phones. ``GET ?include=consignors,vehicles`` fetches whole
+    lists and is validated with an ETag like the single lists.
+    """
+    if request.method == "GET":
+        kinds = [k for k in request.args.get("include", "").split(",") if k]
+        unknown = [k for k in kinds if k not in _BATCH_LISTS]
+        if not kinds or unknown:
+            return jsonify({"error": f"Unknown lists: {', '.join(unknown)}" if unknown else "Nothing to include"}), 400
+        names = sorted({_BATCH_LISTS[k][0] for k in kinds})
+        return _conditional(names, lambda: jsonify({k: _run_batch_query(k, request.args) for k in kinds}))
+
+    queries = request.get_json(silent=True)
+    if not isinstance(queries, dict) or not queries:
+        return jsonify({"error": "Expected a JSON object of named queries"}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({"error": f"At most {BATCH_MAX_QUERIES} queries per batch"}), 400
+    plan = {}
+    for result_name, args in queries.items():
+        args = args if isinstance(args, dict) else {}
+        kind = args.get("query", result_name)
+        if kind not in _BATCH_KINDS:
+            return jsonify({"error": f"Unknown query: {kind}"}), 400
+        plan[result_name] = (kind, args)
+    return jsonify({result_name: _run_batch_query(kind, args) for result_name, (kind, args) in plan.items()})
+
+# Lists in the client-side snapshot, by their /api names
+BOOTSTRAP_LISTS = ("stations", "goods", "booking_agents", "consignors", "consignees", "vehicles")
+# Deltas re-send rows from a little before the client's snapshot so that
+# writes committed while it was taken, or stamped by a server whose clock
+# runs behind, are not missed
+BOOTSTRAP_OVERLAP = timedelta(minutes=5)
+
+
+def _parse_client_versions(value):
+    versions = {}
+    for token in (value or "").split(","):
+        name, _, version = token.partition(".")
+        if name in BOOTSTRAP_LISTS and _to_int(version) is not None:
+            versions[name] = int(version)
+    return versions
+
+
+@bp.get("/bootstrap")
+def bootstrap():
+    """Versioned snapshot of the master-data lists for client-side caching.
+
+    Without arguments every list is returned in full as compact rows (see
+    ``fields``). A client holding a snapshot sends back its ``as_of`` as
+    ``since`` and its ``versions`` as ``?versions=stations.3,goods.1``; lists
+    whose version has not moved are left out, and moved lists come as
+    ``changes``: rows updated since the snapshot plus every current id, so
+    deleted rows can be dropped.
+    """
+    as_of = datetime.utcnow()
+    try:
+        since = datetime.fromisoformat(request.args["since"]) - BOOTSTRAP_OVERLAP
+    except (KeyError, ValueError):
+        since = None
+    client_versions = _parse_client_versions(request.args.get("versions")) if since else {}
+
+    versions, fields, lists, changes = {}, {}, {}, {}
+    for list_name in BOOTSTRAP_LISTS:
+        name = _BATCH_LISTS[list_name][0]
+        version = choice_stamp(name)[0]
+        versions[list_name] = version
+        known = client_versions.get(list_name)
+        if known == version:
+            continue
+        if known is None or known > version:
+            fields[list_name], lists[list_name] = choice_snapshot(name)
+        else:
+            fields[list_name], rows = choice_snapshot(name, since)
+            changes[list_name] = {"rows": rows, "ids": choice_ids(name)}
+    return jsonify({
+        "as_of": as_of.isoformat(),
+        "versions": versions,
+        "fields": fields,
+        "lists": lists,
+        "changes": changes,
+    })
+
+# Quick-add forms under templates/quick_add/; they take no request data,
+# so each renders to the same fragment for the life of the process
+QUICK_ADD_FORMS = frozenset({
+    "consignors", "consignees", "goods", "booking_agents", "stations",
+    "pin_codes", "vehicles", "drivers", "owners",
+})
+QUICK_ADD_MAX_AGE = 3600
+_quick_add_cache = {}
+
+
+def _quick_add_form(entity):
+    """Rendered quick-add form and its ETag, rendered once per process
+    (on every request in debug, so template edits show up)"""
+    cached = _quick_add_cache.get(entity)
+    if cached is None or current_app.debug:
+        html = render_template(f"quick_add/{entity}.html", states=INDIA_STATES_AND_UTS)
+        cached = _quick_add_cache[entity] = (html, hashlib.sha1(html.encode()).hexdigest())
+    return cached
+
 
 @bp.get("/<entity>/new")
 def inline_new(entity):
-    html = _form_templates.get(entity)
-    if not html:
+    if entity not in QUICK_ADD_FORMS:
         return ("Unsupported", 400)
-    return render_template_string(html)
+    html, etag = _quick_add_form(entity)
+    if is_resource_modified(request.environ, etag=etag):
+        response = make_response(html)
+    else:
+        response = make_response("", 304)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = QUICK_ADD_MAX_AGE
+    return response
 
 
 def _normalize_name(s: str) -> str:
@@ -389,7 +387,7 @@ def _normalize_name(s: str) -> str:
 
 
 def _dedupe_by_name(model, name_field: str, name: str):
-    # case-insensitive lookup
+    # case-insensitive lookup; served by the model's lower(column) index
     return model.query.filter(db.func.lower(getattr(model, name_field)) == name.lower()).first()
 
 
@@ -444,7 +442,7 @@ def create_consignees():
 @bp.post("/goods")
 def create_goods():
     desc = _normalize_name(request.form.get("description"))
-    existing = Goods.query.filter(db.func.lower(Goods.description) == desc.lower()).first() if desc else None
+    existing = _dedupe_by_name(Goods, "description", desc) if desc else None
     if existing:
         return jsonify({"id": existing.id, "label": existing.description})
     g = Goods(description=desc)
@@ -513,7 +511,7 @@ def create_pin_codes():
 @bp.post("/vehicles")
 def create_vehicle():
     lorry_no = request.form.get("lorry_no")
-    existing = Vehicle.query.filter(db.func.lower(Vehicle.lorry_no) == (lorry_no or '').lower()).first() if lorry_no else None
+    existing = _dedupe_by_name(Vehicle, "lorry_no", lorry_no) if lorry_no else None
     if existing:
         return jsonify({"id": existing.id, "label": existing.lorry_no})
     v = Vehicle(lorry_no=lorry_no, chassis_no=request.form.get("chassis_no"), engine_no=request.form.get("engine_no"))
@@ -544,3 +542,209 @@ def create_owner():
     db.session.add(o)
     db.session.commit()
     return jsonify({"id": o.id, "label": o.name})
+
+
+def _strip(s: str) -> str:
+    return s.strip() if s else s
+
+
+# Master data that can be loaded in bulk, by /api name: (model, key column,
+# key normalizer, whether the key matches case-insensitively, other columns
+# a row may set). Rows are deduped on the key like the single creates above.
+_BULK_TARGETS = {
+    "consignors": (Consignor, "name", _normalize_name, True, ("station_id", "address", "phone", "gstin", "pan", "email")),
+    "consignees": (Consignee, "name", _normalize_name, True, ("station_id", "address", "phone", "gstin", "pan", "email")),
+    "booking_agents": (BookingAgent, "name", _normalize_name, True, ("station_id", "phone", "gstin", "pan", "email", "city", "state")),
+    "goods": (Goods, "description", _normalize_name, True, ()),
+    "stations": (Station, "name", _normalize_name, True, ("state",)),
+    "pin_codes": (PinCode, "code", _strip, False, ("station_id", "state")),
+    "vehicles": (Vehicle, "lorry_no", _strip, True, ("capacity", "chassis_no", "engine_no", "owner_id", "driver_id")),
+    "drivers": (Driver, "name", _normalize_name, True, ("license_no", "phone", "address", "rto", "aadhar")),
+    "owners": (Owner, "name", _normalize_name, True, ("phone", "pan", "aadhar", "address")),
+}
+
+BULK_MAX_ROWS = 5000
+# Bound parameters per IN (...) lookup
+BULK_CHUNK = 500
+
+
+def _chunks(items, size=BULK_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _sql_lower(values):
+    """{value: lower(value)} as computed by the database, so keys compare the
+    same way as the ``lower(column)`` indexes they are matched against
+    (Python's ``str.lower`` disagrees with SQLite's outside ASCII)"""
+    lowered = {}
+    for chunk in _chunks(sorted(set(values))):
+        row = db.session.execute(db.select(*[db.func.lower(db.literal(v)) for v in chunk])).one()
+        lowered.update(zip(chunk, row))
+    return lowered
+
+
+def _station_ids_by_name(names):
+    """{lower(name): id} of the stations called ``names`` (already lowered by
+    ``_sql_lower``), in one query per chunk"""
+    found = {}
+    for chunk in _chunks(sorted(names)):
+        found.update(db.session.execute(
+            db.select(db.func.lower(Station.name), Station.id).where(db.func.lower(Station.name).in_(chunk))
+        ).all())
+    return found
+
+
+def _bulk_value(column, value):
+    """``value`` converted for ``column``; raises ValueError when it does not fit"""
+    python_type = column.type.python_type
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"Invalid {column.name}")
+    if python_type is str:
+        value = str(value)
+        if column.type.length and len(value) > column.type.length:
+            raise ValueError(f"{column.name} is longer than {column.type.length} characters")
+        return value
+    try:
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {column.name}") from None
+
+
+def _csrf_protected(view):
+    """Enforce CSRF on a view of this otherwise exempt blueprint"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_app.config.get("WTF_CSRF_ENABLED", True):
+            csrf.protect()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@bp.post("/<entity>/bulk")
+@login_required
+@_csrf_protected
+def bulk_create(entity):
+    """Create many rows of one kind of master data in one transaction.
+
+    POST a JSON array of objects, or ``{"rows": [...]}``, with the fields of
+    the single create (``station`` may name a station instead of giving
+    ``station_id``). Rows are deduped against each other and against the
+    table on their normalized name in one query; the new ones are inserted
+    with a single executemany. With ``?upsert=1`` existing rows get the
+    non-empty fields they were sent. ``ids`` holds the id of every input
+    row in order, ``null`` for rows listed under ``errors``. Requires a
+    login and the ``X-CSRFToken`` header.
+    """
+    if entity not in _BULK_TARGETS:
+        return jsonify({"error": "Unsupported"}), 400
+    model, key_field, normalize_key, casefold, fields = _BULK_TARGETS[entity]
+    payload = request.get_json(silent=True)
+    items = payload.get("rows") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a JSON array of rows"}), 400
+    if len(items) > BULK_MAX_ROWS:
+        return jsonify({"error": f"At most {BULK_MAX_ROWS} rows per request"}), 400
+    upsert = _is_true(request.args.get("upsert"))
+    table = model.__table__
+    key_column = table.c[key_field]
+    key_expr = db.func.lower(key_column) if casefold else key_column
+    required = [f for f in fields if not table.c[f].nullable]
+
+    # Check every row before touching the table, so bad values come back as
+    # row errors instead of failing the whole statement
+    errors = []
+    parsed = []  # (index, key, column values, station name)
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Expected an object"})
+            continue
+        key = normalize_key(str(item.get(key_field) or ""))
+        if not key:
+            errors.append({"index": index, "error": f"Missing {key_field}"})
+            continue
+        try:
+            key = _bulk_value(key_column, key)
+            row = {f: _bulk_value(table.c[f], item[f]) for f in fields if item.get(f) not in (None, "")}
+        except ValueError as exc:
+            errors.append({"index": index, "error": str(exc)})
+            continue
+        station = item.get("station") if "station_id" in fields and "station_id" not in row else None
+        parsed.append((index, key, row, str(station).strip() if station else None))
+
+    lowered = _sql_lower(
+        ([key for _, key, _, _ in parsed] if casefold else [])
+        + [station for _, _, _, station in parsed if station]
+    )
+    station_names = {lowered[station] for _, _, _, station in parsed if station}
+    stations = _station_ids_by_name(station_names) if station_names else {}
+
+    keys = [None] * len(items)  # matched key of each input row
+    values = {}  # matched key -> column values, first row wins
+    for index, key, row, station in parsed:
+        if station:
+            station_id = stations.get(lowered[station])
+            if station_id is None:
+                errors.append({"index": index, "error": f"Unknown station: {station}"})
+                continue
+            row["station_id"] = station_id
+        matched = lowered[key] if casefold else key
+        if matched not in values:
+            missing = [f for f in required if f not in row]
+            if missing:
+                errors.append({"index": index, "error": f"Missing {', '.join(missing)}"})
+                continue
+            values[matched] = {key_field: key, **row}
+        keys[index] = matched
+    errors.sort(key=lambda error: error["index"])
+
+    matched_keys = list(values)
+    existing = {}
+    for chunk in _chunks(matched_keys):
+        existing.update(db.session.execute(db.select(key_expr, table.c.id).where(key_expr.in_(chunk))).all())
+
+    created = [k for k in matched_keys if k not in existing]
+    updated = []
+    try:
+        if created:
+            # executemany binds the first row's keys, so every row sends every column
+            blank = dict.fromkeys(fields)
+            db.session.execute(table.insert(), [{**blank, **values[k]} for k in created])
+        if upsert:
+            # one executemany per distinct set of sent fields
+            by_fields = {}
+            for k in matched_keys:
+                if k in existing and len(values[k]) > 1:
+                    row = dict(values[k])
+                    del row[key_field]
+                    by_fields.setdefault(tuple(sorted(row)), []).append({"_id": existing[k], **row})
+            for names, params in by_fields.items():
+                db.session.execute(
+                    table.update().where(table.c.id == db.bindparam("_id"))
+                    .values({name: db.bindparam(name) for name in names}),
+                    params,
+                )
+                updated.extend(p["_id"] for p in params)
+
+        ids = dict(existing)
+        written_ids = set(updated)
+        written = []
+        for chunk in _chunks(created):
+            for row in db.session.execute(db.select(table, key_expr.label("_matched")).where(key_expr.in_(chunk))):
+                ids[row._matched] = row.id
+                written.append(row)
+        for chunk in _chunks(sorted(written_ids)):
+            written.extend(db.session.execute(db.select(table).where(table.c.id.in_(chunk))))
+        record_bulk_writes(model, written)
+        db.session.commit()
+    except IntegrityError as exc:
+        db.session.rollback()
+        return jsonify({"error": f"Conflicts with existing data: {exc.orig}"}), 409
+
+    return jsonify({
+        "ids": [ids.get(k) if k is not None else None for k in keys],
+        "created": len(created),
+        "updated": len(updated),
+        "existing": len(existing) - len(updated),
+        "errors": errors,
+    })
@@ -4,22 +4,78 @@ from ..extensions import db
 from ..models import Builty, Order, Vehicle, Driver, Owner, Station, Goods, TransactionLog, Consignor, Consignee, BookingAgent
 from ..forms import BuiltyForm
 from ..auth import login_required
+from ..pagination import keyset_paginate, get_page_size
+from ..search import ORDER_NO_RE, builty_index, id_prefix_filter
+from ..choices import cached_result, get_choices
 
 bp = Blueprint("builty", __name__, url_prefix="/builty")
 
 
 def _choices():
-    return {
-        "orders": [(o.id, f"Order #{o.id}") for o in Order.query.order_by(Order.id.desc()).all()],
-        "vehicles": [(v.id, v.lorry_no) for v in Vehicle.query.order_by(Vehicle.lorry_no).all()],
-        "drivers": [(d.id, d.name) for d in Driver.query.order_by(Driver.name).all()],
-        "owners": [(o.id, o.name) for o in Owner.query.order_by(Owner.name).all()],
-        "stations": [(s.id, s.name) for s in Station.query.order_by(Station.name).all()],
-        "goods": [(g.id, g.description) for g in Goods.query.order_by(Goods.description).all()],
-        "consignors": [(c.id, c.name) for c in Consignor.query.order_by(Consignor.name).all()],
-        "consignees": [(c.id, c.name) for c in Consignee.query.order_by(Consignee.name).all()],
-        "agents": [(a.id, a.name) for a in BookingAgent.query.order_by(BookingAgent.name).all()],
-    }
+    return get_choices("vehicles", "drivers", "owners", "stations", "goods", "consignors", "consignees", "agents")
+
+
+def _register_query():
+    """Column-only projection of the builty register for the list views"""
+    FromStation = db.aliased(Station)
+    ToStation = db.aliased(Station)
+    query = db.session.query(
+        Builty.id,
+        Builty.date,
+        Builty.firm,
+        Builty.lr_no,
+        Builty.status,
+        Consignor.name.label("consignor_name"),
+        Consignee.name.label("consignee_name"),
+        Vehicle.lorry_no,
+        Driver.name.label("driver_name"),
+        FromStation.name.label("from_station_name"),
+        ToStation.name.label("to_station_name"),
+        Goods.description.label("goods_description"),
+    ).select_from(Builty)\
+     .outerjoin(Consignor, Builty.consignor_id == Consignor.id)\
+     .outerjoin(Consignee, Builty.consignee_id == Consignee.id)\
+     .outerjoin(Vehicle, Builty.vehicle_id == Vehicle.id)\
+     .outerjoin(Driver, Builty.driver_id == Driver.id)\
+     .outerjoin(FromStation, Builty.from_station_id == FromStation.id)\
+     .outerjoin(ToStation, Builty.to_station_id == ToStation.id)\
+     .outerjoin(Goods, Builty.goods_id == Goods.id)
+    return query, FromStation, ToStation
+
+
+def _exact_match_ids(search_query):
+    """Ids of builty whose LR, e-way bill, invoice or lorry number equals the query"""
+    term = search_query.strip()
+    if not term:
+        return []
+    ids = {row.id for row in db.session.query(Builty.id).filter(db.or_(
+        Builty.lr_no == term,
+        Builty.eway_bill_no == term,
+        Builty.invoice_no == term
+    ))}
+    ids.update(row.id for row in db.session.query(Builty.id)
+               .join(Vehicle, Builty.vehicle_id == Vehicle.id)
+               .filter(Vehicle.lorry_no.in_([term, term.upper()])))
+    return sorted(ids)
+
+
+def _ilike_search(query, search_query, FromStation, ToStation):
+    """Substring search used when no full-text index is available"""
+    search_term = f"%{search_query}%"
+    # Stations are joined once per side, so matches never multiply rows
+    return query.outerjoin(Owner, Builty.owner_id == Owner.id).filter(
+        db.or_(
+            Builty.id.like(search_term),
+            Builty.firm.ilike(search_term),
+            Builty.lr_no.ilike(search_term),
+            Builty.invoice_no.ilike(search_term),
+            Vehicle.lorry_no.ilike(search_term),
+            Driver.name.ilike(search_term),
+            Owner.name.ilike(search_term),
+            FromStation.name.ilike(search_term),
+            ToStation.name.ilike(search_term)
+        )
+    )
 
 
 @bp.route("/")
@@ -28,51 +84,154 @@ def list_builty():
     # Filter by status if provided
     status_filter = request.args.get('status', 'all')
     search_query = request.args.get('q', '')
-    
-    query = Builty.query
-    
+
+    # Select plain columns instead of hydrating Builty and its relationships
+    query, FromStation, ToStation = _register_query()
+
     # Apply status filter
     if status_filter != 'all':
         query = query.filter(Builty.status == status_filter)
-    
+
     if search_query:
-        search_term = f"%{search_query}%"
-        # Use explicit joins to avoid ambiguous foreign key errors
-        query = query.outerjoin(Order, Builty.order_id == Order.id)\
-                     .outerjoin(Vehicle, Builty.vehicle_id == Vehicle.id)\
-                     .outerjoin(Driver, Builty.driver_id == Driver.id)\
-                     .outerjoin(Owner, Builty.owner_id == Owner.id)\
-                     .outerjoin(Station, db.or_(
-                         Builty.from_station_id == Station.id,
-                         Builty.to_station_id == Station.id
-                     )).filter(
-            db.or_(
-                Builty.id.like(search_term),
-                Builty.firm.ilike(search_term),
-                Builty.lr_no.ilike(search_term),
-                Builty.invoice_no.ilike(search_term),
-                Vehicle.lorry_no.ilike(search_term),
-                Driver.name.ilike(search_term),
-                Owner.name.ilike(search_term),
-                Station.name.ilike(search_term)
-            )
-        )
-    
-    # Eagerly load relationships to avoid N+1 queries
-    builty_list = query.options(
-        db.joinedload(Builty.order),
-        db.joinedload(Builty.consignor),
-        db.joinedload(Builty.consignee),
-        db.joinedload(Builty.from_station),
-        db.joinedload(Builty.to_station),
-        db.joinedload(Builty.vehicle),
-        db.joinedload(Builty.driver),
-        db.joinedload(Builty.owner),
-        db.joinedload(Builty.goods),
-        db.joinedload(Builty.booking_agent)
-    ).order_by(Builty.id.desc()).limit(200).all()
+        # Exact LR / e-way bill / invoice / lorry numbers are index seeks
+        exact_ids = _exact_match_ids(search_query)
+        if exact_ids:
+            query = query.filter(Builty.id.in_(exact_ids))
+        else:
+            matches = builty_index.matching_ids(search_query)
+            if matches is not None:
+                query = query.filter(Builty.id.in_(matches))
+            else:
+                query = _ilike_search(query, search_query, FromStation, ToStation)
+
+    # Keyset pagination on the primary key keeps every page O(page size)
+    page = keyset_paginate(
+        query,
+        Builty.id,
+        get_page_size("BUILTY_PAGE_SIZE"),
+        after=request.args.get('after', type=int),
+        before=request.args.get('before', type=int),
+    )
     view_type = request.args.get('view', 'deck')
-    return render_template("builty/list.html", builty_list=builty_list, search_query=search_query, status_filter=status_filter, view_type=view_type)
+    return render_template("builty/list.html", builty_list=page.items, page=page, search_query=search_query, status_filter=status_filter, view_type=view_type)
+
+
+@bp.get("/search")
+@login_required
+def search_builty():
+    """Interactive LR lookup: exact numbers first, then best full-text matches"""
+    search_query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int) or 20, 100))
+    if not search_query:
+        return jsonify([])
+
+    ids = _exact_match_ids(search_query)[:limit]
+    if len(ids) < limit:
+        ranked = builty_index.ranked_ids(search_query, limit)
+        if ranked is None:
+            query, FromStation, ToStation = _register_query()
+            ranked = [row.id for row in _ilike_search(query, search_query, FromStation, ToStation)
+                      .order_by(Builty.id.desc()).limit(limit)]
+        ids += [i for i in ranked if i not in ids][:limit - len(ids)]
+
+    query, _, _ = _register_query()
+    rows = {row.id: row for row in query.filter(Builty.id.in_(ids))} if ids else {}
+    return jsonify([{
+        'id': row.id,
+        'label': f"LR {row.lr_no}" if row.lr_no else f"Builty #{row.id}",
+        'lr_no': row.lr_no,
+        'date': row.date.isoformat() if row.date else None,
+        'status': row.status,
+        'lorry_no': row.lorry_no,
+        'driver': row.driver_name,
+        'from_station': row.from_station_name,
+        'to_station': row.to_station_name,
+        'url': url_for('builty.view_builty', builty_id=row.id),
+    } for row in (rows[i] for i in ids if i in rows)])
+
+
+# Orders the builty form offers before anything is typed, kept per worker
+RECENT_OPEN_ORDERS = 50
+# Seconds an edit that leaves the newest id and the open count alone may go unseen
+RECENT_OPEN_ORDERS_TTL = 30
+
+
+def _open_orders_query():
+    """Orders not yet dispatched, with the party names for their labels"""
+    return db.session.query(
+        Order.id,
+        Order.date,
+        Order.order_type,
+        Consignor.name.label("consignor_name"),
+        Consignee.name.label("consignee_name"),
+        BookingAgent.name.label("agent_name"),
+    ).select_from(Order)\
+     .outerjoin(Consignor, Order.consignor_id == Consignor.id)\
+     .outerjoin(Consignee, Order.consignee_id == Consignee.id)\
+     .outerjoin(BookingAgent, Order.booking_agent_id == BookingAgent.id)\
+     .filter(Order.status != 'DISPATCHED')
+
+
+def _open_order_data(row):
+    if row.order_type == 'AGENT':
+        party = row.agent_name
+    else:
+        party = " → ".join(name for name in (row.consignor_name, row.consignee_name) if name)
+    return {
+        'id': row.id,
+        'label': f"Order #{row.id} - {party}" if party else f"Order #{row.id}",
+        'date': row.date.isoformat() if row.date else None,
+        'order_type': row.order_type,
+        'party': party,
+    }
+
+
+def _open_orders_stamp():
+    # New, deleted and dispatched orders move one of these; both are index reads
+    return db.session.execute(db.select(
+        db.select(db.func.max(Order.id)).scalar_subquery(),
+        db.select(db.func.count()).select_from(Order).where(Order.status != 'DISPATCHED').scalar_subquery(),
+    )).one()
+
+
+def recent_open_orders(limit=RECENT_OPEN_ORDERS):
+    """The most recent undispatched orders, newest first, from a per-worker
+    cache. Orders are written too often to version like master data, so the
+    cache is checked against the newest order id and the open order count,
+    and rebuilt after a write to the party names or RECENT_OPEN_ORDERS_TTL"""
+    rows = cached_result(
+        "recent_open_orders",
+        ("consignors", "consignees", "booking_agents"),
+        lambda: [_open_order_data(row) for row in
+                 _open_orders_query().order_by(Order.id.desc()).limit(RECENT_OPEN_ORDERS)],
+        check=_open_orders_stamp,
+        ttl=RECENT_OPEN_ORDERS_TTL,
+    )
+    return rows[:limit]
+
+
+@bp.get("/eligible-orders")
+@login_required
+def eligible_orders():
+    """Typeahead for the builty order picker: orders not yet dispatched"""
+    search_query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int) or 20, 50))
+    if not search_query:
+        return jsonify(recent_open_orders(limit))
+
+    query = _open_orders_query()
+    order_no = ORDER_NO_RE.fullmatch(search_query)
+    if order_no:
+        max_id = db.session.query(db.func.max(Order.id)).scalar() or 0
+        query = query.filter(id_prefix_filter(Order.id, order_no.group(1), max_id))
+    else:
+        term = f"{search_query}%"
+        query = query.filter(db.or_(
+            Consignor.name.ilike(term),
+            Consignee.name.ilike(term),
+            BookingAgent.name.ilike(term)
+        ))
+    return jsonify([_open_order_data(row) for row in query.order_by(Order.id.desc()).limit(limit)])
 
 
 @bp.route("/new", methods=["GET", "POST"])
@@ -82,7 +241,6 @@ def create_builty():
     
     # Populate choices
     choices = _choices()
-    form.order_id.choices = [(0, 'Select Order')] + choices['orders']
     form.vehicle_id.choices = [(0, 'Select Vehicle')] + choices['vehicles']
     form.driver_id.choices = [(0, 'Select Driver')] + choices['drivers']
     form.owner_id.choices = [(0, 'Select Owner')] + choices['owners']
@@ -93,13 +251,6 @@ def create_builty():
     form.consignee_id.choices = [(0, 'Select Consignee')] + choices['consignees']
     form.booking_agent_id.choices = [(0, 'Select Agent')] + choices['agents']
     
-    # Debug: Check if all fields have choices
-    import logging
-    logger = logging.getLogger(__name__)
-    for field_name, field in form._fields.items():
-        if hasattr(field, 'choices') and field.choices is None:
-            logger.warning(f"Field {field_name} has no choices")
-    
     if not form.date.data:
         form.date.data = date.today()
 
@@ -147,36 +298,36 @@ def create_builty():
 
     # Custom validation for required fields
     validation_errors = []
+    if form.is_submitted():
+        # Check required fields that need valid IDs (not None)
+        required_fields = [
+            ('order_id', 'Order'),
+            ('vehicle_id', 'Vehicle'), 
+            ('driver_id', 'Driver'),
+            ('owner_id', 'Owner'),
+            ('from_station_id', 'From Station'),
+            ('to_station_id', 'To Station')
+        ]
     
-    # Check required fields that need valid IDs (not None)
-    required_fields = [
-        ('order_id', 'Order'),
-        ('vehicle_id', 'Vehicle'), 
-        ('driver_id', 'Driver'),
-        ('owner_id', 'Owner'),
-        ('from_station_id', 'From Station'),
-        ('to_station_id', 'To Station')
-    ]
+        for field_name, field_label in required_fields:
+            if getattr(form, field_name).data is None:
+                validation_errors.append(f"{field_label} is required")
+                getattr(form, field_name).errors.append(f"{field_label} is required")
     
-    for field_name, field_label in required_fields:
-        if getattr(form, field_name).data is None:
-            validation_errors.append(f"{field_label} is required")
-            getattr(form, field_name).errors.append(f"{field_label} is required")
+        # Check date
+        if not form.date.data:
+            validation_errors.append("Date is required")
+            form.date.errors.append("Date is required")
     
-    # Check date
-    if not form.date.data:
-        validation_errors.append("Date is required")
-        form.date.errors.append("Date is required")
-    
-    # Check if order exists and is not already dispatched
-    if form.order_id.data is not None:
-        order = Order.query.get(form.order_id.data)
-        if not order:
-            validation_errors.append("Selected order does not exist")
-            form.order_id.errors.append("Selected order does not exist")
-        elif order.status == 'DISPATCHED':
-            validation_errors.append("Selected order is already dispatched")
-            form.order_id.errors.append("Selected order is already dispatched")
+        # Check if order exists and is not already dispatched
+        if form.order_id.data is not None:
+            order = Order.query.get(form.order_id.data)
+            if not order:
+                validation_errors.append("Selected order does not exist")
+                form.order_id.errors.append("Selected order does not exist")
+            elif order.status == 'DISPATCHED':
+                validation_errors.append("Selected order is already dispatched")
+                form.order_id.errors.append("Selected order is already dispatched")
     
     if not validation_errors and form.validate_on_submit():
         try:
@@ -255,7 +406,7 @@ def create_builty():
                 }), 400
             else:
                 return render_template("builty/form.html", form=form, mode="create", order_data=order_data)
-    else:
+    elif form.is_submitted():
         # Form validation failed
         if validation_errors:
             flash("Please correct the following errors:", "error")
@@ -310,7 +461,6 @@ def edit_builty(builty_id):
     
     # Populate choices
     choices = _choices()
-    form.order_id.choices = [(0, 'Select Order')] + choices['orders']
     form.vehicle_id.choices = [(0, 'Select Vehicle')] + choices['vehicles']
     form.driver_id.choices = [(0, 'Select Driver')] + choices['drivers']
     form.owner_id.choices = [(0, 'Select Owner')] + choices['owners']
@@ -332,17 +482,25 @@ def edit_builty(builty_id):
     if form.validate_on_submit():
         try:
             # Update builty fields
-            builty.vehicle_id = form.vehicle_id.data            builty.driver_id = form.driver_id.data            builty.owner_id = form.owner_id.data            builty.date = form.date.data
-            builty.from_station_id = form.from_station_id.data            builty.to_station_id = form.to_station_id.data            builty.firm = form.firm.data
+            builty.vehicle_id = form.vehicle_id.data
+            builty.driver_id = form.driver_id.data
+            builty.owner_id = form.owner_id.data
+            builty.date = form.date.data
+            builty.from_station_id = form.from_station_id.data
+            builty.to_station_id = form.to_station_id.data
+            builty.firm = form.firm.data
             builty.lr_no = form.lr_no.data
             builty.status = form.status.data
             builty.invoice_no = form.invoice_no.data
             builty.eway_bill_no = form.eway_bill_no.data
-            builty.goods_id = form.goods_id.data            builty.actual_weight = form.actual_weight.data
+            builty.goods_id = form.goods_id.data
+            builty.actual_weight = form.actual_weight.data
             builty.charged_weight = form.charged_weight.data
             builty.rate = form.rate.data
             builty.advance_amount = form.advance_amount.data
-            builty.consignor_id = form.consignor_id.data            builty.consignee_id = form.consignee_id.data            builty.booking_agent_id = form.booking_agent_id.data            
+            builty.consignor_id = form.consignor_id.data
+            builty.consignee_id = form.consignee_id.data
+            builty.booking_agent_id = form.booking_agent_id.data
             # Update phone book fields
             builty.consignor_concerned_person_id = request.form.get('consignor_concerned_person_id') if request.form.get('consignor_concerned_person_id') != '' else None
             builty.consignor_phone_number_id = request.form.get('consignor_phone_number_id') if request.form.get('consignor_phone_number_id') != '' else None
@@ -1,28 +1,86 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from ..extensions import db
-from ..models import Consignor, Consignee, BookingAgent, Station, PinCode, TransactionLog, PhoneBook
+from ..models import Consignor, Consignee, BookingAgent, TransactionLog, PhoneBook
 from ..forms import ConsignorForm, ConsigneeForm, BookingAgentForm
 from ..auth import login_required
+from ..listing import MasterList
+from ..choices import get_choices
 
 bp = Blueprint("entities", __name__, url_prefix="/entities")
 
 
 def _get_choices():
     """Get common choices for forms"""
-    stations = Station.query.order_by(Station.name).all()
-    pin_codes = PinCode.query.order_by(PinCode.code).all()
+    choices = get_choices("stations", "pin_codes")
     return {
-        'stations': [(0, 'Select Station')] + [(s.id, s.name) for s in stations],
-        'pin_codes': [(0, 'Select Pin Code')] + [(p.id, f"{p.code} - {p.state or 'Unknown'}") for p in pin_codes]
+        'stations': [(0, 'Select Station')] + choices['stations'],
+        'pin_codes': [(0, 'Select Pin Code')] + choices['pin_codes']
     }
 
 
+def _party_json(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "address": item.address,
+        "gstin": item.gstin,
+        "pan": item.pan,
+        "phone": item.phone,
+        "email": item.email,
+        "station_id": item.station_id,
+        "station": item.station.name if item.station else None,
+    }
+
+
+def _agent_json(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "phone": item.phone,
+        "gstin": item.gstin,
+        "city": item.city,
+        "state": item.state,
+        "email": item.email,
+        "station_id": item.station_id,
+    }
+
+
+_consignor_list = MasterList(
+    Consignor,
+    sort_columns={"name": Consignor.name, "gstin": Consignor.gstin, "created": Consignor.created_at},
+    default_sort="name",
+    search_columns=[Consignor.name, Consignor.gstin, Consignor.phone],
+    filters={"station_id": Consignor.station_id},
+    options=[db.joinedload(Consignor.station)],
+    serialize=_party_json,
+)
+
+_consignee_list = MasterList(
+    Consignee,
+    sort_columns={"name": Consignee.name, "gstin": Consignee.gstin, "created": Consignee.created_at},
+    default_sort="name",
+    search_columns=[Consignee.name, Consignee.gstin, Consignee.phone],
+    filters={"station_id": Consignee.station_id},
+    options=[db.joinedload(Consignee.station)],
+    serialize=_party_json,
+)
+
+_agent_list = MasterList(
+    BookingAgent,
+    sort_columns={"name": BookingAgent.name, "city": BookingAgent.city, "state": BookingAgent.state,
+                  "created": BookingAgent.created_at},
+    default_sort="name",
+    search_columns=[BookingAgent.name, BookingAgent.gstin, BookingAgent.phone, BookingAgent.city],
+    filters={"station_id": BookingAgent.station_id, "state": BookingAgent.state},
+    serialize=_agent_json,
+)
+
+
 # Consignors
 @bp.route("/consignors")
 @login_required
 def list_consignors():
-    items = Consignor.query.order_by(Consignor.name).all()
-    return render_template("entities/consignors_list.html", items=items, entity_type="consignors")
+    return _consignor_list.render("entities/consignors_list.html", entity_type="consignors")
 
 
 @bp.route("/consignors/new", methods=["GET", "POST"])
@@ -79,7 +137,9 @@ def edit_consignor(item_id):
         c.address = form.address.data
         c.gstin = form.gstin.data
         c.pan = form.pan.data
-        c.station_id = form.station_id.data        c.pin_code_id = form.pin_code_id.data        c.phone = form.phone.data
+        c.station_id = form.station_id.data
+        c.pin_code_id = form.pin_code_id.data
+        c.phone = form.phone.data
         c.email = form.email.data
         db.session.add(c)
         db.session.add(TransactionLog(entity="Consignor", entity_id=c.id, action="UPDATE"))
@@ -93,8 +153,7 @@ def edit_consignor(item_id):
 @bp.route("/consignees")
 @login_required
 def list_consignees():
-    items = Consignee.query.order_by(Consignee.name).all()
-    return render_template("entities/consignees_list.html", items=items, entity_type="consignees")
+    return _consignee_list.render("entities/consignees_list.html", entity_type="consignees")
 
 
 @bp.route("/consignees/new", methods=["GET", "POST"])
@@ -139,7 +198,9 @@ def edit_consignee(item_id):
         c.address = form.address.data
         c.gstin = form.gstin.data
         c.pan = form.pan.data
-        c.station_id = form.station_id.data        c.pin_code_id = form.pin_code_id.data        c.phone = form.phone.data
+        c.station_id = form.station_id.data
+        c.pin_code_id = form.pin_code_id.data
+        c.phone = form.phone.data
         c.email = form.email.data
         db.session.add(c)
         db.session.add(TransactionLog(entity="Consignee", entity_id=c.id, action="UPDATE"))
@@ -153,8 +214,7 @@ def edit_consignee(item_id):
 @bp.route("/agents")
 @login_required
 def list_agents():
-    items = BookingAgent.query.order_by(BookingAgent.name).all()
-    return render_template("entities/agents_list.html", items=items, entity_type="agents")
+    return _agent_list.render("entities/agents_list.html", entity_type="agents")
 
 
 @bp.route("/agents/new", methods=["GET", "POST"])
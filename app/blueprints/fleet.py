@@ -1,157 +1,219 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from ..extensions import db
-from ..models import Vehicle, Driver, Owner, TransactionLog
-from ..forms import VehicleForm, DriverForm, OwnerForm
-from ..auth import login_required
-
-bp = Blueprint("fleet", __name__, url_prefix="/fleet")
-
-
-def _get_fleet_choices():
-    """Get choices for fleet forms"""
-    owners = Owner.query.order_by(Owner.name).all()
-    drivers = Driver.query.order_by(Driver.name).all()
-    return {
-        'owners': [(0, 'Select Owner')] + [(o.id, o.name) for o in owners],
-        'drivers': [(0, 'Select Driver')] + [(d.id, d.name) for d in drivers]
-    }
-
-
-# Vehicles
-@bp.route("/vehicles")
-@login_required
-def list_vehicles():
-    items = Vehicle.query.order_by(Vehicle.lorry_no).all()
-    return render_template("fleet/vehicles_list.html", items=items, entity_type="vehicles")
-
-
-@bp.route("/vehicles/new", methods=["GET", "POST"])
-@login_required
-def create_vehicle():
-    form = VehicleForm()
-    choices = _get_fleet_choices()
-    form.owner_id.choices = choices['owners']
-    form.driver_id.choices = choices['drivers']
-    
-    if form.validate_on_submit():
-        v = Vehicle(
-            lorry_no=form.lorry_no.data,
-            capacity=form.capacity.data,
-            chassis_no=form.chassis_no.data,
-            engine_no=form.engine_no.data,
-            owner_id=form.owner_id.data,
-            driver_id=form.driver_id.data,
-        )
-        db.session.add(v)
-        db.session.flush()
-        db.session.add(TransactionLog(entity="Vehicle", entity_id=v.id, action="CREATE"))
-        db.session.commit()
-        flash("Vehicle created", "success")
-        return redirect(url_for("fleet.list_vehicles"))
-    return render_template("fleet/vehicle_form.html", form=form, mode="create")
-
-
-@bp.route("/vehicles/<int:item_id>/edit", methods=["GET", "POST"])
-@login_required
-def edit_vehicle(item_id):
-    v = Vehicle.query.get_or_404(item_id)
-    form = VehicleForm(obj=v)
-    choices = _get_fleet_choices()
-    form.owner_id.choices = choices['owners']
-    form.driver_id.choices = choices['drivers']
-    
-    if form.validate_on_submit():
-        form.populate_obj(v)
-        db.session.add(v)
-        db.session.add(TransactionLog(entity="Vehicle", entity_id=v.id, action="UPDATE"))
-        db.session.commit()
-        flash("Vehicle updated", "success")
-        return redirect(url_for("fleet.list_vehicles"))
-    return render_template("fleet/vehicle_form.html", form=form, mode="edit", item=v)
-
-
-# Drivers
-@bp.route("/drivers")
-@login_required
-def list_drivers():
-    items = Driver.query.order_by(Driver.name).all()
-    return render_template("fleet/drivers_list.html", items=items, entity_type="drivers")
-
-
-@bp.route("/drivers/new", methods=["GET", "POST"])
-@login_required
-def create_driver():
-    form = DriverForm()
-    if form.validate_on_submit():
-        d = Driver(
-            name=form.name.data,
-            address=form.address.data,
-            license_no=form.license_no.data,
-            validity=form.validity.data,
-            aadhar=form.aadhar.data,
-        )
-        db.session.add(d)
-        db.session.flush()
-        db.session.add(TransactionLog(entity="Driver", entity_id=d.id, action="CREATE"))
-        db.session.commit()
-        flash("Driver created", "success")
-        return redirect(url_for("fleet.list_drivers"))
-    return render_template("fleet/driver_form.html", form=form, mode="create")
-
-
-@bp.route("/drivers/<int:item_id>/edit", methods=["GET", "POST"])
-@login_required
-def edit_driver(item_id):
-    d = Driver.query.get_or_404(item_id)
-    form = DriverForm(obj=d)
-    if form.validate_on_submit():
-        form.populate_obj(d)
-        db.session.add(d)
-        db.session.add(TransactionLog(entity="Driver", entity_id=d.id, action="UPDATE"))
-        db.session.commit()
-        flash("Driver updated", "success")
-        return redirect(url_for("fleet.list_drivers"))
-    return render_template("fleet/driver_form.html", form=form, mode="edit", item=d)
-
-
-# Owners
-@bp.route("/owners")
-@login_required
-def list_owners():
-    items = Owner.query.order_by(Owner.name).all()
-    return render_template("fleet/owners_list.html", items=items, entity_type="owners")
-
-
-@bp.route("/owners/new", methods=["GET", "POST"])
-@login_required
-def create_owner():
-    form = OwnerForm()
-    if form.validate_on_submit():
-        o = Owner(
-            name=form.name.data,
-            pan=form.pan.data,
-            aadhar=form.aadhar.data,
-            address=form.address.data,
-        )
-        db.session.add(o)
-        db.session.flush()
-        db.session.add(TransactionLog(entity="Owner", entity_id=o.id, action="CREATE"))
-        db.session.commit()
-        flash("Owner created", "success")
-        return redirect(url_for("fleet.list_owners"))
-    return render_template("fleet/owner_form.html", form=form, mode="create")
-
-
-@bp.route("/owners/<int:item_id>/edit", methods=["GET", "POST"])
-@login_required
-def edit_owner(item_id):
-    o = Owner.query.get_or_404(item_id)
-    form = OwnerForm(obj=o)
-    if form.validate_on_submit():
-        form.populate_obj(o)
-        db.session.add(o)
-        db.session.add(TransactionLog(entity="Owner", entity_id=o.id, action="UPDATE"))
-        db.session.commit()
-        flash("Owner updated", "success")
-        return redirect(url_for("fleet.list_owners"))
-    return render_template("fleet/owner_form.html", form=form, mode="edit", item=o)
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from datetime import date
+from ..extensions import db
+from ..models import Vehicle, Driver, Owner, TransactionLog
+from ..forms import VehicleForm, DriverForm, OwnerForm
+from ..auth import login_required
+from ..listing import MasterList
+from ..choices import get_choices
+
+bp = Blueprint("fleet", __name__, url_prefix="/fleet")
+
+
+def _get_fleet_choices():
+    """Get choices for fleet forms"""
+    choices = get_choices("owners", "drivers")
+    return {
+        'owners': [(0, 'Select Owner')] + choices['owners'],
+        'drivers': [(0, 'Select Driver')] + choices['drivers']
+    }
+
+
+def _vehicle_json(item):
+    return {
+        "id": item.id,
+        "lorry_no": item.lorry_no,
+        "capacity": item.capacity,
+        "chassis_no": item.chassis_no,
+        "engine_no": item.engine_no,
+        "owner_id": item.owner_id,
+        "owner": item.owner.name if item.owner else None,
+        "driver_id": item.driver_id,
+        "driver": item.driver.name if item.driver else None,
+    }
+
+
+def _driver_json(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "license_no": item.license_no,
+        "validity": item.validity.isoformat() if item.validity else None,
+        "phone": item.phone,
+        "address": item.address,
+    }
+
+
+def _owner_json(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "pan": item.pan,
+        "phone": item.phone,
+        "address": item.address,
+    }
+
+
+_vehicle_list = MasterList(
+    Vehicle,
+    sort_columns={"lorry_no": Vehicle.lorry_no, "capacity": Vehicle.capacity, "created": Vehicle.created_at},
+    default_sort="lorry_no",
+    search_columns=[Vehicle.lorry_no, Vehicle.chassis_no, Vehicle.engine_no],
+    filters={"owner_id": Vehicle.owner_id, "driver_id": Vehicle.driver_id},
+    options=[db.joinedload(Vehicle.owner), db.joinedload(Vehicle.driver)],
+    serialize=_vehicle_json,
+)
+
+_driver_list = MasterList(
+    Driver,
+    sort_columns={"name": Driver.name, "license_no": Driver.license_no, "validity": Driver.validity,
+                  "created": Driver.created_at},
+    default_sort="name",
+    search_columns=[Driver.name, Driver.license_no, Driver.phone],
+    serialize=_driver_json,
+)
+
+_owner_list = MasterList(
+    Owner,
+    sort_columns={"name": Owner.name, "created": Owner.created_at},
+    default_sort="name",
+    search_columns=[Owner.name, Owner.pan, Owner.phone],
+    serialize=_owner_json,
+)
+
+
+# Vehicles
+@bp.route("/vehicles")
+@login_required
+def list_vehicles():
+    return _vehicle_list.render("fleet/vehicles_list.html", entity_type="vehicles")
+
+
+@bp.route("/vehicles/new", methods=["GET", "POST"])
+@login_required
+def create_vehicle():
+    form = VehicleForm()
+    choices = _get_fleet_choices()
+    form.owner_id.choices = choices['owners']
+    form.driver_id.choices = choices['drivers']
+    
+    if form.validate_on_submit():
+        v = Vehicle(
+            lorry_no=form.lorry_no.data,
+            capacity=form.capacity.data,
+            chassis_no=form.chassis_no.data,
+            engine_no=form.engine_no.data,
+            owner_id=form.owner_id.data,
+            driver_id=form.driver_id.data,
+        )
+        db.session.add(v)
+        db.session.flush()
+        db.session.add(TransactionLog(entity="Vehicle", entity_id=v.id, action="CREATE"))
+        db.session.commit()
+        flash("Vehicle created", "success")
+        return redirect(url_for("fleet.list_vehicles"))
+    return render_template("fleet/vehicle_form.html", form=form, mode="create")
+
+
+@bp.route("/vehicles/<int:item_id>/edit", methods=["GET", "POST"])
+@login_required
+def edit_vehicle(item_id):
+    v = Vehicle.query.get_or_404(item_id)
+    form = VehicleForm(obj=v)
+    choices = _get_fleet_choices()
+    form.owner_id.choices = choices['owners']
+    form.driver_id.choices = choices['drivers']
+    
+    if form.validate_on_submit():
+        form.populate_obj(v)
+        db.session.add(v)
+        db.session.add(TransactionLog(entity="Vehicle", entity_id=v.id, action="UPDATE"))
+        db.session.commit()
+        flash("Vehicle updated", "success")
+        return redirect(url_for("fleet.list_vehicles"))
+    return render_template("fleet/vehicle_form.html", form=form, mode="edit", item=v)
+
+
+# Drivers
+@bp.route("/drivers")
+@login_required
+def list_drivers():
+    return _driver_list.render("fleet/drivers_list.html", entity_type="drivers", today=date.today())
+
+
+@bp.route("/drivers/new", methods=["GET", "POST"])
+@login_required
+def create_driver():
+    form = DriverForm()
+    if form.validate_on_submit():
+        d = Driver(
+            name=form.name.data,
+            address=form.address.data,
+            license_no=form.license_no.data,
+            validity=form.validity.data,
+            aadhar=form.aadhar.data,
+        )
+        db.session.add(d)
+        db.session.flush()
+        db.session.add(TransactionLog(entity="Driver", entity_id=d.id, action="CREATE"))
+        db.session.commit()
+        flash("Driver created", "success")
+        return redirect(url_for("fleet.list_drivers"))
+    return render_template("fleet/driver_form.html", form=form, mode="create")
+
+
+@bp.route("/drivers/<int:item_id>/edit", methods=["GET", "POST"])
+@login_required
+def edit_driver(item_id):
+    d = Driver.query.get_or_404(item_id)
+    form = DriverForm(obj=d)
+    if form.validate_on_submit():
+        form.populate_obj(d)
+        db.session.add(d)
+        db.session.add(TransactionLog(entity="Driver", entity_id=d.id, action="UPDATE"))
+        db.session.commit()
+        flash("Driver updated", "success")
+        return redirect(url_for("fleet.list_drivers"))
+    return render_template("fleet/driver_form.html", form=form, mode="edit", item=d)
+
+
+# Owners
+@bp.route("/owners")
+@login_required
+def list_owners():
+    return _owner_list.render("fleet/owners_list.html", entity_type="owners")
+
+
+@bp.route("/owners/new", methods=["GET", "POST"])
+@login_required
+def create_owner():
+    form = OwnerForm()
+    if form.validate_on_submit():
+        o = Owner(
+            name=form.name.data,
+            pan=form.pan.data,
+            aadhar=form.aadhar.data,
+            address=form.address.data,
+        )
+        db.session.add(o)
+        db.session.flush()
+        db.session.add(TransactionLog(entity="Owner", entity_id=o.id, action="CREATE"))
+        db.session.commit()
+        flash("Owner created", "success")
+        return redirect(url_for("fleet.list_owners"))
+    return render_template("fleet/owner_form.html", form=form, mode="create")
+
+
+@bp.route("/owners/<int:item_id>/edit", methods=["GET", "POST"])
+@login_required
+def edit_owner(item_id):
+    o = Owner.query.get_or_404(item_id)
+    form = OwnerForm(obj=o)
+    if form.validate_on_submit():
+        form.populate_obj(o)
+        db.session.add(o)
+        db.session.add(TransactionLog(entity="Owner", entity_id=o.id, action="UPDATE"))
+        db.session.commit()
+        flash("Owner updated", "success")
+        return redirect(url_for("fleet.list_owners"))
+    return render_template("fleet/owner_form.html", form=form, mode="edit", item=o)
@@ -1,21 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from datetime import date
 from ..extensions import db
 from ..models import Order, Consignor, Consignee, Goods, Station, BookingAgent, TransactionLog, Builty
 from ..forms import OrderForm
 from ..auth import login_required
+from ..pagination import keyset_paginate, get_page_size
+from ..search import order_index
+from ..choices import get_choices
+from ..exports import EXPORT_FORMATS, order_export_query, export_header, export_rows
 
 bp = Blueprint("orders", __name__, url_prefix="/orders")
 
 
 def _choices():
-    return {
-        "stations": [(s.id, s.name) for s in Station.query.order_by(Station.name).all()],
-        "consignors": [(c.id, c.name) for c in Consignor.query.order_by(Consignor.name).all()],
-        "consignees": [(c.id, c.name) for c in Consignee.query.order_by(Consignee.name).all()],
-        "goods": [(g.id, g.description) for g in Goods.query.order_by(Goods.description).all()],
-        "agents": [(a.id, a.name) for a in BookingAgent.query.order_by(BookingAgent.name).all()],
-    }
+    return get_choices("stations", "consignors", "consignees", "goods", "agents")
 
 
 def _populate_form_choices(form):
@@ -29,16 +27,34 @@ def _populate_form_choices(form):
     form.booking_agent_id.choices = [(0, 'Select Agent')] + choices['agents']
 
 
-@bp.route("/")
-@login_required
-def list_orders():
-    # Filter by status if provided, default to active orders only
-    status_filter = request.args.get('status', 'active')
-    search_query = request.args.get('q', '')
-    
-    query = Order.query
-    
-    # Apply status filter
+def _ilike_search(query, search_query):
+    """Substring search used when no full-text index is available"""
+    search_term = f"%{search_query}%"
+    FromStation = db.aliased(Station)
+    ToStation = db.aliased(Station)
+    # Use explicit joins to avoid ambiguous foreign key errors
+    return query.outerjoin(Consignor, Order.consignor_id == Consignor.id)\
+                .outerjoin(Consignee, Order.consignee_id == Consignee.id)\
+                .outerjoin(Goods, Order.goods_id == Goods.id)\
+                .outerjoin(BookingAgent, Order.booking_agent_id == BookingAgent.id)\
+                .outerjoin(FromStation, Order.from_station_id == FromStation.id)\
+                .outerjoin(ToStation, Order.to_station_id == ToStation.id).filter(
+        db.or_(
+            Order.id.like(search_term),
+            Order.date.like(search_term),
+            Order.firm.ilike(search_term),
+            Consignor.name.ilike(search_term),
+            Consignee.name.ilike(search_term),
+            FromStation.name.ilike(search_term),
+            ToStation.name.ilike(search_term),
+            Goods.description.ilike(search_term),
+            BookingAgent.name.ilike(search_term)
+        )
+    )
+
+
+def filter_orders(query, status_filter, search_query):
+    """Apply the orders list status and search filters to any query over Order"""
     if status_filter == 'active':
         query = query.filter(Order.status.in_(['NEW', 'CONFIRMED']))
     elif status_filter == 'dispatched':
@@ -47,52 +63,112 @@ def list_orders():
         pass  # Show all
     else:
         query = query.filter(Order.status == status_filter)
-    
+
     if search_query:
-        search_term = f"%{search_query}%"
-        # Use explicit joins to avoid ambiguous foreign key errors
-        query = query.outerjoin(Consignor, Order.consignor_id == Consignor.id)\
-                     .outerjoin(Consignee, Order.consignee_id == Consignee.id)\
-                     .outerjoin(Goods, Order.goods_id == Goods.id)\
-                     .outerjoin(BookingAgent, Order.booking_agent_id == BookingAgent.id)\
-                     .outerjoin(Station, db.or_(
-                         Order.from_station_id == Station.id,
-                         Order.to_station_id == Station.id
-                     )).filter(
-            db.or_(
-                Order.id.like(search_term),
-                Order.date.like(search_term),
-                Order.firm.ilike(search_term),
-                Consignor.name.ilike(search_term),
-                Consignee.name.ilike(search_term),
-                Station.name.ilike(search_term),
-                Goods.description.ilike(search_term),
-                BookingAgent.name.ilike(search_term)
-            )
-        )
+        matches = order_index.matching_ids(search_query)
+        if matches is None:
+            matches = _ilike_search(db.session.query(Order.id), search_query)
+        query = query.filter(Order.id.in_(matches))
+    return query
+
+
+@bp.route("/")
+@login_required
+def list_orders():
+    # Filter by status if provided, default to active orders only
+    status_filter = request.args.get('status', 'active')
+    search_query = request.args.get('q', '')
+    
+    query = filter_orders(Order.query, status_filter, search_query)
     
     # Eagerly load relationships to avoid N+1 queries
-    orders = query.options(
+    query = query.options(
         db.joinedload(Order.consignor),
         db.joinedload(Order.consignee),
         db.joinedload(Order.from_station),
         db.joinedload(Order.to_station),
         db.joinedload(Order.goods),
         db.joinedload(Order.booking_agent)
-    ).order_by(Order.id.desc()).limit(200).all()
-    
+    )
+
+    # Keyset pagination on the primary key keeps every page O(page size)
+    page = keyset_paginate(
+        query,
+        Order.id,
+        get_page_size("ORDERS_PAGE_SIZE"),
+        after=request.args.get('after', type=int),
+        before=request.args.get('before', type=int),
+    )
+    orders = page.items
+
     # Separate orders by type for the template
     party_orders = [order for order in orders if order.order_type == 'PARTY']
     agent_orders = [order for order in orders if order.order_type == 'AGENT']
-    
-    return render_template("orders/list.html", 
-                         orders=orders, 
+
+    return render_template("orders/list.html",
+                         orders=orders,
+                         page=page,
                          party_orders=party_orders,
                          agent_orders=agent_orders,
-                         search_query=search_query, 
+                         search_query=search_query,
                          status_filter=status_filter)
 
 
+@bp.get("/search")
+@login_required
+def search_orders():
+    """Interactive order search, best matches first"""
+    search_query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int) or 20, 100))
+    if not search_query:
+        return jsonify([])
+
+    ids = order_index.ranked_ids(search_query, limit)
+    if ids is None:
+        ids = [o.id for o in _ilike_search(Order.query, search_query).order_by(Order.id.desc()).limit(limit)]
+    orders = {o.id: o for o in Order.query.options(
+        db.joinedload(Order.consignor),
+        db.joinedload(Order.consignee),
+        db.joinedload(Order.to_station),
+        db.joinedload(Order.goods),
+        db.joinedload(Order.booking_agent)
+    ).filter(Order.id.in_(ids))} if ids else {}
+
+    return jsonify([{
+        'id': order.id,
+        'label': f"Order #{order.id}",
+        'date': order.date.isoformat() if order.date else None,
+        'order_type': order.order_type,
+        'status': order.status,
+        'consignor': order.consignor.name if order.consignor else None,
+        'consignee': order.consignee.name if order.consignee else None,
+        'booking_agent': order.booking_agent.name if order.booking_agent else None,
+        'to_station': order.to_station.name if order.to_station else None,
+        'goods': order.goods.description if order.goods else None,
+        'url': url_for('orders.view_order', order_id=order.id),
+    } for order in (orders[i] for i in ids if i in orders)])
+
+
+@bp.get("/export")
+@login_required
+def export_orders():
+    """Stream the filtered order book as CSV or XLSX"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported export format '{export_format}'"}), 400
+    status_filter = request.args.get('status', 'active')
+    search_query = request.args.get('q', '')
+
+    query = order_export_query(lambda q: filter_orders(q, status_filter, search_query))
+    mimetype, writer = EXPORT_FORMATS[export_format]
+    filename = f"orders-{date.today().isoformat()}.{export_format}"
+    return Response(
+        stream_with_context(writer(export_header(query), export_rows(query))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
 @bp.route("/new", methods=["GET", "POST"])
 @login_required
 def create_order():
@@ -119,25 +195,25 @@ def create_order():
 
     # Custom validation for required fields
     validation_errors = []
-    
-    # Check required fields that need valid IDs (not None)
-    if form.order_type.data == 'PARTY':
-        if form.consignor_id.data is None:
-            validation_errors.append("Consignor is required for Party orders")
-            form.consignor_id.errors.append("Consignor is required")
-        if form.consignee_id.data is None:
-            validation_errors.append("Consignee is required for Party orders")
-            form.consignee_id.errors.append("Consignee is required")
-    elif form.order_type.data == 'AGENT':
-        if form.booking_agent_id.data is None:
-            validation_errors.append("Booking Agent is required for Agent orders")
-            form.booking_agent_id.errors.append("Booking Agent is required")
-    
-    # Check goods is required
-    if form.goods_id.data is None:
-        validation_errors.append("Goods is required")
-        form.goods_id.errors.append("Goods is required")
-    
+    if form.is_submitted():
+        # Check required fields that need valid IDs (not None)
+        if form.order_type.data == 'PARTY':
+            if form.consignor_id.data is None:
+                validation_errors.append("Consignor is required for Party orders")
+                form.consignor_id.errors.append("Consignor is required")
+            if form.consignee_id.data is None:
+                validation_errors.append("Consignee is required for Party orders")
+                form.consignee_id.errors.append("Consignee is required")
+        elif form.order_type.data == 'AGENT':
+            if form.booking_agent_id.data is None:
+                validation_errors.append("Booking Agent is required for Agent orders")
+                form.booking_agent_id.errors.append("Booking Agent is required")
+
+        # Check goods is required
+        if form.goods_id.data is None:
+            validation_errors.append("Goods is required")
+            form.goods_id.errors.append("Goods is required")
+
     if not validation_errors and form.validate_on_submit():
         try:
             # Check for duplicate submission by looking for recent identical orders
@@ -208,7 +284,7 @@ def create_order():
                 return render_template("orders/form.html", form=form, mode="create")
             else:
                 return render_template("orders/form.html", form=form, mode="create")
-    else:
+    elif form.is_submitted():
         # Form validation failed
         if validation_errors:
             flash("Please correct the following errors:", "error")
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, render_template
 from ..extensions import db, csrf
-from ..models import PhoneBook, ConcernedPerson, Consignor, Consignee, BookingAgent, Driver, Owner
+from ..models import PhoneBook, ConcernedPerson
 from ..auth import login_required
+from ..constants import phone_digits
+from ..contacts import ENTITY_MODELS
 
 bp = Blueprint("phonebook", __name__, url_prefix="/phonebook")
 
@@ -24,86 +26,161 @@ def list_phonebook():
                          search_type=search_type)
 
 
+SEARCH_LIMIT = 50
+SEARCH_MAX_LIMIT = 200
+# Matches are counted up to this many; beyond it the total is a lower bound
+SEARCH_COUNT_CAP = 1000
+
+# Relevance of a search match, best first
+RANK_EXACT_PHONE, RANK_PHONE_PREFIX, RANK_PHONE_SUFFIX, RANK_NAME, RANK_COMPANY = range(5)
+
+
+def _starts_with(column, prefix):
+    """``column LIKE 'prefix%'`` as a range any index on ``column`` can serve"""
+    return db.and_(column >= prefix, column < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+def _like_prefix(value):
+    """LIKE pattern matching values that start with ``value`` literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def phone_number_match(query):
+    """Phones whose normalized digits start or end with the digits of ``query``;
+    both are index range scans, the second on the reversed digits"""
+    digits = phone_digits(query)
+    if not digits:
+        return db.false()
+    return db.or_(
+        _starts_with(PhoneBook.phone_digits, digits),
+        _starts_with(PhoneBook.phone_digits_rev, digits[::-1]),
+    )
+
+
+def find_phone_number(phone_number, exclude_id=None):
+    """Existing entry for the same number, however it was formatted"""
+    digits = phone_digits(phone_number)
+    query = PhoneBook.query.filter(
+        PhoneBook.phone_digits == digits if digits else PhoneBook.phone_number == phone_number
+    )
+    if exclude_id is not None:
+        query = query.filter(PhoneBook.id != exclude_id)
+    return query.first()
+
+
+def _parse_search_cursor(value):
+    """(rank, phone id) after which the next page starts, from ``rank.id``"""
+    rank, _, phone_id = (value or '').partition('.')
+    if rank.isdigit() and phone_id.isdigit():
+        return int(rank), int(phone_id)
+    return None
+
+
 @bp.route("/api/search")
 @login_required
 def search_phonebook():
-    """Search phone numbers across all entities with enhanced search options"""
+    """Search phone numbers across all entities, best matches first.
+
+    Matches rank as exact phone, phone prefix, phone suffix, person name,
+    then company name prefix, and by id within a rank. Pages hold ``limit`` rows;
+    ``next_cursor`` fetches the following page. The first page carries
+    ``total``, counted in SQL up to SEARCH_COUNT_CAP, with
+    ``total_exact`` false when the cap was reached.
+    """
     query = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'all').lower()
-    
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT, type=int) or SEARCH_LIMIT, SEARCH_MAX_LIMIT))
+    cursor = _parse_search_cursor(request.args.get('cursor'))
+
     if not query:
-        return jsonify([])
-    
+        return jsonify({'results': [], 'next_cursor': None, 'total': 0, 'total_exact': True})
+
+    digits = phone_digits(query)
+    phone_match = phone_number_match(query)
+    name_match = ConcernedPerson.name.contains(query)
+    # A prefix LIKE, not ilike: ilike wraps the column in lower(), which
+    # keeps ix_concerned_entity_name from serving it; the case-insensitive
+    # collation (MySQL) and LIKE (SQLite) already ignore case
+    company_match = ConcernedPerson.entity_name.like(_like_prefix(query), escape='\\')
+
     # Build search query based on type
     if search_type == 'phone':
-        # Search by phone number
-        phone_entries = PhoneBook.query.filter(
-            PhoneBook.phone_number.contains(query)
-        ).all()
+        condition = phone_match
     elif search_type == 'name':
-        # Search by concerned person name
-        phone_entries = PhoneBook.query.join(ConcernedPerson).filter(
-            ConcernedPerson.name.contains(query)
-        ).all()
+        condition = name_match
     elif search_type == 'company':
-        # Search by company name
-        phone_entries = PhoneBook.query.join(ConcernedPerson).all()
-        # Filter by company name
-        filtered_entries = []
-        for entry in phone_entries:
-            entity = get_entity_by_type_and_id(entry.concerned_person.entity_type, entry.concerned_person.entity_id)
-            if entity and query.lower() in entity.name.lower():
-                filtered_entries.append(entry)
-        phone_entries = filtered_entries
+        condition = company_match
     else:
-        # Search all fields
-        phone_entries = PhoneBook.query.join(ConcernedPerson).filter(
-            (PhoneBook.phone_number.contains(query)) |
-            (ConcernedPerson.name.contains(query))
-        ).all()
-        
-        # Also search by company names
-        all_entries = PhoneBook.query.join(ConcernedPerson).all()
-        for entry in all_entries:
-            entity = get_entity_by_type_and_id(entry.concerned_person.entity_type, entry.concerned_person.entity_id)
-            if entity and query.lower() in entity.name.lower() and entry not in phone_entries:
-                phone_entries.append(entry)
-    
+        condition = db.or_(phone_match, name_match, company_match)
+
+    ranks = []
+    if digits and search_type in ('all', 'phone'):
+        ranks += [
+            (PhoneBook.phone_digits == digits, RANK_EXACT_PHONE),
+            (_starts_with(PhoneBook.phone_digits, digits), RANK_PHONE_PREFIX),
+            (_starts_with(PhoneBook.phone_digits_rev, digits[::-1]), RANK_PHONE_SUFFIX),
+        ]
+    if search_type in ('all', 'name'):
+        ranks.append((name_match, RANK_NAME))
+    rank = db.case(*ranks, else_=RANK_COMPANY) if ranks else db.literal(RANK_COMPANY)
+
+    matches = db.session.query(
+        PhoneBook.id,
+        PhoneBook.phone_number,
+        PhoneBook.label,
+        PhoneBook.is_primary,
+        ConcernedPerson.entity_type,
+        ConcernedPerson.entity_id,
+        ConcernedPerson.entity_name,
+        ConcernedPerson.name.label('person_name'),
+        ConcernedPerson.designation,
+        ConcernedPerson.is_primary.label('person_is_primary'),
+        rank.label('rank'),
+    ).join(ConcernedPerson, PhoneBook.concerned_person_id == ConcernedPerson.id)\
+     .filter(condition)
+
+    page = matches
+    if cursor:
+        page = page.filter(db.or_(rank > cursor[0], db.and_(rank == cursor[0], PhoneBook.id > cursor[1])))
+    rows = page.order_by(rank, PhoneBook.id).limit(limit + 1).all()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
     results = []
-    for entry in phone_entries:
-        # Get concerned person details
-        concerned_person = entry.concerned_person
-        entity = get_entity_by_type_and_id(concerned_person.entity_type, concerned_person.entity_id)
-        
+    for row in rows:
+        entity_name = row.entity_name or "Unknown"
         results.append({
-            'id': entry.id,
-            'phone_number': entry.phone_number,
-            'label': entry.label or 'Primary',
-            'is_primary': entry.is_primary,
-            'entity_type': concerned_person.entity_type,
-            'entity_id': concerned_person.entity_id,
-            'entity_name': entity.name if entity else "Unknown",
-            'person_name': concerned_person.name,
-            'person_designation': concerned_person.designation or '',
-            'person_is_primary': concerned_person.is_primary,
-            'display_name': f"{entity.name if entity else 'Unknown'} ({concerned_person.entity_type}) - {entry.phone_number}"
+            'id': row.id,
+            'phone_number': row.phone_number,
+            'label': row.label or 'Primary',
+            'is_primary': row.is_primary,
+            'entity_type': row.entity_type,
+            'entity_id': row.entity_id,
+            'entity_name': entity_name,
+            'person_name': row.person_name,
+            'person_designation': row.designation or '',
+            'person_is_primary': row.person_is_primary,
+            'display_name': f"{entity_name} ({row.entity_type}) - {row.phone_number}"
         })
-    
-    return jsonify(results)
+
+    data = {
+        'results': results,
+        'next_cursor': f"{rows[-1].rank}.{rows[-1].id}" if has_next else None,
+    }
+    if cursor is None:
+        if has_next:
+            capped = matches.with_entities(PhoneBook.id).limit(SEARCH_COUNT_CAP + 1).subquery()
+            total = db.session.query(db.func.count()).select_from(capped).scalar()
+        else:
+            total = len(rows)
+        data['total'] = min(total, SEARCH_COUNT_CAP)
+        data['total_exact'] = total <= SEARCH_COUNT_CAP
+    return jsonify(data)
 
 def get_entity_by_type_and_id(entity_type, entity_id):
     """Helper function to get entity by type and ID"""
-    if entity_type == 'CONSIGNOR':
-        return Consignor.query.get(entity_id)
-    elif entity_type == 'CONSIGNEE':
-        return Consignee.query.get(entity_id)
-    elif entity_type == 'AGENT':
-        return BookingAgent.query.get(entity_id)
-    elif entity_type == 'DRIVER':
-        return Driver.query.get(entity_id)
-    elif entity_type == 'OWNER':
-        return Owner.query.get(entity_id)
-    return None
+    model = ENTITY_MODELS.get(entity_type)
+    return db.session.get(model, entity_id) if model else None
 
 
 @bp.route("/api/entity/<entity_type>/<int:entity_id>")
@@ -146,7 +223,7 @@ def add_phone():
         return jsonify({'error': 'Missing required fields'}), 400
     
     # Check if phone number already exists
-    existing = PhoneBook.query.filter_by(phone_number=phone_number).first()
+    existing = find_phone_number(phone_number)
     if existing:
         return jsonify({'error': 'Phone number already exists'}), 400
     
@@ -190,10 +267,7 @@ def update_phone(phone_id):
         return jsonify({'error': 'Phone number is required'}), 400
     
     # Check if phone number already exists (excluding current record)
-    existing = PhoneBook.query.filter(
-        PhoneBook.phone_number == phone_number,
-        PhoneBook.id != phone_id
-    ).first()
+    existing = find_phone_number(phone_number, exclude_id=phone_id)
     if existing:
         return jsonify({'error': 'Phone number already exists'}), 400
     
@@ -252,60 +326,129 @@ def set_primary_phone(phone_id):
 def entity_phones(entity_type, entity_id):
     """Entity-specific phone management page"""
     # Get entity details
-    entity = None
-    entity_name = "Unknown"
-    
-    if entity_type.upper() == 'CONSIGNOR':
-        entity = Consignor.query.get(entity_id)
-    elif entity_type.upper() == 'CONSIGNEE':
-        entity = Consignee.query.get(entity_id)
-    elif entity_type.upper() == 'AGENT':
-        entity = BookingAgent.query.get(entity_id)
-    elif entity_type.upper() == 'DRIVER':
-        entity = Driver.query.get(entity_id)
-    elif entity_type.upper() == 'OWNER':
-        entity = Owner.query.get(entity_id)
-    
-    if entity:
-        entity_name = entity.name
-    
+    entity = get_entity_by_type_and_id(entity_type.upper(), entity_id)
+    entity_name = entity.name if entity else "Unknown"
+
     return render_template("phonebook/entity_phones.html",
                          entity_type=entity_type.upper(),
                          entity_id=entity_id,
                          entity_name=entity_name)
 
 
-@bp.route("/api/concerned-persons/<entity_type>/<int:entity_id>")
-@csrf.exempt
-def get_concerned_persons(entity_type, entity_id):
-    """Get concerned persons for an entity"""
+def concerned_persons_data(entity_type, entity_id, with_phones=False):
+    """Concerned persons of an entity, primary first, optionally with their phones"""
+    if with_phones:
+        key = ((entity_type or '').upper(), entity_id)
+        return contacts_data([key])[key]
     persons = ConcernedPerson.query.filter_by(
-        entity_type=entity_type.upper(),
+        entity_type=(entity_type or '').upper(),
         entity_id=entity_id
     ).order_by(ConcernedPerson.is_primary.desc(), ConcernedPerson.name).all()
-    
-    return jsonify([{
+
+    return [{
         'id': person.id,
         'name': person.name,
         'designation': person.designation or '',
         'is_primary': person.is_primary
-    } for person in persons])
+    } for person in persons]
+
+
+def contacts_data(entities):
+    """Concerned persons of several (entity_type, entity_id) pairs with their
+    phones nested, from one joined query; keyed by the pairs"""
+    keys = list(dict.fromkeys((entity_type.upper(), entity_id) for entity_type, entity_id in entities))
+    result = {key: [] for key in keys}
+    if not keys:
+        return result
+    rows = db.session.query(
+        ConcernedPerson.id,
+        ConcernedPerson.entity_type,
+        ConcernedPerson.entity_id,
+        ConcernedPerson.name,
+        ConcernedPerson.designation,
+        ConcernedPerson.is_primary,
+        PhoneBook.id.label('phone_id'),
+        PhoneBook.phone_number,
+        PhoneBook.label.label('phone_label'),
+        PhoneBook.is_primary.label('phone_is_primary'),
+    ).outerjoin(PhoneBook, PhoneBook.concerned_person_id == ConcernedPerson.id)\
+     .filter(db.tuple_(ConcernedPerson.entity_type, ConcernedPerson.entity_id).in_(keys))\
+     .order_by(ConcernedPerson.is_primary.desc(), ConcernedPerson.name, ConcernedPerson.id,
+               PhoneBook.is_primary.desc(), PhoneBook.id).all()
+
+    persons = {}
+    for row in rows:
+        person = persons.get(row.id)
+        if person is None:
+            person = persons[row.id] = {
+                'id': row.id,
+                'name': row.name,
+                'designation': row.designation or '',
+                'is_primary': row.is_primary,
+                'phones': []
+            }
+            result[(row.entity_type, row.entity_id)].append(person)
+        if row.phone_id is not None:
+            person['phones'].append({
+                'id': row.phone_id,
+                'phone_number': row.phone_number,
+                'label': row.phone_label or 'Primary',
+                'is_primary': row.phone_is_primary
+            })
+    return result
+
+
+def phone_numbers_data(concerned_person_ids):
+    """Phone numbers of several concerned persons in one query, keyed by person id"""
+    result = {person_id: [] for person_id in concerned_person_ids}
+    if not concerned_person_ids:
+        return result
+    phones = PhoneBook.query.filter(
+        PhoneBook.concerned_person_id.in_(concerned_person_ids)
+    ).order_by(PhoneBook.is_primary.desc(), PhoneBook.id).all()
+    for phone in phones:
+        result[phone.concerned_person_id].append({
+            'id': phone.id,
+            'phone_number': phone.phone_number,
+            'label': phone.label or 'Primary',
+            'is_primary': phone.is_primary
+        })
+    return result
+
+
+@bp.route("/api/concerned-persons/<entity_type>/<int:entity_id>")
+@csrf.exempt
+def get_concerned_persons(entity_type, entity_id):
+    """Get concerned persons for an entity"""
+    return jsonify(concerned_persons_data(entity_type, entity_id))
+
+
+CONTACTS_MAX_ENTITIES = 20
+
+
+@bp.route("/api/contacts")
+@csrf.exempt
+def get_contacts():
+    """Concerned persons with their phones for several entities in one call,
+    e.g. ``?entities=CONSIGNOR:3,CONSIGNEE:5,AGENT:2``; keyed the same way"""
+    entities = []
+    for token in request.args.get('entities', '').split(','):
+        entity_type, _, entity_id = token.strip().partition(':')
+        if entity_type.upper() in ENTITY_MODELS and entity_id.isdigit():
+            entities.append((entity_type.upper(), int(entity_id)))
+    if not entities:
+        return jsonify({'error': 'Expected entities=TYPE:ID,...'}), 400
+    if len(entities) > CONTACTS_MAX_ENTITIES:
+        return jsonify({'error': f'At most {CONTACTS_MAX_ENTITIES} entities per call'}), 400
+    contacts = contacts_data(entities)
+    return jsonify({f"{entity_type}:{entity_id}": persons for (entity_type, entity_id), persons in contacts.items()})
 
 
 @bp.route("/api/phone-numbers/<int:concerned_person_id>")
 @csrf.exempt
 def get_phone_numbers(concerned_person_id):
     """Get phone numbers for a concerned person"""
-    phones = PhoneBook.query.filter_by(
-        concerned_person_id=concerned_person_id
-    ).order_by(PhoneBook.is_primary.desc(), PhoneBook.id).all()
-    
-    return jsonify([{
-        'id': phone.id,
-        'phone_number': phone.phone_number,
-        'label': phone.label or 'Primary',
-        'is_primary': phone.is_primary
-    } for phone in phones])
+    return jsonify(phone_numbers_data([concerned_person_id])[concerned_person_id])
 
 
 @bp.route("/api/concerned-person", methods=["POST"])
@@ -365,7 +508,7 @@ def add_phone_new():
         return jsonify({'error': 'Missing required fields'}), 400
     
     # Check if phone number already exists
-    existing = PhoneBook.query.filter_by(phone_number=phone_number).first()
+    existing = find_phone_number(phone_number)
     if existing:
         return jsonify({'error': 'Phone number already exists'}), 400
     
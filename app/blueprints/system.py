@@ -3,16 +3,62 @@ from ..extensions import db
 from ..models import Station, PinCode, Goods, TransactionLog
 from ..forms import StationForm, PinCodeForm, GoodsForm
 from ..auth import login_required
+from ..listing import MasterList
 
 bp = Blueprint("system", __name__, url_prefix="/system")
 
 
+def _station_json(item):
+    return {"id": item.id, "name": item.name, "state": item.state}
+
+
+def _pincode_json(item):
+    return {
+        "id": item.id,
+        "code": item.code,
+        "state": item.state,
+        "station_id": item.station_id,
+        "station": item.station.name if item.station else None,
+    }
+
+
+def _goods_json(item):
+    return {"id": item.id, "description": item.description}
+
+
+_station_list = MasterList(
+    Station,
+    sort_columns={"name": Station.name, "state": Station.state, "created": Station.created_at},
+    default_sort="name",
+    search_columns=[Station.name],
+    filters={"state": Station.state},
+    serialize=_station_json,
+)
+
+_pincode_list = MasterList(
+    PinCode,
+    sort_columns={"code": PinCode.code, "state": PinCode.state, "created": PinCode.created_at},
+    default_sort="code",
+    search_columns=[PinCode.code],
+    filters={"state": PinCode.state, "station_id": PinCode.station_id},
+    options=[db.joinedload(PinCode.station)],
+    serialize=_pincode_json,
+)
+
+_goods_list = MasterList(
+    Goods,
+    sort_columns={"description": Goods.description, "created": Goods.created_at},
+    default_sort="description",
+    search_columns=[Goods.description],
+    serialize=_goods_json,
+)
+
+
 # Stations
 @bp.route("/stations")
 @login_required
 def list_stations():
-    items = Station.query.order_by(Station.name).all()
-    return render_template("system/stations_list.html", items=items, entity_type="stations")
+    return _station_list.render("system/stations_list.html", entity_type="stations")
 
 
 @bp.route("/stations/new", methods=["GET", "POST"])
@@ -52,8 +98,7 @@ def edit_station(item_id):
 @bp.route("/pincodes")
 @login_required
 def list_pincodes():
-    items = PinCode.query.order_by(PinCode.code).all()
-    return render_template("system/pincodes_list.html", items=items, entity_type="pincodes")
+    return _pincode_list.render("system/pincodes_list.html", entity_type="pincodes")
 
 
 @bp.route("/pincodes/new", methods=["GET", "POST"])
@@ -100,8 +145,7 @@ def edit_pincode(item_id):
 @bp.route("/goods")
 @login_required
 def list_goods():
-    items = Goods.query.order_by(Goods.description).all()
-    return render_template("system/goods_list.html", items=items, entity_type="goods")
+    return _goods_list.render("system/goods_list.html", entity_type="goods")
 
 
 @bp.route("/goods/new", methods=["GET", "POST"])
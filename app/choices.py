@@ -0,0 +1,518 @@
+"""
+Process-level cache of the (id, label) choices behind the master-data selects.
+
+Every cached set is tagged with the version of its table in
+``choice_versions``. Each flush that writes to a tracked table bumps that
+table's version in the same transaction, so every worker process sees the
+change on its next request. Readers fetch all the versions with one query
+per request and reload only the sets whose version moved; the worker that
+made the write patches its own sets in place on commit instead. Small
+results derived from these tables, and from ones written too often to be
+versioned such as orders, are kept by ``cached_result``.
+
+The same sets carry a word-prefix index and a trigram index that serve
+the ``/api`` autocomplete endpoints from memory, and the version stamps double as
+those endpoints' ``ETag``/``Last-Modified`` validators.
+"""
+import heapq
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_app_context
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import (
+    ChoiceVersion, Station, PinCode, Consignor, Consignee, Goods, BookingAgent, Vehicle, Driver, Owner
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    """Casefolded words of ``text`` separated by single spaces"""
+    return " ".join(_WORD_RE.findall((text or "").casefold()))
+
+
+class ChoiceSource:
+    """How to load the choices of one select: columns, label and extras"""
+
+    def __init__(self, model, columns, label=None, extra=None):
+        self.model = model
+        self.columns = columns
+        # callable(row) -> label; defaults to the first column
+        self.label = label or (lambda row: getattr(row, columns[0].key))
+        # {response key: column} carried along for the API and for filtering
+        self.extra = extra or {}
+
+    @property
+    def table(self):
+        return self.model.__tablename__
+
+    def row(self, obj):
+        """(id, label, extras) for a loaded row or a model instance"""
+        return (obj.id, self.label(obj), {key: getattr(obj, col.key) for key, col in self.extra.items()})
+
+    @property
+    def fields(self):
+        return ["id", "label", *self.extra]
+
+    def load(self, connection, since=None):
+        extra_columns = [col for col in self.extra.values() if col not in self.columns]
+        query = select(self.model.id, *self.columns, *extra_columns)
+        if since is not None:
+            query = query.where(self.model.updated_at >= since)
+        return [self.row(row) for row in connection.execute(query)]
+
+
+def trigrams(word):
+    """Padded character trigrams of one word, as in pg_trgm"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _sort_key(row):
+    return (str(row[1] or "").casefold(), row[0])
+
+
+class TrigramIndex:
+    """Typo-tolerant word index: label words by trigram, rows by word.
+
+    Query words are compared with the distinct words of all labels rather
+    than with every label, so a lookup touches a few hundred words even at
+    100k labels. Indexes are never modified once published; ``patched``
+    copies only the sets that a change touches.
+    """
+
+    # Share of a query word's trigrams a label word must contain
+    MIN_SCORE = 0.4
+    # Closest label words considered per query word
+    MAX_WORDS = 50
+
+    def __init__(self, grams, words):
+        # trigram -> {word}
+        self.grams = grams
+        # word -> {row id}
+        self.words = words
+
+    @classmethod
+    def build(cls, rows):
+        index = cls({}, {})
+        copied = set()
+        for row in rows:
+            index._add(row[0], row[1], copied)
+        return index
+
+    @staticmethod
+    def _label_words(label):
+        return set(normalize(str(label or "")).split())
+
+    def _copy(self, mapping, key, copied):
+        if (id(mapping), key) not in copied:
+            mapping[key] = set(mapping.get(key, ()))
+            copied.add((id(mapping), key))
+        # _remove may have deleted an emptied key that a later _add reuses
+        return mapping.setdefault(key, set())
+
+    def _add(self, row_id, label, copied):
+        for word in self._label_words(label):
+            if word not in self.words:
+                for gram in trigrams(word):
+                    self._copy(self.grams, gram, copied).add(word)
+            self._copy(self.words, word, copied).add(row_id)
+
+    def _remove(self, row_id, label, copied):
+        for word in self._label_words(label):
+            if word not in self.words:
+                continue
+            rows = self._copy(self.words, word, copied)
+            rows.discard(row_id)
+            if not rows:
+                del self.words[word]
+                for gram in trigrams(word):
+                    self._copy(self.grams, gram, copied).discard(word)
+
+    def patched(self, old_rows, changes):
+        """Copy with ``changes`` ({id: row or None}) applied; ``old_rows`` maps id -> previous row"""
+        index = TrigramIndex(dict(self.grams), dict(self.words))
+        copied = set()
+        for row_id, row in changes.items():
+            if row_id in old_rows:
+                index._remove(row_id, old_rows[row_id][1], copied)
+            if row is not None:
+                index._add(row_id, row[1], copied)
+        return index
+
+    def _similar_words(self, word, partial):
+        """(coverage, similarity, word) of the label words closest to ``word``.
+
+        A ``partial`` word is scored both as a prefix and as a whole word,
+        whichever is better, so a typo in the last word typed still matches.
+        """
+        grams = trigrams(word)
+        end = f"  {word} "[-3:]
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.grams.get(gram, ()))
+        similar = []
+        for candidate, shared in counts.items():
+            # Each label word has len + 2 trigrams, the last one ending in the pad
+            coverage = shared / len(grams)
+            if partial and not f"  {candidate} ".endswith(end):
+                coverage = max(coverage, shared / (len(grams) - 1))
+            if coverage >= self.MIN_SCORE:
+                similar.append((coverage, shared / (len(grams) + len(candidate) + 2 - shared), candidate))
+        similar.sort(reverse=True)
+        return similar[:self.MAX_WORDS]
+
+    def search(self, query):
+        """{row id: (coverage, similarity)} of the rows matching every query word.
+
+        Coverage is the share of a query word's trigrams found in the label
+        word and decides the match; similarity (Jaccard) prefers the closer,
+        shorter word. Both are summed over the query words. The last word
+        matches as a prefix, since it may still be being typed.
+        """
+        query_words = normalize(query).split()
+        totals = None
+        for position, word in enumerate(query_words):
+            best = {}
+            for coverage, similarity, candidate in self._similar_words(word, position == len(query_words) - 1):
+                for row_id in self.words[candidate]:
+                    if row_id not in best:
+                        best[row_id] = (coverage, similarity)
+            if totals is None:
+                totals = best
+            else:
+                totals = {
+                    row_id: (total[0] + best[row_id][0], total[1] + best[row_id][1])
+                    for row_id, total in totals.items() if row_id in best
+                }
+            if not totals:
+                break
+        return totals or {}
+
+
+class ChoiceSet:
+    """Immutable snapshot of one table's choices, sorted by label"""
+
+    def __init__(self, version, rows, presorted=False):
+        self.version = version
+        self.rows = list(rows) if presorted else sorted(rows, key=_sort_key)
+        self.choices = [(row[0], row[1]) for row in self.rows]
+        self._keys = None
+        self._by_id = None
+        self._positions = None
+        self._trigrams = None
+
+    def apply(self, version, changes):
+        """New set with ``changes`` ({id: row, or None when deleted}) applied"""
+        rows = [row for row in self.rows if row[0] not in changes]
+        for row in changes.values():
+            if row is not None:
+                insort(rows, row, key=_sort_key)
+        patched = ChoiceSet(version, rows, presorted=True)
+        if self._trigrams is not None:
+            patched._trigrams = self._trigrams.patched(self.by_id, changes)
+        return patched
+
+    @property
+    def by_id(self):
+        if self._by_id is None:
+            self._by_id = {row[0]: row for row in self.rows}
+        return self._by_id
+
+    @property
+    def positions(self):
+        # row id -> index in label order
+        if self._positions is None:
+            self._positions = {row[0]: position for position, row in enumerate(self.rows)}
+        return self._positions
+
+    @property
+    def trigrams(self):
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex.build(self.rows)
+        return self._trigrams
+
+    @property
+    def keys(self):
+        # (key, position) for every word suffix of every label, plus the label
+        # with its spaces removed so "MH12AB" finds "MH 12 AB 1234"
+        if self._keys is None:
+            keys = []
+            for position, row in enumerate(self.rows):
+                words = normalize(str(row[1] or "")).split()
+                for start in range(len(words)):
+                    keys.append((" ".join(words[start:]), position))
+                if len(words) > 1:
+                    keys.append(("".join(words), position))
+            keys.sort()
+            self._keys = keys
+        return self._keys
+
+    def search(self, query, limit=100, predicate=None, fuzzy=False):
+        """Rows with a word starting with ``query``, in label order.
+
+        With ``fuzzy`` the rows are matched by trigram similarity instead,
+        best match first, so "Relaince" still finds "Reliance Industries".
+        """
+        prefix = normalize(query)
+        if prefix and fuzzy:
+            positions = self.positions
+            ranked = [
+                (-coverage, -similarity, positions[row_id])
+                for row_id, (coverage, similarity) in self.trigrams.search(prefix).items()
+            ]
+            ranked = heapq.nsmallest(limit, ranked) if predicate is None else sorted(ranked)
+            candidates = (self.rows[position] for _, _, position in ranked)
+        elif prefix:
+            keys = self.keys
+            positions = set()
+            index = bisect_left(keys, (prefix,))
+            while index < len(keys) and keys[index][0].startswith(prefix):
+                positions.add(keys[index][1])
+                index += 1
+            candidates = (self.rows[position] for position in sorted(positions))
+        else:
+            candidates = iter(self.rows)
+        results = []
+        for row in candidates:
+            if predicate is None or predicate(row):
+                results.append(row)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class ChoiceRegistry:
+    def __init__(self):
+        self.sources = {}
+        # engine -> {name: ChoiceSet}
+        self._cache = weakref.WeakKeyDictionary()
+        # engine -> {key: (versions, value)}
+        self._derived = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, name, source):
+        self.sources[name] = source
+
+    @property
+    def tables(self):
+        return {source.table for source in self.sources.values()}
+
+    def names_for(self, table):
+        return [name for name, source in self.sources.items() if source.table == table]
+
+    def stamps(self):
+        """(version, updated_at) of every tracked table, read once per request"""
+        if "_choice_stamps" not in g:
+            rows = db.session.execute(select(ChoiceVersion.name, ChoiceVersion.version, ChoiceVersion.updated_at))
+            g._choice_stamps = {name: (version, updated_at) for name, version, updated_at in rows}
+        return g._choice_stamps
+
+    def stamp(self, name):
+        return self.stamps().get(self.sources[name].table, (0, None))
+
+    def get_set(self, name):
+        source = self.sources[name]
+        version = self.stamp(name)[0]
+        connection = db.session.connection()
+        if db.session.info.get("choices_written"):
+            # Uncommitted writes must not leak into the shared cache
+            return ChoiceSet(version, source.load(connection))
+        cache = self._cache.setdefault(connection.engine, {})
+        current = cache.get(name)
+        if current is None or current.version != version:
+            current = ChoiceSet(version, source.load(connection))
+            with self._lock:
+                cache[name] = current
+        return current
+
+    def cached(self, key, tables, build, check=None, ttl=None):
+        """``build()``, kept per worker until a version of one of ``tables``
+        moves, the value of ``check()`` changes or ``ttl`` seconds pass"""
+        stamps = self.stamps()
+        versions = tuple(stamps.get(table, (0, None))[0] for table in tables)
+        if check is not None:
+            versions += tuple(check())
+        connection = db.session.connection()
+        if db.session.info.get("choices_written"):
+            return build()
+        cache = self._derived.setdefault(connection.engine, {})
+        current = cache.get(key)
+        now = time.monotonic()
+        if current is None or current[0] != versions or (ttl is not None and now - current[1] >= ttl):
+            current = (versions, now, build())
+            with self._lock:
+                cache[key] = current
+        return current[2]
+
+    def get(self, name):
+        return list(self.get_set(name).choices)
+
+    def choices(self, *names):
+        return {name: self.get(name) for name in names}
+
+    def search(self, name, query, limit=100, predicate=None, fuzzy=False):
+        return self.get_set(name).search(query, limit, predicate, fuzzy)
+
+    def rows_since(self, name, since):
+        """Rows of ``name`` written at or after ``since``, read from the database"""
+        return self.sources[name].load(db.session.connection(), since)
+
+    def apply_committed(self, engine, versions, changes):
+        """Patch this worker's sets with its own committed writes"""
+        cache = self._cache.get(engine)
+        if not cache:
+            return
+        with self._lock:
+            for name, rows in changes.items():
+                start, end = versions[self.sources[name].table]
+                current = cache.get(name)
+                # Only patch a set that saw every write before this one
+                if current is not None and current.version == start:
+                    cache[name] = current.apply(end, rows)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._derived.clear()
+
+
+registry = ChoiceRegistry()
+registry.register("stations", ChoiceSource(Station, [Station.name], extra={"state": Station.state}))
+registry.register("pin_codes", ChoiceSource(
+    PinCode, [PinCode.code, PinCode.state],
+    label=lambda row: f"{row.code} - {row.state or 'Unknown'}",
+))
+registry.register("consignors", ChoiceSource(Consignor, [Consignor.name], extra={"station_id": Consignor.station_id}))
+registry.register("consignees", ChoiceSource(Consignee, [Consignee.name], extra={"station_id": Consignee.station_id}))
+registry.register("goods", ChoiceSource(Goods, [Goods.description]))
+registry.register("agents", ChoiceSource(BookingAgent, [BookingAgent.name], extra={"station_id": BookingAgent.station_id}))
+registry.register("vehicles", ChoiceSource(Vehicle, [Vehicle.lorry_no], extra={
+    "owner_id": Vehicle.owner_id,
+    "driver_id": Vehicle.driver_id,
+}))
+registry.register("drivers", ChoiceSource(Driver, [Driver.name]))
+registry.register("owners", ChoiceSource(Owner, [Owner.name]))
+
+
+def get_choices(*names):
+    """Cached choices keyed by name, e.g. ``get_choices("stations", "goods")``"""
+    return registry.choices(*names)
+
+
+def choice_stamp(name):
+    """(version, updated_at) of the table behind ``name``, for HTTP validators"""
+    return registry.stamp(name)
+
+
+def choice_snapshot(name, since=None):
+    """Field names and compact ``[id, label, *extras]`` rows of ``name``.
+
+    Without ``since`` this is the whole cached set; with it, only the rows
+    whose ``updated_at`` is at or after ``since``.
+    """
+    rows = registry.get_set(name).rows if since is None else registry.rows_since(name, since)
+    return choice_fields(name), [(row_id, label, *extra.values()) for row_id, label, extra in rows]
+
+
+def choice_fields(name):
+    """Field names of the compact rows of ``name``: id, label and its extras"""
+    return registry.sources[name].fields
+
+
+def choice_row(name, row_id):
+    """Cached (id, label, extras) row of ``name``, or None"""
+    return registry.get_set(name).by_id.get(row_id)
+
+
+def cached_result(key, tables, build, check=None, ttl=None):
+    """Per-worker cache of ``build()`` for results read from the choice
+    ``tables``, rebuilt after any write to them. Reads of other tables are
+    validated with ``check``, a cheap query returning a sequence that
+    changes with them, and ``ttl`` bounds how stale they may get"""
+    return registry.cached(key, tables, build, check, ttl)
+
+
+def choice_ids(name):
+    return [row[0] for row in registry.get_set(name).rows]
+
+
+def search_choices(name, query, limit=100, predicate=None, fuzzy=False):
+    """Cached (id, label, extras) rows of ``name`` matching ``query`` by word prefix,
+    or by trigram similarity when ``fuzzy``"""
+    return registry.search(name, query, limit, predicate, fuzzy)
+
+
+def record_bulk_writes(model, rows):
+    """Count ``rows`` of ``model`` written by bulk (Core) statements, which
+    bypass the flush, as writes of the current transaction; each row needs
+    the id and every column the choice sets read"""
+    if model.__tablename__ in registry.tables and rows:
+        _record_writes(db.session(), [(model.__tablename__, row, False) for row in rows])
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_choice_versions(session, flush_context):
+    tracked = registry.tables
+    written = [
+        (obj.__tablename__, obj, obj in session.deleted)
+        for obj in session.new | session.dirty | session.deleted
+        if getattr(obj, "__tablename__", None) in tracked
+    ]
+    if written:
+        _record_writes(session, written)
+
+
+def _record_writes(session, written):
+    """Bump the versions of the tables in ``written``, (table, row, deleted)
+    triples, and keep the rows for patching the cache on commit"""
+    changed = {table_name for table_name, _, _ in written}
+    connection = session.connection()
+    table = ChoiceVersion.__table__
+    now = datetime.utcnow()
+    connection.execute(
+        update(table).where(table.c.name.in_(changed)).values(version=table.c.version + 1, updated_at=now)
+    )
+    existing = set(connection.execute(select(table.c.name).where(table.c.name.in_(changed))).scalars())
+    missing = changed - existing
+    if missing:
+        connection.execute(table.insert(), [
+            {"name": name, "version": 1, "updated_at": now} for name in sorted(missing)
+        ])
+
+    # Remember this transaction's version range and rows for the commit
+    versions = session.info.setdefault("choice_versions", {})
+    for name, version in connection.execute(select(table.c.name, table.c.version).where(table.c.name.in_(changed))):
+        versions[name] = (versions[name][0] if name in versions else version - 1, version)
+    changes = session.info.setdefault("choice_changes", {})
+    for table_name, obj, deleted in written:
+        for name in registry.names_for(table_name):
+            changes.setdefault(name, {})[obj.id] = None if deleted else registry.sources[name].row(obj)
+
+    session.info["choices_written"] = True
+    if has_app_context():
+        g.pop("_choice_stamps", None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_choice_writes(session):
+    versions = session.info.pop("choice_versions", None)
+    changes = session.info.pop("choice_changes", None)
+    session.info.pop("choices_written", None)
+    if changes:
+        registry.apply_committed(session.get_bind(), versions, changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_choice_writes(session):
+    for key in ("choice_versions", "choice_changes", "choices_written"):
+        session.info.pop(key, None)
@@ -37,3 +37,50 @@ def seed_data():
     click.echo("🌱 Seeding database with sample data...")
     create_sample_data()
     click.echo("✅ Sample data seeding completed!")
+
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Create the full-text search tables if needed and re-index every row."""
+    from app.search import create_search_tables, rebuild_search_indexes
+
+    click.echo("Rebuilding search indexes...")
+    create_search_tables()
+    rebuild_search_indexes()
+    click.echo("Search indexes rebuilt.")
+
+
+@click.command("export-orders")
+@click.option("--format", "export_format", type=click.Choice(["csv", "xlsx"]), default="csv", show_default=True)
+@click.option("--status", default="all", show_default=True, help="Same values as the orders list status filter.")
+@click.option("--q", "search_query", default="", help="Search text, as typed in the orders list.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False, writable=True), default=None,
+              help="File to write; defaults to stdout.")
+@with_appcontext
+def export_orders(export_format, status, search_query, output):
+    """Stream the order book to CSV or XLSX."""
+    from app.blueprints.orders import filter_orders
+    from app.exports import EXPORT_FORMATS, order_export_query, export_header, export_rows
+
+    query = order_export_query(lambda q: filter_orders(q, status, search_query))
+    writer = EXPORT_FORMATS[export_format][1]
+    stream = open(output, "wb") if output else click.get_binary_stream("stdout")
+    try:
+        for chunk in writer(export_header(query), export_rows(query)):
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
+    if output:
+        click.echo(f"Orders exported to {output}", err=True)
+
+
+@click.command("compress-static")
+@with_appcontext
+def compress_static():
+    """Write precompressed .br/.gz copies of the static CSS/JS files."""
+    from app.compression import brotli, precompress_static
+
+    written = precompress_static(current_app.static_folder)
+    click.echo(f"Wrote {written} precompressed files" + ("" if brotli else " (gzip only; install brotli for .br)") + ".")
@@ -0,0 +1,144 @@
+"""
+Response compression.
+
+HTML, JSON, CSS and JS responses above ``COMPRESS_MIN_SIZE`` bytes are
+compressed with brotli when the client accepts it and the optional
+``brotli`` package is installed, and with gzip otherwise. Static files are
+served from precompressed ``.br``/``.gz`` siblings when they are present
+and up to date (see ``flask compress-static``). Every response that could
+have been compressed carries ``Vary: Accept-Encoding`` so shared caches
+keep the encodings apart.
+"""
+import gzip
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+}
+
+# Content-Encoding -> file suffix of the precompressed static variant
+STATIC_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _accepted_encoding(encodings):
+    """Best of ``encodings`` the client accepts, in server preference order"""
+    accepted = request.accept_encodings
+    for encoding in encodings:
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+
+def _compress_response(response, app):
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or request.method == "HEAD"
+    ):
+        return response
+    encoding = _accepted_encoding(_encodings())
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < app.config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    response.set_data(compress(data, encoding, app.config["COMPRESS_LEVEL"]))
+    response.headers["Content-Encoding"] = encoding
+    # The compressed bytes differ from the identity ones, so a strong
+    # validator would be wrong; weak ones still match on revalidation
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _precompressed_static(app, view):
+    def static(filename):
+        path = safe_join(app.static_folder, filename)
+        for encoding in _accepted_static_encodings() if path else ():
+            compressed = path + STATIC_SUFFIXES[encoding]
+            if os.path.isfile(compressed) and os.path.isfile(path) \
+                    and os.path.getmtime(compressed) >= os.path.getmtime(path):
+                response = send_from_directory(
+                    app.static_folder, filename + STATIC_SUFFIXES[encoding],
+                    mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                    max_age=app.get_send_file_max_age(filename),
+                )
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = view(filename=filename)
+        if response.mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add("Accept-Encoding")
+        return response
+    return static
+
+
+def _accepted_static_encodings():
+    accepted = request.accept_encodings
+    # Serving a precompressed file needs no brotli module, only the file
+    return [encoding for encoding in STATIC_SUFFIXES if accepted[encoding]]
+
+
+def precompress_static(static_folder, level=9):
+    """Write ``.br`` (if brotli is installed) and ``.gz`` next to every
+    compressible static file; returns the number of files written"""
+    written = 0
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(tuple(STATIC_SUFFIXES.values())):
+                continue
+            if mimetypes.guess_type(name)[0] not in COMPRESSIBLE_MIMETYPES:
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            for encoding in _encodings():
+                compressed = compress(data, encoding, level if encoding == "gzip" else 11)
+                if len(compressed) >= len(data):
+                    continue
+                with open(path + STATIC_SUFFIXES[encoding], "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+def init_app(app):
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    if "static" in app.view_functions:
+        app.view_functions["static"] = _precompressed_static(app, app.view_functions["static"])
+    app.after_request(lambda response: _compress_response(response, app))
@@ -25,10 +25,18 @@ class Config:
     REMEMBER_COOKIE_DURATION = timedelta(days=14)
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
 
+    # List pagination
+    LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+    LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", "500"))
+
     # File uploads
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", os.path.join(os.getcwd(), "uploads"))
     MAX_CONTENT_LENGTH = 32 * 1024 * 1024  # 32 MB
 
+    # Response compression (brotli when the optional package is installed, else gzip)
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))  # bytes
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+
 
 class ProductionConfig(Config):
     DEBUG = False
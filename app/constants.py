@@ -1,3 +1,5 @@
+import re
+
 INDIA_STATES_AND_UTS = [
     "Andhra Pradesh","Arunachal Pradesh","Assam","Bihar","Chhattisgarh","Goa","Gujarat","Haryana",
     "Himachal Pradesh","Jharkhand","Karnataka","Kerala","Madhya Pradesh","Maharashtra","Manipur","Meghalaya",
@@ -10,3 +12,19 @@ def to_title(s: str) -> str:
     if not s:
         return s
     return " ".join([w.capitalize() for w in s.strip().split()])
+
+
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+def phone_digits(number: str) -> str:
+    """Digits of a phone number without the +91/0091/0 prefixes, so that
+    "+91 98765-43210", "098765 43210" and "9876543210" compare equal"""
+    digits = _NON_DIGIT_RE.sub("", number or "")
+    if len(digits) == 14 and digits.startswith("0091"):
+        return digits[4:]
+    if len(digits) == 12 and digits.startswith("91"):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith("0"):
+        return digits[1:]
+    return digits
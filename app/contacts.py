@@ -0,0 +1,84 @@
+"""
+Entity names copied onto concerned persons.
+
+A ``ConcernedPerson`` points at a consignor, consignee, booking agent,
+driver or owner through ``entity_type``/``entity_id``, with no foreign key.
+Its ``entity_name`` column keeps a copy of that entity's name so the
+phonebook can list and search contacts without reading the five entity
+tables. The copy is filled in when a person is flushed with a new or
+changed entity, and rewritten in the same transaction when the entity is
+renamed.
+"""
+from sqlalchemy import bindparam, event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .extensions import db
+from .models import ConcernedPerson, Consignor, Consignee, BookingAgent, Driver, Owner
+
+# Models a concerned person can belong to, by ConcernedPerson.entity_type
+ENTITY_MODELS = {
+    'CONSIGNOR': Consignor,
+    'CONSIGNEE': Consignee,
+    'AGENT': BookingAgent,
+    'DRIVER': Driver,
+    'OWNER': Owner,
+}
+ENTITY_TYPES = {model: entity_type for entity_type, model in ENTITY_MODELS.items()}
+
+
+def entity_names(keys, session=None):
+    """Names of several entities keyed by (entity_type, entity_id), one IN query per type"""
+    session = session or db.session
+    ids_by_type = {}
+    for entity_type, entity_id in keys:
+        if entity_type in ENTITY_MODELS and entity_id is not None:
+            ids_by_type.setdefault(entity_type, set()).add(entity_id)
+    names = {}
+    for entity_type, ids in ids_by_type.items():
+        model = ENTITY_MODELS[entity_type]
+        for entity_id, name in session.execute(select(model.id, model.name).where(model.id.in_(ids))):
+            names[(entity_type, entity_id)] = name
+    return names
+
+
+def _changed(obj, attr):
+    return inspect(obj).attrs[attr].history.has_changes()
+
+
+@event.listens_for(Session, "before_flush")
+def _fill_entity_names(session, flush_context, instances):
+    persons = [
+        obj for obj in session.new | session.dirty
+        if isinstance(obj, ConcernedPerson)
+        and (obj in session.new or _changed(obj, "entity_type") or _changed(obj, "entity_id"))
+    ]
+    if not persons:
+        return
+    with session.no_autoflush:
+        names = entity_names(((p.entity_type, p.entity_id) for p in persons), session)
+    for person in persons:
+        person.entity_name = names.get((person.entity_type, person.entity_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _propagate_entity_renames(session, flush_context):
+    renamed = [
+        {"_type": ENTITY_TYPES[type(obj)], "_id": obj.id, "_name": obj.name}
+        for obj in session.dirty
+        if type(obj) in ENTITY_TYPES and _changed(obj, "name")
+    ]
+    if not renamed:
+        return
+    table = ConcernedPerson.__table__
+    session.connection().execute(
+        table.update()
+        .where(table.c.entity_type == bindparam("_type"), table.c.entity_id == bindparam("_id"))
+        .values(entity_name=bindparam("_name")),
+        renamed,
+    )
+    # Persons already loaded in this session see the new name too
+    names = {(r["_type"], r["_id"]): r["_name"] for r in renamed}
+    for obj in session.identity_map.values():
+        if isinstance(obj, ConcernedPerson) and (obj.entity_type, obj.entity_id) in names:
+            set_committed_value(obj, "entity_name", names[(obj.entity_type, obj.entity_id)])
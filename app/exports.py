@@ -0,0 +1,198 @@
+"""
+Streaming exports of the order book.
+
+Rows are fetched with ``yield_per`` so only one batch is held in memory at a
+time, and each writer yields encoded chunks as it goes so the output can be
+sent straight to a response or a file. XLSX is written as a zip stream with
+inline strings, so no spreadsheet library is needed.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from .extensions import db
+from .models import Order, Consignor, Consignee, Station, Goods, BookingAgent
+
+EXPORT_BATCH_SIZE = 1000
+
+CSV_MIMETYPE = "text/csv"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def order_export_query(filter_query=None):
+    """Flat column projection of the order book, oldest first.
+
+    ``filter_query`` receives the query and returns it filtered, so callers
+    can apply the same status and search filters as the orders list.
+    """
+    FromStation = db.aliased(Station)
+    ToStation = db.aliased(Station)
+    columns = [
+        Order.id.label("Order No"),
+        Order.date.label("Date"),
+        Order.order_type.label("Type"),
+        Order.status.label("Status"),
+        Order.firm.label("Firm"),
+        Consignor.name.label("Consignor"),
+        Consignee.name.label("Consignee"),
+        BookingAgent.name.label("Booking Agent"),
+        FromStation.name.label("From"),
+        ToStation.name.label("To"),
+        Goods.description.label("Goods"),
+        Order.weight.label("Weight"),
+        Order.rate.label("Rate"),
+        Order.description.label("Description"),
+    ]
+    query = db.session.query(*columns).select_from(Order)\
+                .outerjoin(Consignor, Order.consignor_id == Consignor.id)\
+                .outerjoin(Consignee, Order.consignee_id == Consignee.id)\
+                .outerjoin(BookingAgent, Order.booking_agent_id == BookingAgent.id)\
+                .outerjoin(FromStation, Order.from_station_id == FromStation.id)\
+                .outerjoin(ToStation, Order.to_station_id == ToStation.id)\
+                .outerjoin(Goods, Order.goods_id == Goods.id)
+    if filter_query is not None:
+        query = filter_query(query)
+    return query.order_by(Order.id)
+
+
+def export_header(query):
+    return [c["name"] for c in query.column_descriptions]
+
+
+def export_rows(query):
+    return query.yield_per(EXPORT_BATCH_SIZE)
+
+
+# CSV ---------------------------------------------------------------------
+
+def iter_csv(header, rows, chunk_rows=EXPORT_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+# XLSX --------------------------------------------------------------------
+
+_ILLEGAL_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_EXCEL_EPOCH = date(1899, 12, 30)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Style 1 is the built-in short date format
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="2"><xf/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+    '</styleSheet>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+class _StreamSink:
+    """Write-only, unseekable file object that hands back what was written"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value!r}</v></c>"
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return f'<c s="1"><v>{(value - _EXCEL_EPOCH).days}</v></c>'
+    text = escape(_ILLEGAL_XML_RE.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(row):
+    return "<row>" + "".join(_xlsx_cell(value) for value in row) + "</row>"
+
+
+def iter_xlsx(header, rows, sheet_name="Sheet1", chunk_rows=EXPORT_BATCH_SIZE):
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name)))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", _STYLES)
+        yield sink.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _xlsx_row(header)).encode("utf-8"))
+            for count, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                if count % chunk_rows == 0:
+                    yield sink.drain()
+            sheet.write(_SHEET_END.encode("utf-8"))
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    "csv": (CSV_MIMETYPE, iter_csv),
+    "xlsx": (XLSX_MIMETYPE, iter_xlsx),
+}
@@ -2,11 +2,13 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, FloatField, SelectField, TextAreaField, DateField
 from wtforms.validators import DataRequired, Optional, Length
 from .constants import INDIA_STATES_AND_UTS
+from .extensions import db
+from .models import Order, Station, Consignor, Consignee, BookingAgent, Goods, Vehicle, Driver, Owner, ConcernedPerson, PhoneBook
 
 # Helper function to handle coerce for optional integer fields
 def coerce_int_or_none(value):
     """Convert value to int if valid, otherwise return None for empty/None values"""
-    if value is None or value == '' or value == 0:
+    if value is None or value == '' or value == 0 or value == '0':
         return None
     try:
         return int(value)
@@ -14,6 +16,96 @@ def coerce_int_or_none(value):
         return None
 
 
+class ModelSelectField(SelectField):
+    """Select of ``model`` ids that works without loading its choices.
+
+    Without choices only the placeholder and the selected option are
+    rendered (the rest come from the API) and submitted ids are checked by
+    ``ModelSelectForm`` with one ``IN`` query per model. Choices set by the
+    view are rendered and checked as usual.
+    """
+
+    def __init__(self, label=None, validators=None, model=None, label_attr="name", placeholder="Select", **kwargs):
+        kwargs.setdefault("coerce", coerce_int_or_none)
+        super().__init__(label, validators, **kwargs)
+        self.model = model
+        # column name fetched for the selected option, or callable(id) -> label
+        self.label_attr = label_attr
+        self.placeholder = placeholder
+        self.selected_label = None
+        self.owner = None
+
+    @property
+    def is_lazy(self):
+        return self.choices is None
+
+    def iter_choices(self):
+        if not self.is_lazy:
+            return super().iter_choices()
+        choices = [(0, self.placeholder)]
+        if self.data:
+            if self.owner is not None:
+                self.owner.load_selected_labels()
+            choices.append((self.data, self.selected_label or f"#{self.data}"))
+        return self._choices_generator(choices)
+
+    def pre_validate(self, form):
+        if not self.is_lazy:
+            super().pre_validate(form)
+
+
+class ModelSelectForm(FlaskForm):
+    """Form whose ``ModelSelectField`` ids are validated and labelled in batches"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._labels_loaded = False
+        for field in self:
+            # Views add their own messages before validate() replaces the list
+            field.errors = []
+            if isinstance(field, ModelSelectField):
+                field.owner = self
+
+    def _lazy_fields(self):
+        return [f for f in self if isinstance(f, ModelSelectField) and f.is_lazy and f.data]
+
+    def validate(self, extra_validators=None):
+        valid = super().validate(extra_validators)
+        return self.validate_model_ids() and valid
+
+    def validate_model_ids(self):
+        by_model = {}
+        for field in self._lazy_fields():
+            by_model.setdefault(field.model, []).append(field)
+        valid = True
+        for model, fields in by_model.items():
+            ids = {field.data for field in fields}
+            found = set(db.session.execute(db.select(model.id).where(model.id.in_(ids))).scalars())
+            for field in fields:
+                if field.data not in found:
+                    field.errors.append(field.gettext("Not a valid choice."))
+                    valid = False
+        return valid
+
+    def load_selected_labels(self):
+        if self._labels_loaded:
+            return
+        self._labels_loaded = True
+        by_column = {}
+        for field in self._lazy_fields():
+            if callable(field.label_attr):
+                field.selected_label = field.label_attr(field.data)
+            else:
+                by_column.setdefault((field.model, field.label_attr), []).append(field)
+        for (model, attr), fields in by_column.items():
+            rows = db.session.execute(
+                db.select(model.id, getattr(model, attr)).where(model.id.in_({f.data for f in fields}))
+            )
+            labels = dict(rows.all())
+            for field in fields:
+                field.selected_label = labels.get(field.data)
+
+
 class ConsignorForm(FlaskForm):
     name = StringField("Name", validators=[DataRequired(), Length(max=255)])
     address = TextAreaField("Address", validators=[Optional(), Length(max=512)])
@@ -96,7 +188,7 @@ class VehicleForm(FlaskForm):
     driver_id = SelectField("Driver", coerce=coerce_int_or_none, validators=[Optional()])
 
 
-class OrderForm(FlaskForm):
+class OrderForm(ModelSelectForm):
     date = DateField("Date", validators=[DataRequired()])
     firm = SelectField("Firm", choices=[
         ("New Jalaram Transport Service", "New Jalaram Transport Service"),
@@ -109,50 +201,52 @@ class OrderForm(FlaskForm):
     ], validators=[DataRequired()])
     
     # Stations
-    from_station_id = SelectField("From Station", coerce=coerce_int_or_none, validators=[Optional()])
-    to_station_id = SelectField("To Station", coerce=coerce_int_or_none, validators=[Optional()])
+    from_station_id = ModelSelectField("From Station", model=Station, validators=[Optional()])
+    to_station_id = ModelSelectField("To Station", model=Station, validators=[Optional()])
     station_pin_code = StringField("Station Pin Code", validators=[Optional(), Length(max=10)])
     
     # Party fields
-    consignor_id = SelectField("Consignor", coerce=coerce_int_or_none, validators=[Optional()])
+    consignor_id = ModelSelectField("Consignor", model=Consignor, validators=[Optional()])
     consignor_phone = StringField("Consignor Phone", validators=[Optional(), Length(max=32)])  # Legacy field
-    consignee_id = SelectField("Consignee", coerce=coerce_int_or_none, validators=[Optional()])
+    consignee_id = ModelSelectField("Consignee", model=Consignee, validators=[Optional()])
     consignee_phone = StringField("Consignee Phone", validators=[Optional(), Length(max=32)])  # Legacy field
     
     # New phone book fields
-    consignor_concerned_person_id = SelectField("Consignor Concerned Person", coerce=coerce_int_or_none, validators=[Optional()])
-    consignor_phone_number_id = SelectField("Consignor Phone Number", coerce=coerce_int_or_none, validators=[Optional()])
-    consignee_concerned_person_id = SelectField("Consignee Concerned Person", coerce=coerce_int_or_none, validators=[Optional()])
-    consignee_phone_number_id = SelectField("Consignee Phone Number", coerce=coerce_int_or_none, validators=[Optional()])
+    consignor_concerned_person_id = ModelSelectField("Consignor Concerned Person", model=ConcernedPerson, validators=[Optional()])
+    consignor_phone_number_id = ModelSelectField("Consignor Phone Number", model=PhoneBook, label_attr="phone_number", validators=[Optional()])
+    consignee_concerned_person_id = ModelSelectField("Consignee Concerned Person", model=ConcernedPerson, validators=[Optional()])
+    consignee_phone_number_id = ModelSelectField("Consignee Phone Number", model=PhoneBook, label_attr="phone_number", validators=[Optional()])
     
     # Agent field
-    booking_agent_id = SelectField("Booking Agent", coerce=coerce_int_or_none, validators=[Optional()])
-    agent_concerned_person_id = SelectField("Agent Concerned Person", coerce=coerce_int_or_none, validators=[Optional()])
-    agent_phone_number_id = SelectField("Agent Phone Number", coerce=coerce_int_or_none, validators=[Optional()])
+    booking_agent_id = ModelSelectField("Booking Agent", model=BookingAgent, validators=[Optional()])
+    agent_concerned_person_id = ModelSelectField("Agent Concerned Person", model=ConcernedPerson, validators=[Optional()])
+    agent_phone_number_id = ModelSelectField("Agent Phone Number", model=PhoneBook, label_attr="phone_number", validators=[Optional()])
     
     # Goods
-    goods_id = SelectField("Goods", coerce=coerce_int_or_none, validators=[DataRequired()])
+    goods_id = ModelSelectField("Goods", model=Goods, label_attr="description", validators=[DataRequired()])
     weight = FloatField("Weight", validators=[Optional()])
     rate = FloatField("Rate", validators=[Optional()])
     description = TextAreaField("Description", validators=[Optional(), Length(max=512)])
     status = SelectField("Status", choices=[("NEW","NEW"),("CONFIRMED","CONFIRMED"),("DISPATCHED","DISPATCHED"),("CLOSED","CLOSED")])
 
 
-class BuiltyForm(FlaskForm):
-    order_id = SelectField("Order", coerce=coerce_int_or_none, validators=[Optional()])
-    vehicle_id = SelectField("Vehicle", coerce=coerce_int_or_none, validators=[Optional()])
-    driver_id = SelectField("Driver", coerce=coerce_int_or_none, validators=[Optional()])
-    owner_id = SelectField("Owner", coerce=coerce_int_or_none, validators=[Optional()])
+class BuiltyForm(ModelSelectForm):
+    # Picked by typeahead, so the view never loads order choices
+    order_id = ModelSelectField("Order", model=Order, label_attr=lambda order_id: f"Order #{order_id}",
+                                placeholder="Select Order", validators=[Optional()])
+    vehicle_id = ModelSelectField("Vehicle", model=Vehicle, label_attr="lorry_no", validators=[Optional()])
+    driver_id = ModelSelectField("Driver", model=Driver, validators=[Optional()])
+    owner_id = ModelSelectField("Owner", model=Owner, validators=[Optional()])
     date = DateField("Date", validators=[Optional()])
-    from_station_id = SelectField("From Station", coerce=coerce_int_or_none, validators=[Optional()])
-    to_station_id = SelectField("To Station", coerce=coerce_int_or_none, validators=[Optional()])
+    from_station_id = ModelSelectField("From Station", model=Station, validators=[Optional()])
+    to_station_id = ModelSelectField("To Station", model=Station, validators=[Optional()])
     firm = SelectField("Firm", choices=[
         ("New Jalaram Transport Service", "New Jalaram Transport Service"),
         ("Jayshree Transport Company", "Jayshree Transport Company"),
         ("Jalaram Cargo", "Jalaram Cargo")
     ], validators=[Optional()])
     lr_no = StringField("LR No", validators=[Optional(), Length(max=64)])
-    goods_id = SelectField("Goods", coerce=coerce_int_or_none, validators=[Optional()])
+    goods_id = ModelSelectField("Goods", model=Goods, label_attr="description", validators=[Optional()])
     actual_weight = FloatField("Actual Weight", validators=[Optional()])
     charged_weight = FloatField("Charged Weight", validators=[Optional()])
     rate = FloatField("Rate", validators=[Optional()])
@@ -162,14 +256,14 @@ class BuiltyForm(FlaskForm):
     status = SelectField("Status", choices=[("IN_TRANSIT","IN_TRANSIT"),("DELIVERED","DELIVERED")])
     
     # Party fields (inherited from order but can be overridden)
-    consignor_id = SelectField("Consignor", coerce=coerce_int_or_none, validators=[Optional()])
-    consignor_concerned_person_id = SelectField("Consignor Concerned Person", coerce=coerce_int_or_none, validators=[Optional()])
-    consignor_phone_number_id = SelectField("Consignor Phone Number", coerce=coerce_int_or_none, validators=[Optional()])
-    consignee_id = SelectField("Consignee", coerce=coerce_int_or_none, validators=[Optional()])
-    consignee_concerned_person_id = SelectField("Consignee Concerned Person", coerce=coerce_int_or_none, validators=[Optional()])
-    consignee_phone_number_id = SelectField("Consignee Phone Number", coerce=coerce_int_or_none, validators=[Optional()])
+    consignor_id = ModelSelectField("Consignor", model=Consignor, validators=[Optional()])
+    consignor_concerned_person_id = ModelSelectField("Consignor Concerned Person", model=ConcernedPerson, validators=[Optional()])
+    consignor_phone_number_id = ModelSelectField("Consignor Phone Number", model=PhoneBook, label_attr="phone_number", validators=[Optional()])
+    consignee_id = ModelSelectField("Consignee", model=Consignee, validators=[Optional()])
+    consignee_concerned_person_id = ModelSelectField("Consignee Concerned Person", model=ConcernedPerson, validators=[Optional()])
+    consignee_phone_number_id = ModelSelectField("Consignee Phone Number", model=PhoneBook, label_attr="phone_number", validators=[Optional()])
     
     # Agent field (inherited from order but can be overridden)
-    booking_agent_id = SelectField("Booking Agent", coerce=coerce_int_or_none, validators=[Optional()])
-    agent_concerned_person_id = SelectField("Agent Concerned Person", coerce=coerce_int_or_none, validators=[Optional()])
-    agent_phone_number_id = SelectField("Agent Phone Number", coerce=coerce_int_or_none, validators=[Optional()])
\ No newline at end of file
+    booking_agent_id = ModelSelectField("Booking Agent", model=BookingAgent, validators=[Optional()])
+    agent_concerned_person_id = ModelSelectField("Agent Concerned Person", model=ConcernedPerson, validators=[Optional()])
+    agent_phone_number_id = ModelSelectField("Agent Phone Number", model=PhoneBook, label_attr="phone_number", validators=[Optional()])
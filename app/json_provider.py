@@ -0,0 +1,73 @@
+"""
+JSON provider for ``jsonify`` and ``response.get_json``.
+
+Uses orjson when it is installed and the standard library otherwise; both
+produce the same output. Beyond Flask's defaults it serializes SQLAlchemy
+result rows and other row tuples as arrays, dates as ISO 8601 and
+Decimals as strings, so list endpoints can hand query rows straight to
+``jsonify`` (see ``rows_payload``) instead of building a dict per row.
+"""
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, Row):
+        return tuple(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def rows_payload(fields, rows):
+    """Compact ``{"fields": [...], "rows": [[...], ...]}`` body for a list
+    endpoint; ``rows`` may be query result rows or plain tuples"""
+    return {"fields": list(fields), "rows": rows}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def _orjson_options(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if not self._compact():
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _compact(self):
+        return self.compact if self.compact is not None else not self._app.debug
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        data = orjson.dumps(obj, default=_default, option=self._orjson_options())
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
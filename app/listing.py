@@ -0,0 +1,134 @@
+from flask import request, url_for, render_template, jsonify
+from .extensions import db
+from .pagination import get_page_size
+
+
+class ListPage:
+    """One numbered page of a master-data listing with its total count"""
+
+    def __init__(self, items, page, per_page, total, sort, direction, search):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.sort = sort
+        self.direction = direction
+        self.search = search
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def first_index(self):
+        return (self.page - 1) * self.per_page + 1 if self.total else 0
+
+    @property
+    def last_index(self):
+        return min(self.page * self.per_page, self.total)
+
+    def url(self, **overrides):
+        args = request.args.to_dict()
+        args.update({k: v for k, v in overrides.items() if v is not None})
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def sort_url(self, key):
+        direction = "desc" if key == self.sort and self.direction == "asc" else "asc"
+        return self.url(sort=key, dir=direction, page=1)
+
+    @property
+    def prev_url(self):
+        return self.url(page=self.page - 1) if self.has_prev else None
+
+    @property
+    def next_url(self):
+        return self.url(page=self.page + 1) if self.has_next else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class MasterList:
+    """Paginated, sortable and filterable listing of one master-data model.
+
+    ``sort_columns`` maps the ``?sort=`` keys to columns, ``search_columns``
+    are matched against ``?q=`` and ``filters`` maps request arguments to
+    columns compared for equality (e.g. ``?station_id=3``).
+    """
+
+    def __init__(self, model, sort_columns, default_sort, search_columns=(), filters=None,
+                 options=(), serialize=None):
+        self.model = model
+        self.sort_columns = sort_columns
+        self.default_sort = default_sort
+        self.search_columns = search_columns
+        self.filters = filters or {}
+        self.options = options
+        self.serialize = serialize
+
+    def query(self):
+        query = self.model.query
+        search = request.args.get("q", "").strip()
+        if search and self.search_columns:
+            term = f"%{search}%"
+            query = query.filter(db.or_(*[column.ilike(term) for column in self.search_columns]))
+        for arg, column in self.filters.items():
+            value = request.args.get(arg)
+            if value not in (None, ""):
+                query = query.filter(column == value)
+        return query, search
+
+    def paginate(self) -> ListPage:
+        query, search = self.query()
+        sort = request.args.get("sort", self.default_sort)
+        if sort not in self.sort_columns:
+            sort = self.default_sort
+        direction = "desc" if request.args.get("dir") == "desc" else "asc"
+        per_page = get_page_size("MASTER_LIST_PAGE_SIZE")
+        page = max(request.args.get("page", 1, type=int) or 1, 1)
+
+        total = query.order_by(None).count()
+        last_page = max(1, -(-total // per_page))
+        page = min(page, last_page)
+
+        column = self.sort_columns[sort]
+        order = column.desc() if direction == "desc" else column.asc()
+        # The primary key breaks ties so rows never shift between pages
+        items = query.options(*self.options)\
+                     .order_by(order, self.model.id.asc())\
+                     .offset((page - 1) * per_page)\
+                     .limit(per_page)\
+                     .all()
+        return ListPage(items, page, per_page, total, sort, direction, search)
+
+    @staticmethod
+    def wants_json():
+        if request.args.get("format") == "json":
+            return True
+        best = request.accept_mimetypes.best_match(["application/json", "text/html"])
+        return best == "application/json" and request.accept_mimetypes[best] > request.accept_mimetypes["text/html"]
+
+    def render(self, template, **context):
+        listing = self.paginate()
+        if self.wants_json():
+            return jsonify({
+                "items": [self.serialize(item) for item in listing.items],
+                "page": listing.page,
+                "pages": listing.pages,
+                "per_page": listing.per_page,
+                "total": listing.total,
+                "sort": listing.sort,
+                "dir": listing.direction,
+            })
+        return render_template(template, items=listing.items, listing=listing, **context)
@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy.orm import validates
+from .constants import phone_digits
 from .extensions import db
 
 
@@ -46,6 +48,7 @@ class Consignor(db.Model, TimestampMixin):
     pin_code = db.relationship("PinCode")
     __table_args__ = (
         db.UniqueConstraint("name", "station_id", name="uq_consignor_name_station"),
+        db.Index("ix_consignors_name_lower", db.func.lower(name)),
     )
 
 
@@ -65,6 +68,7 @@ class Consignee(db.Model, TimestampMixin):
     pin_code = db.relationship("PinCode")
     __table_args__ = (
         db.UniqueConstraint("name", "station_id", name="uq_consignee_name_station"),
+        db.Index("ix_consignees_name_lower", db.func.lower(name)),
     )
 
 
@@ -80,12 +84,18 @@ class BookingAgent(db.Model, TimestampMixin):
     state = db.Column(db.String(64))
     email = db.Column(db.String(128))
     station = db.relationship("Station")
+    __table_args__ = (
+        db.Index("ix_booking_agents_name_lower", db.func.lower(name)),
+    )
 
 
 class Goods(db.Model, TimestampMixin):
     __tablename__ = "goods"
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False, unique=True)
+    __table_args__ = (
+        db.Index("ix_goods_description_lower", db.func.lower(description)),
+    )
 
 
 class Owner(db.Model, TimestampMixin):
@@ -96,6 +106,9 @@ class Owner(db.Model, TimestampMixin):
     pan = db.Column(db.String(16))
     aadhar = db.Column(db.String(20))
     address = db.Column(db.String(512))
+    __table_args__ = (
+        db.Index("ix_owners_name_lower", db.func.lower(name)),
+    )
 
 
 class Driver(db.Model, TimestampMixin):
@@ -109,6 +122,9 @@ class Driver(db.Model, TimestampMixin):
     rto = db.Column(db.String(64))
     aadhar = db.Column(db.String(20))
     phone = db.Column(db.String(32))
+    __table_args__ = (
+        db.Index("ix_drivers_name_lower", db.func.lower(name)),
+    )
 
 
 class Station(db.Model, TimestampMixin):
@@ -117,6 +133,9 @@ class Station(db.Model, TimestampMixin):
     name = db.Column(db.String(255), nullable=False, unique=True)
     state = db.Column(db.String(64))
     pin_codes = db.relationship("PinCode", back_populates="station")
+    __table_args__ = (
+        db.Index("ix_stations_name_lower", db.func.lower(name)),
+    )
 
 
 class Vehicle(db.Model, TimestampMixin):
@@ -134,6 +153,9 @@ class Vehicle(db.Model, TimestampMixin):
 
     owner = db.relationship("Owner")
     driver = db.relationship("Driver")
+    __table_args__ = (
+        db.Index("ix_vehicles_lorry_no_lower", db.func.lower(lorry_no)),
+    )
 
 
 class Order(db.Model, TimestampMixin):
@@ -202,12 +224,12 @@ class Builty(db.Model, TimestampMixin):
     owner_id = db.Column(db.Integer, db.ForeignKey("owners.id", ondelete="RESTRICT"), nullable=False)
     date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
     firm = db.Column(db.String(255))
-    lr_no = db.Column(db.String(64))
+    lr_no = db.Column(db.String(64), index=True)
     from_station_id = db.Column(db.Integer, db.ForeignKey("stations.id", ondelete="RESTRICT"), nullable=False)
     to_station_id = db.Column(db.Integer, db.ForeignKey("stations.id", ondelete="RESTRICT"), nullable=False)
     status = db.Column(db.String(32), default="IN_TRANSIT", index=True)
-    invoice_no = db.Column(db.String(64))
-    eway_bill_no = db.Column(db.String(64))
+    invoice_no = db.Column(db.String(64), index=True)
+    eway_bill_no = db.Column(db.String(64), index=True)
     lr_file = db.Column(db.String(255))
     goods_id = db.Column(db.Integer, db.ForeignKey("goods.id", ondelete="SET NULL"))
     actual_weight = db.Column(db.Float)
@@ -257,12 +279,14 @@ class ConcernedPerson(db.Model, TimestampMixin):
     id = db.Column(db.Integer, primary_key=True)
     entity_type = db.Column(db.String(32), nullable=False, index=True)  # CONSIGNOR, CONSIGNEE, AGENT, DRIVER, OWNER
     entity_id = db.Column(db.Integer, nullable=False, index=True)
+    entity_name = db.Column(db.String(255))  # Copy of the entity's name, kept current by app.contacts
     name = db.Column(db.String(255), nullable=False)
     designation = db.Column(db.String(128))  # e.g., "Manager", "CEO", "Operations Head"
     is_primary = db.Column(db.Boolean, default=False)  # Primary contact person
     
     __table_args__ = (
         db.Index("ix_concerned_entity", "entity_type", "entity_id"),
+        db.Index("ix_concerned_entity_name", "entity_name", "entity_type"),
         db.UniqueConstraint("entity_type", "entity_id", "is_primary", name="uq_primary_concerned"),
     )
 
@@ -272,6 +296,8 @@ class PhoneBook(db.Model, TimestampMixin):
     id = db.Column(db.Integer, primary_key=True)
     concerned_person_id = db.Column(db.Integer, db.ForeignKey("concerned_persons.id", ondelete="CASCADE"), nullable=False)
     phone_number = db.Column(db.String(32), nullable=False, unique=True)  # Prevent duplicate phone numbers
+    phone_digits = db.Column(db.String(32), index=True)  # Digits only, without +91/0; set from phone_number
+    phone_digits_rev = db.Column(db.String(32), index=True)  # phone_digits reversed, for "last N digits" lookups
     is_primary = db.Column(db.Boolean, default=False)  # Only one primary per concerned person
     label = db.Column(db.String(64))  # e.g., "Mobile", "Office", "Home"
     
@@ -282,6 +308,12 @@ class PhoneBook(db.Model, TimestampMixin):
         db.UniqueConstraint("concerned_person_id", "is_primary", name="uq_primary_phone_per_person"),
     )
 
+    @validates("phone_number")
+    def _set_phone_digits(self, key, value):
+        self.phone_digits = phone_digits(value) or None
+        self.phone_digits_rev = self.phone_digits[::-1] if self.phone_digits else None
+        return value
+
 
 class TransactionLog(db.Model, TimestampMixin):
     __tablename__ = "transaction_logs"
@@ -295,3 +327,11 @@ class TransactionLog(db.Model, TimestampMixin):
     __table_args__ = (
         db.Index("ix_tx_entity", "entity", "entity_id"),
     )
+
+
+class ChoiceVersion(db.Model):
+    """Write counter per master-data table, used to invalidate cached form choices"""
+    __tablename__ = "choice_versions"
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
@@ -0,0 +1,79 @@
+from flask import current_app, request, url_for
+
+
+def get_page_size(config_key: str = "LIST_PAGE_SIZE") -> int:
+    """Read ``?per_page=`` from the request, clamped to the configured maximum"""
+    default = current_app.config.get(config_key) or current_app.config.get("LIST_PAGE_SIZE", 50)
+    maximum = current_app.config.get("LIST_MAX_PAGE_SIZE", 500)
+    size = request.args.get("per_page", default, type=int)
+    if not size or size < 1:
+        size = default
+    return min(size, maximum)
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing, newest first"""
+
+    def __init__(self, items, page_size, has_next, has_prev, key="id"):
+        self.items = items
+        self.page_size = page_size
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.key = key
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.items:
+            return getattr(self.items[-1], self.key)
+        return None
+
+    @property
+    def prev_cursor(self):
+        if self.has_prev and self.items:
+            return getattr(self.items[0], self.key)
+        return None
+
+    def _url(self, **cursor):
+        args = request.args.to_dict()
+        args.pop("after", None)
+        args.pop("before", None)
+        args.update(cursor)
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self):
+        cursor = self.next_cursor
+        return self._url(after=cursor) if cursor is not None else None
+
+    @property
+    def prev_url(self):
+        cursor = self.prev_cursor
+        return self._url(before=cursor) if cursor is not None else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, column, page_size: int, after=None, before=None) -> KeysetPage:
+    """Page ``query`` in descending order of the unique ``column``.
+
+    ``after`` returns the rows that follow the given key (older rows) and
+    ``before`` the rows that precede it (newer rows). Only ``page_size + 1``
+    rows are fetched so each page costs the same regardless of its depth.
+    """
+    if before is not None:
+        rows = query.filter(column > before).order_by(column.asc()).limit(page_size + 1).all()
+        has_prev = len(rows) > page_size
+        rows = list(reversed(rows[:page_size]))
+        has_next = True
+    else:
+        if after is not None:
+            query = query.filter(column < after)
+        rows = query.order_by(column.desc()).limit(page_size + 1).all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_prev = after is not None
+    return KeysetPage(rows, page_size, has_next, has_prev, key=column.key)
@@ -11,6 +11,7 @@ from app.models import (
     Owner, Driver, Vehicle, Order, Builty, ConcernedPerson, PhoneBook,
     TransactionLog
 )
+from app.search import create_search_tables
 import random
 
 
@@ -23,6 +24,7 @@ def create_sample_data():
     print("🧹 Clearing existing data...")
     db.drop_all()
     db.create_all()
+    create_search_tables(drop=True)
     
     # 1. Create Stations
     print("🏢 Creating stations...")
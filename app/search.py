@@ -0,0 +1,345 @@
+"""
+Full-text search indexes for the order book and the builty register.
+
+Each index is a side table holding one text document per row of its model:
+an FTS5 virtual table on SQLite and an InnoDB table with a FULLTEXT key on
+MySQL. Documents are rewritten in the same transaction whenever the model
+row, or a master record whose name appears in the document, is flushed.
+Other databases have no index and callers fall back to ``ilike`` search.
+"""
+import re
+import weakref
+from datetime import date
+
+from sqlalchemy import Integer, bindparam, column, event, false, func, inspect, or_, select, text
+from sqlalchemy.orm import Session, aliased
+
+from .extensions import db
+from .models import Order, Builty, Consignor, Consignee, Station, Goods, BookingAgent, Vehicle, Driver, Owner
+
+SUPPORTED_DIALECTS = ("sqlite", "mysql")
+
+# InnoDB's default innodb_ft_min_token_size: shorter words, such as order
+# numbers below 100, are never indexed and must be matched some other way
+MYSQL_MIN_TOKEN_SIZE = 3
+
+BATCH_SIZE = 1000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# "123", "#123" or "Order 123": an order number typed into a search box
+ORDER_NO_RE = re.compile(r"(?:order\s*)?#?\s*(\d+)", re.IGNORECASE)
+
+
+def id_prefix_filter(column, digits, max_id):
+    """Match ids starting with ``digits`` as index range scans: 12, 120-129, 1200-1299..."""
+    digits = digits.lstrip('0')
+    if not digits:
+        return false()
+    prefix = int(digits)
+    ranges = []
+    for width in range(len(str(max_id)) - len(digits) + 1):
+        low, high = prefix * 10 ** width, (prefix + 1) * 10 ** width - 1
+        ranges.append(column.between(low, high))
+    return or_(*ranges) if ranges else false()
+
+
+# engine -> names of the index tables known to exist on it
+_available = weakref.WeakKeyDictionary()
+
+
+def _date_terms(value):
+    if not isinstance(value, date):
+        return []
+    return [value.isoformat(), value.strftime("%d-%m-%Y"), value.strftime("%d/%m/%Y"), value.strftime("%b %Y")]
+
+
+class SearchIndex:
+    """A full-text index over one model, keyed by the model's primary key"""
+
+    def __init__(self, name, model, documents, dependencies):
+        self.name = name
+        self.model = model
+        # callable(ids) -> select() whose first column is the primary key
+        self.documents = documents
+        # {master model: (label attribute, [foreign key columns on model])}
+        self.dependencies = dependencies
+
+    # DDL -----------------------------------------------------------------
+
+    def create(self, connection):
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5(body, tokenize='unicode61')"
+            ))
+        elif dialect == "mysql":
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.name} ("
+                f"entity_id INTEGER NOT NULL PRIMARY KEY, "
+                f"body TEXT NOT NULL, "
+                f"FULLTEXT KEY ft_{self.name}_body (body)"
+                f") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+            ))
+
+    def drop(self, connection):
+        if connection.dialect.name in SUPPORTED_DIALECTS:
+            connection.execute(text(f"DROP TABLE IF EXISTS {self.name}"))
+            _available.get(connection.engine, set()).discard(self.name)
+
+    def is_available(self, connection):
+        known = _available.setdefault(connection.engine, set())
+        if self.name in known:
+            return True
+        if connection.dialect.name not in SUPPORTED_DIALECTS:
+            return False
+        if inspect(connection).has_table(self.name):
+            known.add(self.name)
+            return True
+        return False
+
+    # Writes --------------------------------------------------------------
+
+    def _id_column(self, connection):
+        return "rowid" if connection.dialect.name == "sqlite" else "entity_id"
+
+    def delete(self, connection, ids):
+        if not ids:
+            return
+        id_col = self._id_column(connection)
+        stmt = text(f"DELETE FROM {self.name} WHERE {id_col} IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        connection.execute(stmt, {"ids": list(ids)})
+
+    def reindex(self, connection, ids):
+        """Rewrite the documents for ``ids`` (every row when ``ids`` is None)"""
+        if ids is None:
+            connection.execute(text(f"DELETE FROM {self.name}"))
+            last_id = 0
+            while True:
+                rows = connection.execute(
+                    self.documents(None)
+                    .where(self.model.id > last_id)
+                    .order_by(self.model.id)
+                    .limit(BATCH_SIZE)
+                ).all()
+                if not rows:
+                    break
+                self._insert(connection, rows)
+                last_id = rows[-1][0]
+            return
+        ids = sorted(ids)
+        for start in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[start:start + BATCH_SIZE]
+            self.delete(connection, chunk)
+            self._insert(connection, connection.execute(self.documents(chunk)).all())
+
+    def _insert(self, connection, rows):
+        if not rows:
+            return
+        id_col = self._id_column(connection)
+        connection.execute(
+            text(f"INSERT INTO {self.name} ({id_col}, body) VALUES (:id, :body)"),
+            [{"id": row[0], "body": self.render(row)} for row in rows],
+        )
+
+    @staticmethod
+    def render(row):
+        terms = []
+        for value in row:
+            if value is None:
+                continue
+            if isinstance(value, date):
+                terms.extend(_date_terms(value))
+            else:
+                terms.append(str(value))
+        return " ".join(terms)
+
+    # Reads ---------------------------------------------------------------
+
+    @staticmethod
+    def can_match(dialect, query):
+        """False when the index would miss ``query`` and callers must fall back to ilike"""
+        if dialect == "mysql":
+            return all(len(t) >= MYSQL_MIN_TOKEN_SIZE for t in _TOKEN_RE.findall(query or ""))
+        return True
+
+    @staticmethod
+    def match_expression(dialect, query):
+        tokens = _TOKEN_RE.findall(query or "")
+        if not tokens:
+            return None
+        if dialect == "sqlite":
+            # Every token must match, each as a prefix
+            return " ".join(f'"{t}"*' for t in tokens)
+        return " ".join(f"+{t}*" for t in tokens)
+
+    def _match_sql(self, connection, ranked):
+        if connection.dialect.name == "sqlite":
+            sql = f"SELECT rowid AS entity_id FROM {self.name} WHERE {self.name} MATCH :q"
+            return sql + " ORDER BY rank" if ranked else sql
+        sql = f"SELECT entity_id FROM {self.name} WHERE MATCH(body) AGAINST (:q IN BOOLEAN MODE)"
+        return sql + " ORDER BY MATCH(body) AGAINST (:q IN BOOLEAN MODE) DESC" if ranked else sql
+
+    def matching_ids(self, query):
+        """Subquery of ids matching ``query``, or None if the index can't serve it"""
+        connection = db.session.connection()
+        if not self.is_available(connection) or not self.can_match(connection.dialect.name, query):
+            return None
+        expression = self.match_expression(connection.dialect.name, query)
+        if expression is None:
+            return None
+        stmt = text(self._match_sql(connection, ranked=False)).bindparams(q=expression)
+        return select(stmt.columns(column("entity_id", Integer)).subquery().c.entity_id)
+
+    def ranked_ids(self, query, limit=20):
+        """Ids matching ``query`` best first, or None if the index can't serve it"""
+        connection = db.session.connection()
+        if not self.is_available(connection) or not self.can_match(connection.dialect.name, query):
+            return None
+        expression = self.match_expression(connection.dialect.name, query)
+        if expression is None:
+            return []
+        sql = self._match_sql(connection, ranked=True) + " LIMIT :limit"
+        return [row[0] for row in connection.execute(text(sql), {"q": expression, "limit": limit})]
+
+
+def _order_documents(ids):
+    FromStation = aliased(Station)
+    ToStation = aliased(Station)
+    stmt = select(
+        Order.id,
+        Order.date,
+        Order.firm,
+        Consignor.name,
+        Consignee.name,
+        FromStation.name,
+        ToStation.name,
+        Goods.description,
+        BookingAgent.name,
+    ).select_from(Order)\
+     .outerjoin(Consignor, Order.consignor_id == Consignor.id)\
+     .outerjoin(Consignee, Order.consignee_id == Consignee.id)\
+     .outerjoin(FromStation, Order.from_station_id == FromStation.id)\
+     .outerjoin(ToStation, Order.to_station_id == ToStation.id)\
+     .outerjoin(Goods, Order.goods_id == Goods.id)\
+     .outerjoin(BookingAgent, Order.booking_agent_id == BookingAgent.id)
+    if ids is not None:
+        stmt = stmt.where(Order.id.in_(ids))
+    return stmt
+
+
+order_index = SearchIndex(
+    "order_search",
+    Order,
+    _order_documents,
+    {
+        Consignor: ("name", [Order.consignor_id]),
+        Consignee: ("name", [Order.consignee_id]),
+        Station: ("name", [Order.from_station_id, Order.to_station_id]),
+        Goods: ("description", [Order.goods_id]),
+        BookingAgent: ("name", [Order.booking_agent_id]),
+    },
+)
+
+
+
+def _compact(column):
+    # "MH-12 AB 1234" is also indexed as "MH12AB1234"
+    return func.replace(func.replace(column, " ", ""), "-", "")
+
+
+def _builty_documents(ids):
+    FromStation = aliased(Station)
+    ToStation = aliased(Station)
+    stmt = select(
+        Builty.id,
+        Builty.lr_no,
+        Builty.invoice_no,
+        Builty.eway_bill_no,
+        Builty.date,
+        Builty.firm,
+        Vehicle.lorry_no,
+        _compact(Vehicle.lorry_no),
+        Driver.name,
+        Owner.name,
+        FromStation.name,
+        ToStation.name,
+        Consignor.name,
+        Consignee.name,
+    ).select_from(Builty)\
+     .outerjoin(Vehicle, Builty.vehicle_id == Vehicle.id)\
+     .outerjoin(Driver, Builty.driver_id == Driver.id)\
+     .outerjoin(Owner, Builty.owner_id == Owner.id)\
+     .outerjoin(FromStation, Builty.from_station_id == FromStation.id)\
+     .outerjoin(ToStation, Builty.to_station_id == ToStation.id)\
+     .outerjoin(Consignor, Builty.consignor_id == Consignor.id)\
+     .outerjoin(Consignee, Builty.consignee_id == Consignee.id)
+    if ids is not None:
+        stmt = stmt.where(Builty.id.in_(ids))
+    return stmt
+
+
+builty_index = SearchIndex(
+    "builty_search",
+    Builty,
+    _builty_documents,
+    {
+        Vehicle: ("lorry_no", [Builty.vehicle_id]),
+        Driver: ("name", [Builty.driver_id]),
+        Owner: ("name", [Builty.owner_id]),
+        Station: ("name", [Builty.from_station_id, Builty.to_station_id]),
+        Consignor: ("name", [Builty.consignor_id]),
+        Consignee: ("name", [Builty.consignee_id]),
+    },
+)
+
+INDEXES = [order_index, builty_index]
+
+
+def create_search_tables(drop=False):
+    """Create (or recreate) every search index table for the current engine"""
+    with db.engine.begin() as connection:
+        for index in INDEXES:
+            if drop:
+                index.drop(connection)
+            index.create(connection)
+
+
+def rebuild_search_indexes():
+    with db.engine.begin() as connection:
+        for index in INDEXES:
+            if index.is_available(connection):
+                index.reindex(connection, None)
+
+
+def _changed(obj, attr):
+    return inspect(obj).attrs[attr].history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_indexes(session, flush_context):
+    if not session.new and not session.dirty and not session.deleted:
+        return
+    connection = session.connection()
+    for index in INDEXES:
+        if not index.is_available(connection):
+            continue
+        stale = set()
+        for obj in session.new | session.dirty:
+            if isinstance(obj, index.model):
+                stale.add(obj.id)
+        masters = {}
+        for obj in session.dirty:
+            dependency = index.dependencies.get(type(obj))
+            if dependency and _changed(obj, dependency[0]):
+                masters.setdefault(type(obj), []).append(obj.id)
+        for model, master_ids in masters.items():
+            for fk in index.dependencies[model][1]:
+                stale.update(connection.execute(
+                    select(index.model.id).where(fk.in_(master_ids))
+                ).scalars())
+        removed = {obj.id for obj in session.deleted if isinstance(obj, index.model)}
+        index.delete(connection, removed)
+        index.reindex(connection, stale - removed)
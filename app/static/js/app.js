@@ -11,6 +11,174 @@ TMS.fetchJSON = async function(url, options={}){
   return res.text();
 };
 
+// Master-data snapshot kept in IndexedDB and brought up to date with
+// deltas from /api/bootstrap, checked at most once per MASTER_DATA_MAX_AGE.
+// When the browser cannot store it (no IndexedDB, quota exceeded) a small
+// flag in localStorage sends TMS.lists to /api/batch for MASTER_DATA_RETRY
+// instead of downloading the whole snapshot on every form
+TMS.MASTER_DATA_KEY = 'tms.masterData';
+TMS.MASTER_DATA_DB = 'tms';
+TMS.MASTER_DATA_STORE = 'masterData';
+TMS.MASTER_DATA_UNSTORABLE_KEY = 'tms.masterDataUnstorable';
+TMS.MASTER_DATA_MAX_AGE = 5 * 60 * 1000;
+TMS.MASTER_DATA_RETRY = 24 * 60 * 60 * 1000;
+
+// Snapshots used to live in localStorage; free that space
+try { localStorage.removeItem(TMS.MASTER_DATA_KEY); } catch(e) {}
+
+TMS.openMasterDB = function(){
+  if(!TMS._masterDB){
+    TMS._masterDB = new Promise((resolve, reject) => {
+      if(!window.indexedDB) return reject(new Error('IndexedDB unavailable'));
+      const req = indexedDB.open(TMS.MASTER_DATA_DB, 1);
+      req.onupgradeneeded = () => req.result.createObjectStore(TMS.MASTER_DATA_STORE);
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+  }
+  return TMS._masterDB;
+};
+
+// Run one request against the snapshot store, resolved when its transaction commits
+TMS._masterStore = async function(mode, action){
+  const db = await TMS.openMasterDB();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(TMS.MASTER_DATA_STORE, mode);
+    const req = action(tx.objectStore(TMS.MASTER_DATA_STORE));
+    tx.oncomplete = () => resolve(req.result);
+    tx.onerror = tx.onabort = () => reject(tx.error || req.error);
+  });
+};
+
+TMS.readMasterData = async function(){
+  try {
+    return (await TMS._masterStore('readonly', store => store.get(TMS.MASTER_DATA_KEY))) || null;
+  } catch(e) {
+    return null;
+  }
+};
+
+TMS.writeMasterData = async function(data){
+  try {
+    await TMS._masterStore('readwrite', store => store.put(data, TMS.MASTER_DATA_KEY));
+    localStorage.removeItem(TMS.MASTER_DATA_UNSTORABLE_KEY);
+  } catch(e) {
+    console.warn('Master-data snapshot not stored, using per-list requests', e);
+    try { localStorage.setItem(TMS.MASTER_DATA_UNSTORABLE_KEY, String(Date.now())); } catch(e2) {}
+    TMS._masterStore('readwrite', store => store.delete(TMS.MASTER_DATA_KEY)).catch(() => {});
+  }
+};
+
+TMS.masterDataStorable = function(){
+  let failed = 0;
+  try { failed = Number(localStorage.getItem(TMS.MASTER_DATA_UNSTORABLE_KEY) || 0); } catch(e) {}
+  return Date.now() - failed > TMS.MASTER_DATA_RETRY;
+};
+
+TMS.expireMasterData = async function(){
+  const data = await TMS.readMasterData();
+  if(!data) return;
+  data.checked = 0;
+  await TMS.writeMasterData(data);
+};
+
+TMS.loadMasterData = async function(){
+  const cached = await TMS.readMasterData();
+  if(cached && Date.now() - cached.checked < TMS.MASTER_DATA_MAX_AGE) return cached;
+  if(!cached && !TMS.masterDataStorable()) throw new Error('Master-data snapshot cannot be stored');
+
+  const params = new URLSearchParams();
+  if(cached){
+    params.set('since', cached.as_of);
+    params.set('versions', Object.entries(cached.versions).map(([name, v]) => `${name}.${v}`).join(','));
+  }
+  const res = await TMS.fetchJSON('/api/bootstrap?' + params);
+  const data = cached || {lists: {}, fields: {}};
+  Object.assign(data.fields, res.fields);
+  Object.assign(data.lists, res.lists);
+  Object.entries(res.changes).forEach(([name, change]) => {
+    const rows = new Map((data.lists[name] || []).map(row => [row[0], row]));
+    change.rows.forEach(row => rows.set(row[0], row));
+    data.lists[name] = change.ids.filter(id => rows.has(id)).map(id => rows.get(id));
+  });
+  data.versions = res.versions;
+  data.as_of = res.as_of;
+  data.checked = Date.now();
+  await TMS.writeMasterData(data);
+  return data;
+};
+
+// Whole /api lists by name, e.g. TMS.lists(['consignors', 'vehicles']): from the
+// snapshot when it has them all, otherwise in one /api/batch round trip
+TMS.lists = async function(names){
+  try {
+    const data = await TMS.loadMasterData();
+    if(names.every(name => data.lists[name])){
+      const result = {};
+      names.forEach(name => {
+        const fields = data.fields[name];
+        result[name] = data.lists[name].map(row => Object.fromEntries(fields.map((f, i) => [f, row[i]])));
+      });
+      return result;
+    }
+  } catch(e) {
+    console.error('Master-data snapshot unavailable', e);
+  }
+  return TMS.fetchJSON('/api/batch?include=' + names.join(','));
+};
+
+// Named sub-queries in one round trip, see /api/batch
+TMS.batch = function(queries){
+  return TMS.fetchJSON('/api/batch', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json', 'X-Requested-With': 'XMLHttpRequest'},
+    body: JSON.stringify(queries)
+  });
+};
+
+// Concerned persons of an entity with their phones; the phones are kept so
+// picking a person does not need another request
+TMS.contactPhones = {};
+TMS._prefetchedContacts = {};
+
+// Contacts of several entities in one request, e.g.
+// TMS.fetchContacts([['consignor', 3], ['consignee', 5]]); keyed "TYPE:ID"
+TMS.fetchContacts = async function(entities){
+  const keys = entities.map(([type, id]) => `${type.toUpperCase()}:${id}`);
+  const result = await TMS.fetchJSON('/phonebook/api/contacts?entities=' + encodeURIComponent(keys.join(',')));
+  Object.values(result).forEach(persons => persons.forEach(person => { TMS.contactPhones[person.id] = person.phones; }));
+  return result;
+};
+
+// Fetch the contacts a form is about to load one entity at a time; each
+// prefetched list answers the next TMS.loadContacts for its entity once
+TMS.prefetchContacts = async function(entities){
+  entities = entities.filter(([, id]) => id && id !== '0');
+  if(!entities.length) return;
+  try {
+    Object.assign(TMS._prefetchedContacts, await TMS.fetchContacts(entities));
+  } catch(e) {
+    console.error('Contact prefetch failed', e);
+  }
+};
+
+TMS.loadContacts = async function(entityType, entityId){
+  const key = `${entityType.toUpperCase()}:${entityId}`;
+  if(TMS._prefetchedContacts[key]){
+    const persons = TMS._prefetchedContacts[key];
+    delete TMS._prefetchedContacts[key];
+    return persons;
+  }
+  return (await TMS.fetchContacts([[entityType, entityId]]))[key] || [];
+};
+
+TMS.loadPhones = async function(concernedPersonId, refresh=false){
+  if(!refresh && TMS.contactPhones[concernedPersonId]) return TMS.contactPhones[concernedPersonId];
+  const phones = await TMS.fetchJSON(`/phonebook/api/phone-numbers/${concernedPersonId}`);
+  TMS.contactPhones[concernedPersonId] = phones;
+  return phones;
+};
+
 TMS.toggleSidebar = function(){
   var sidebar = document.getElementById('sidebar');
   if(!sidebar) return;
@@ -171,6 +339,7 @@ TMS.openInline = async function(entity, ctx={}){
         const res = await fetch(`/api/${entity}`, { method: 'POST', body: fd });
         if(!res.ok){ throw new Error(await res.text()); }
         const data = await res.json();
+        TMS.expireMasterData();
         
         // Update parent form's dropdown if this was a nested add
         if(entity === 'stations'){
@@ -257,11 +426,13 @@ TMS.CustomSelect = function(config){
   const list = root.querySelector('.cs-list');
   const search = root.querySelector('input');
   const valSpan = root.querySelector('.cs-value');
+  const labelSpan = root.querySelector('.cs-label');
 
   let current = null;
   function setValue(item){
     current = item;
     valSpan.textContent = item ? item.label : '';
+    labelSpan.style.display = item ? 'none' : '';
     if(onChange) onChange(item);
   }
 
@@ -365,7 +536,21 @@ TMS.enhanceSelects = function(context){
       const stateEl = form && form.querySelector('[name="state"]');
       return entity === 'stations' && stateEl && stateEl.value ? { state: stateEl.value } : {};
     };
-    const cs = TMS.CustomSelect({ mount, source: `/api/${entity}`, placeholder: sel.getAttribute('data-placeholder')||'Select', extraParams: getExtra(), onChange: (item)=>{ sel.value = item ? item.id : ''; } });
+    const source = sel.getAttribute('data-source') || `/api/${entity}`;
+    const cs = TMS.CustomSelect({ mount, source, placeholder: sel.getAttribute('data-placeholder')||'Select', extraParams: getExtra(), onChange: (item)=>{
+      // server-side typeaheads render only the selected option, so add picked ones
+      if(item && !Array.from(sel.options).some(o => o.value == item.id)){
+        sel.appendChild(new Option(item.label, item.id));
+      }
+      const value = item ? String(item.id) : '';
+      if(sel.value === value) return;
+      sel.value = value;
+      sel.dispatchEvent(new Event('change'));
+    } });
+    const selected = sel.options[sel.selectedIndex];
+    if(selected && selected.value && selected.value !== '0'){
+      cs.value = { id: selected.value, label: selected.textContent };
+    }
     // keep station list filtered when state changes
     const form = sel.closest('form');
     if(form){
@@ -518,6 +703,8 @@ TMS.handleFormSubmission = function(form) {
       });
       
       if (response.ok) {
+        // Master data may have changed; revalidate the snapshot on next use
+        TMS.expireMasterData();
         // Check if response is JSON (success response)
         const contentType = response.headers.get('content-type');
         if (contentType && contentType.includes('application/json')) {
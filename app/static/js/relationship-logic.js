@@ -52,12 +52,11 @@ class TMSRelationshipManager {
     if (this.relationshipsLoaded) return;
 
     try {
-      const [consignorsResponse, consigneesResponse, agentsResponse, vehiclesResponse] = await Promise.all([
-        fetch('/api/consignors').then(r => r.json()),
-        fetch('/api/consignees').then(r => r.json()),
-        fetch('/api/booking_agents').then(r => r.json()),
-        fetch('/api/vehicles').then(r => r.json())
-      ]);
+      const lists = await TMS.lists(['consignors', 'consignees', 'booking_agents', 'vehicles']);
+      const consignorsResponse = lists.consignors;
+      const consigneesResponse = lists.consignees;
+      const agentsResponse = lists.booking_agents;
+      const vehiclesResponse = lists.vehicles;
 
       // Populate station maps
       consignorsResponse.forEach(c => {
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark of JSON serialization for the /api list endpoints.
+
+Compares, per 1,000 rows, Flask's stock provider with per-row dicts (the
+old path) against the app's provider with per-row dicts, with plain
+tuples, and with SQLAlchemy result rows in the compact ``rows`` format.
+
+    python bench_json.py [--rows 1000] [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import date
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table, create_engine, insert, select
+
+from app.json_provider import FastJSONProvider, orjson, rows_payload
+
+FIELDS = ("id", "label", "station_id", "date")
+
+
+def make_rows(count):
+    return [(i, f"Consignor Number {i} Traders Pvt Ltd", i % 50 or None, date(2025, 1, 1 + i % 28)) for i in range(count)]
+
+
+def query_rows(rows):
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    table = Table(
+        "consignors", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("label", String),
+        Column("station_id", Integer),
+        Column("date", Date),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(table), [dict(zip(FIELDS, row)) for row in rows])
+        return connection.execute(select(table)).all()
+
+
+def bench(label, provider_class, build, count, repeat):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    with app.app_context():
+        seconds = min(timeit.repeat(lambda: app.json.response(build()).get_data(), number=1, repeat=repeat))
+    print(f"{label:<48} {seconds * 1000 * 1000 / count:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    result_rows = query_rows(rows)
+
+    def dicts():
+        return [{"id": r[0], "label": r[1], "station_id": r[2], "date": r[3].isoformat()} for r in rows]
+
+    print(f"JSON serialization per 1,000 rows ({args.rows} rows, best of {args.repeat}); "
+          f"backend: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}")
+    print("-" * 58)
+    bench("before: stock provider, dict per row", DefaultJSONProvider, dicts, args.rows, args.repeat)
+    bench("after: app provider, dict per row", FastJSONProvider, dicts, args.rows, args.repeat)
+    bench("after: app provider, tuples (format=rows)", FastJSONProvider,
+          lambda: rows_payload(FIELDS, rows), args.rows, args.repeat)
+    bench("after: app provider, result rows (format=rows)", FastJSONProvider,
+          lambda: rows_payload(FIELDS, result_rows), args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,10 @@ pip3 install -r requirements.txt
 echo "🗄️ Running database migrations..."
 FLASK_APP=run.py python3 -m flask db upgrade
 
+# Precompress static CSS/JS (served as .br/.gz; not compressed per request)
+echo "🗜️ Precompressing static files..."
+FLASK_APP=run.py python3 -m flask compress-static
+
 # Create uploads directory if it doesn't exist
 echo "📁 Creating uploads directory..."
 mkdir -p uploads
@@ -0,0 +1,94 @@
+"""add builty lookup indexes and full-text search index
+
+Revision ID: add_builty_search_index
+Revises: add_order_search_index
+Create Date: 2025-10-20 00:10:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_builty_search_index'
+down_revision = 'add_order_search_index'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 1000
+
+_BUILTY_DOCUMENTS = sa.text("""
+    SELECT b.id, b.lr_no, b.invoice_no, b.eway_bill_no, b.date, b.firm,
+           v.lorry_no, REPLACE(REPLACE(v.lorry_no, ' ', ''), '-', ''),
+           d.name, ow.name, fs.name, ts.name, cr.name, ce.name
+    FROM builty b
+    LEFT JOIN vehicles v ON v.id = b.vehicle_id
+    LEFT JOIN drivers d ON d.id = b.driver_id
+    LEFT JOIN owners ow ON ow.id = b.owner_id
+    LEFT JOIN stations fs ON fs.id = b.from_station_id
+    LEFT JOIN stations ts ON ts.id = b.to_station_id
+    LEFT JOIN consignors cr ON cr.id = b.consignor_id
+    LEFT JOIN consignees ce ON ce.id = b.consignee_id
+    WHERE b.id > :last_id
+    ORDER BY b.id
+    LIMIT :limit
+""").columns(id=sa.Integer, date=sa.Date)
+
+
+def _render(row):
+    # Frozen copy of app.search.SearchIndex.render as of this revision
+    terms = []
+    for value in row:
+        if value is None:
+            continue
+        if isinstance(value, date):
+            terms.extend([value.isoformat(), value.strftime("%d-%m-%Y"), value.strftime("%d/%m/%Y"),
+                          value.strftime("%b %Y")])
+        else:
+            terms.append(str(value))
+    return " ".join(terms)
+
+
+def upgrade():
+    # Exact-match fast paths for LR, e-way bill and invoice numbers
+    op.create_index(op.f('ix_builty_lr_no'), 'builty', ['lr_no'], unique=False)
+    op.create_index(op.f('ix_builty_eway_bill_no'), 'builty', ['eway_bill_no'], unique=False)
+    op.create_index(op.f('ix_builty_invoice_no'), 'builty', ['invoice_no'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS builty_search USING fts5(body, tokenize='unicode61')")
+        insert = sa.text("INSERT INTO builty_search (rowid, body) VALUES (:id, :body)")
+    elif bind.dialect.name == 'mysql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS builty_search ("
+            "entity_id INTEGER NOT NULL PRIMARY KEY, "
+            "body TEXT NOT NULL, "
+            "FULLTEXT KEY ft_builty_search_body (body)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        )
+        insert = sa.text("INSERT INTO builty_search (entity_id, body) VALUES (:id, :body)")
+    else:
+        return
+
+    # Backfill in keyset batches so the table is never read into memory at once
+    last_id = 0
+    while True:
+        rows = bind.execute(_BUILTY_DOCUMENTS, {'last_id': last_id, 'limit': BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(insert, [{'id': row[0], 'body': _render(row)} for row in rows])
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name in ('sqlite', 'mysql'):
+        op.execute("DROP TABLE IF EXISTS builty_search")
+
+    op.drop_index(op.f('ix_builty_invoice_no'), table_name='builty')
+    op.drop_index(op.f('ix_builty_eway_bill_no'), table_name='builty')
+    op.drop_index(op.f('ix_builty_lr_no'), table_name='builty')
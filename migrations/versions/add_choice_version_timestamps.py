@@ -0,0 +1,26 @@
+"""add updated_at to choice_versions for Last-Modified headers
+
+Revision ID: add_choice_version_timestamps
+Revises: add_choice_versions
+Create Date: 2025-10-22 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_choice_version_timestamps'
+down_revision = 'add_choice_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('choice_versions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('choice_versions', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,35 @@
+"""add choice_versions for cached form choices
+
+Revision ID: add_choice_versions
+Revises: add_builty_search_index
+Create Date: 2025-10-21 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_choice_versions'
+down_revision = 'add_builty_search_index'
+branch_labels = None
+depends_on = None
+
+
+_TRACKED_TABLES = [
+    'stations', 'pin_codes', 'consignors', 'consignees', 'goods',
+    'booking_agents', 'vehicles', 'drivers', 'owners',
+]
+
+
+def upgrade():
+    choice_versions = op.create_table('choice_versions',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(choice_versions, [{'name': name, 'version': 0} for name in _TRACKED_TABLES])
+
+
+def downgrade():
+    op.drop_table('choice_versions')
@@ -0,0 +1,45 @@
+"""add entity_name to concerned_persons for single-table phonebook reads
+
+Revision ID: add_concerned_entity_name
+Revises: add_phone_digits
+Create Date: 2025-10-25 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_concerned_entity_name'
+down_revision = 'add_phone_digits'
+branch_labels = None
+depends_on = None
+
+
+_ENTITY_TABLES = {
+    'CONSIGNOR': 'consignors',
+    'CONSIGNEE': 'consignees',
+    'AGENT': 'booking_agents',
+    'DRIVER': 'drivers',
+    'OWNER': 'owners',
+}
+
+
+def upgrade():
+    with op.batch_alter_table('concerned_persons', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('entity_name', sa.String(length=255), nullable=True))
+        batch_op.create_index('ix_concerned_entity_name', ['entity_name', 'entity_type'], unique=False)
+
+    # One set-based UPDATE per entity type
+    for entity_type, table in _ENTITY_TABLES.items():
+        op.execute(
+            f"UPDATE concerned_persons SET entity_name = "
+            f"(SELECT {table}.name FROM {table} WHERE {table}.id = concerned_persons.entity_id) "
+            f"WHERE entity_type = '{entity_type}'"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('concerned_persons', schema=None) as batch_op:
+        batch_op.drop_index('ix_concerned_entity_name')
+        batch_op.drop_column('entity_name')
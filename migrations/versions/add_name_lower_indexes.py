@@ -0,0 +1,39 @@
+"""add lower() indexes for case-insensitive master-data dedupe
+
+Revision ID: add_name_lower_indexes
+Revises: add_choice_version_timestamps
+Create Date: 2025-10-23 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_name_lower_indexes'
+down_revision = 'add_choice_version_timestamps'
+branch_labels = None
+depends_on = None
+
+
+# Expression indexes need SQLite 3.9+ or MySQL 8.0.13+
+_INDEXES = [
+    ('ix_consignors_name_lower', 'consignors', 'name'),
+    ('ix_consignees_name_lower', 'consignees', 'name'),
+    ('ix_booking_agents_name_lower', 'booking_agents', 'name'),
+    ('ix_drivers_name_lower', 'drivers', 'name'),
+    ('ix_owners_name_lower', 'owners', 'name'),
+    ('ix_stations_name_lower', 'stations', 'name'),
+    ('ix_goods_description_lower', 'goods', 'description'),
+    ('ix_vehicles_lorry_no_lower', 'vehicles', 'lorry_no'),
+]
+
+
+def upgrade():
+    for name, table, column in _INDEXES:
+        op.create_index(name, table, [sa.func.lower(sa.column(column))])
+
+
+def downgrade():
+    for name, table, column in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,82 @@
+"""add full-text search index for orders
+
+Revision ID: add_order_search_index
+Revises: a26df6dacb6b
+Create Date: 2025-10-20 00:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_order_search_index'
+down_revision = 'a26df6dacb6b'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 1000
+
+_ORDER_DOCUMENTS = sa.text("""
+    SELECT o.id, o.date, o.firm, cr.name, ce.name, fs.name, ts.name, g.description, ba.name
+    FROM orders o
+    LEFT JOIN consignors cr ON cr.id = o.consignor_id
+    LEFT JOIN consignees ce ON ce.id = o.consignee_id
+    LEFT JOIN stations fs ON fs.id = o.from_station_id
+    LEFT JOIN stations ts ON ts.id = o.to_station_id
+    LEFT JOIN goods g ON g.id = o.goods_id
+    LEFT JOIN booking_agents ba ON ba.id = o.booking_agent_id
+    WHERE o.id > :last_id
+    ORDER BY o.id
+    LIMIT :limit
+""").columns(sa.column('id', sa.Integer), sa.column('date', sa.Date))
+
+
+def _render(row):
+    # Frozen copy of app.search.SearchIndex.render as of this revision
+    terms = []
+    for value in row:
+        if value is None:
+            continue
+        if isinstance(value, date):
+            terms.extend([value.isoformat(), value.strftime("%d-%m-%Y"), value.strftime("%d/%m/%Y"),
+                          value.strftime("%b %Y")])
+        else:
+            terms.append(str(value))
+    return " ".join(terms)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS order_search USING fts5(body, tokenize='unicode61')")
+        insert = sa.text("INSERT INTO order_search (rowid, body) VALUES (:id, :body)")
+    elif bind.dialect.name == 'mysql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS order_search ("
+            "entity_id INTEGER NOT NULL PRIMARY KEY, "
+            "body TEXT NOT NULL, "
+            "FULLTEXT KEY ft_order_search_body (body)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        )
+        insert = sa.text("INSERT INTO order_search (entity_id, body) VALUES (:id, :body)")
+    else:
+        return
+
+    # Backfill in keyset batches so the table is never read into memory at once
+    last_id = 0
+    while True:
+        rows = bind.execute(_ORDER_DOCUMENTS, {'last_id': last_id, 'limit': BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(insert, [{'id': row[0], 'body': _render(row)} for row in rows])
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name in ('sqlite', 'mysql'):
+        op.execute("DROP TABLE IF EXISTS order_search")
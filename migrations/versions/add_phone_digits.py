@@ -0,0 +1,81 @@
+"""add normalized and reversed phone digits for indexed phone lookups
+
+Revision ID: add_phone_digits
+Revises: add_name_lower_indexes
+Create Date: 2025-10-24 00:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_phone_digits'
+down_revision = 'add_name_lower_indexes'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 1000
+
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+def _phone_digits(number):
+    # Frozen copy of app.constants.phone_digits as of this revision
+    digits = _NON_DIGIT_RE.sub("", number or "")
+    if len(digits) == 14 and digits.startswith("0091"):
+        return digits[4:]
+    if len(digits) == 12 and digits.startswith("91"):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith("0"):
+        return digits[1:]
+    return digits
+
+
+def upgrade():
+    with op.batch_alter_table('phone_book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phone_digits', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('phone_digits_rev', sa.String(length=32), nullable=True))
+        batch_op.create_index('ix_phone_book_phone_digits', ['phone_digits'], unique=False)
+        batch_op.create_index('ix_phone_book_phone_digits_rev', ['phone_digits_rev'], unique=False)
+
+    # Backfill in keyset batches so the table is never read into memory at once
+    bind = op.get_bind()
+    phone_book = sa.table(
+        'phone_book',
+        sa.column('id', sa.Integer),
+        sa.column('phone_number', sa.String),
+        sa.column('phone_digits', sa.String),
+        sa.column('phone_digits_rev', sa.String),
+    )
+    update = phone_book.update().where(phone_book.c.id == sa.bindparam('_id')).values(
+        phone_digits=sa.bindparam('digits'),
+        phone_digits_rev=sa.bindparam('digits_rev'),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(phone_book.c.id, phone_book.c.phone_number)
+            .where(phone_book.c.id > last_id)
+            .order_by(phone_book.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row_id, number in rows:
+            digits = _phone_digits(number) or None
+            params.append({'_id': row_id, 'digits': digits, 'digits_rev': digits[::-1] if digits else None})
+        bind.execute(update, params)
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table('phone_book', schema=None) as batch_op:
+        batch_op.drop_index('ix_phone_book_phone_digits_rev')
+        batch_op.drop_index('ix_phone_book_phone_digits')
+        batch_op.drop_column('phone_digits_rev')
+        batch_op.drop_column('phone_digits')
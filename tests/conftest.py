@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Builty, ConcernedPerson, Consignor, Driver, Goods, Order, Owner, PhoneBook, Station, Vehicle
+from app.search import create_search_tables
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    WTF_CSRF_ENABLED = False
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        create_search_tables()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_client(client):
+    with client.session_transaction() as session:
+        session["logged_in"] = True
+        session["username"] = "admin"
+    return client
+
+
+@pytest.fixture
+def make_order(app):
+    """Create and commit an order; master rows are created by name on demand"""
+    def make(goods="Cotton", from_station="Mumbai", to_station="Delhi", **fields):
+        def station(name):
+            return Station.query.filter_by(name=name).first() or Station(name=name)
+        order = Order(
+            date=fields.pop("date", date(2024, 3, 5)),
+            goods=Goods.query.filter_by(description=goods).first() or Goods(description=goods),
+            from_station=station(from_station),
+            to_station=station(to_station),
+            **fields,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return order
+    return make
+
+
+@pytest.fixture
+def make_builty(make_order):
+    """Create and commit a builty for a new order, on a lorry created by number"""
+    def make(lorry_no="MH-12 AB 1234", **fields):
+        order = make_order()
+        vehicle = Vehicle.query.filter_by(lorry_no=lorry_no).first() or Vehicle(lorry_no=lorry_no)
+        builty = Builty(
+            order=order,
+            vehicle=vehicle,
+            driver=Driver.query.first() or Driver(name="Ramesh", license_no="DL-1"),
+            owner=Owner.query.first() or Owner(name="Suresh"),
+            from_station_id=order.from_station_id,
+            to_station_id=order.to_station_id,
+            date=fields.pop("date", order.date),
+            **fields,
+        )
+        db.session.add(builty)
+        db.session.commit()
+        return builty
+    return make
+
+
+@pytest.fixture
+def make_contact(app):
+    """Create and commit a consignor's concerned person with the given phones"""
+    def make(company, person, *phones):
+        consignor = Consignor.query.filter_by(name=company).first() or Consignor(name=company)
+        db.session.add(consignor)
+        db.session.flush()
+        contact = ConcernedPerson(entity_type="CONSIGNOR", entity_id=consignor.id, name=person)
+        contact.phone_numbers = [PhoneBook(phone_number=phone) for phone in phones]
+        db.session.add(contact)
+        db.session.commit()
+        return contact
+    return make
@@ -0,0 +1,132 @@
+from app.extensions import db
+from app.models import Consignor
+
+
+def test_bulk_create_rows_with_different_optional_fields(auth_client):
+    response = auth_client.post("/api/consignors/bulk", json=[
+        {"name": "Reliance Industries", "phone": "9876543210"},
+        {"name": "Tata Motors", "gstin": "27AAACT2727Q1ZW"},
+    ])
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["created"] == 2
+    assert payload["errors"] == []
+
+    first, second = (db.session.get(Consignor, row_id) for row_id in payload["ids"])
+    assert (first.phone, first.gstin) == ("9876543210", None)
+    assert (second.phone, second.gstin) == (None, "27AAACT2727Q1ZW")
+
+
+def _add_consignors(*names):
+    db.session.add_all([Consignor(name=name) for name in names])
+    db.session.commit()
+
+
+def test_autocomplete_matches_word_prefixes(client):
+    _add_consignors("Reliance Industries", "Tata Motors", "Tata Steel", "Indian Oil")
+    labels = [row["label"] for row in client.get("/api/consignors?q=ta").get_json()]
+    assert labels == ["Tata Motors", "Tata Steel"]
+    labels = [row["label"] for row in client.get("/api/consignors?q=ind").get_json()]
+    assert labels == ["Indian Oil", "Reliance Industries"]
+    assert [row["label"] for row in client.get("/api/consignors?q=tata%20st").get_json()] == ["Tata Steel"]
+
+
+def test_lists_answer_revalidation_with_304_until_a_write(client):
+    _add_consignors("Tata Motors")
+    first = client.get("/api/consignors")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Last-Modified"]
+
+    unchanged = client.get("/api/consignors", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.data == b""
+
+    _add_consignors("Adani Ports")
+    changed = client.get("/api/consignors", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.get_json()) == 2
+
+
+def test_batch_runs_named_lookups_in_one_request(client):
+    _add_consignors("Tata Motors", "Adani Ports")
+    result = client.post("/api/batch", json={
+        "consignors": {"q": "tata"},
+        "everyone": {"query": "consignors"},
+    }).get_json()
+    assert [row["label"] for row in result["consignors"]] == ["Tata Motors"]
+    assert len(result["everyone"]) == 2
+
+    assert client.post("/api/batch", json={"x": {"query": "orders"}}).status_code == 400
+    assert client.get("/api/batch?include=consignors").get_json()["consignors"][0]["label"] == "Adani Ports"
+
+
+def test_bootstrap_sends_only_the_lists_that_moved(client):
+    _add_consignors("Tata Motors")
+    full = client.get("/api/bootstrap").get_json()
+    assert [row[1] for row in full["lists"]["consignors"]] == ["Tata Motors"]
+    versions = ",".join(f"{name}.{version}" for name, version in full["versions"].items())
+
+    same = client.get(f"/api/bootstrap?since={full['as_of']}&versions={versions}").get_json()
+    assert same["lists"] == {} and same["changes"] == {}
+
+    tata = Consignor.query.one()
+    db.session.delete(tata)
+    db.session.add(Consignor(name="Adani Ports"))
+    db.session.commit()
+    delta = client.get(f"/api/bootstrap?since={full['as_of']}&versions={versions}").get_json()
+    assert set(delta["changes"]) == {"consignors"}
+    change = delta["changes"]["consignors"]
+    assert [row[1] for row in change["rows"]] == ["Adani Ports"]
+    assert tata.id not in change["ids"]
+
+
+def test_quick_add_dedupes_names_through_the_lower_index(client):
+    first = client.post("/api/consignors", data={"name": "tata motors"}).get_json()
+    again = client.post("/api/consignors", data={"name": "TATA MOTORS "}).get_json()
+    assert again["id"] == first["id"]
+    assert Consignor.query.count() == 1
+
+    plan = db.session.execute(db.text(
+        "EXPLAIN QUERY PLAN SELECT id FROM consignors WHERE lower(name) = 'tata motors'"
+    )).all()
+    assert any("ix_consignors_name_lower" in row[-1] for row in plan)
+
+
+def test_quick_add_forms_are_cached_with_an_etag(client):
+    first = client.get("/api/consignors/new")
+    assert first.status_code == 200 and b"<form" in first.data
+    assert first.cache_control.max_age == 3600
+    again = client.get("/api/consignors/new", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert client.get("/api/orders/new").status_code == 400
+
+
+def test_bulk_create_requires_login_and_a_csrf_token(app, auth_client):
+    assert app.test_client().post("/api/consignors/bulk", json=[{"name": "Tata Motors"}]).status_code == 302
+    app.config["WTF_CSRF_ENABLED"] = True
+    assert auth_client.post("/api/consignors/bulk", json=[{"name": "Tata Motors"}]).status_code == 400
+    assert Consignor.query.count() == 0
+
+
+def test_bulk_create_dedupes_non_ascii_names_like_the_database(auth_client):
+    # SQLite's lower() leaves "É" alone while str.lower() does not
+    _add_consignors("Éclair Foods")
+    existing = Consignor.query.one().id
+    payload = auth_client.post("/api/consignors/bulk", json=[
+        {"name": "Éclair foods"}, {"name": "ÉCLAIR FOODS"}, {"name": "Tata Motors"},
+    ]).get_json()
+    assert payload["errors"] == []
+    assert payload["ids"][:2] == [existing, existing] and payload["ids"][2]
+    assert (payload["created"], Consignor.query.count()) == (1, 2)
+
+
+def test_bulk_create_reports_bad_values_per_row(auth_client):
+    payload = auth_client.post("/api/vehicles/bulk", json=[
+        {"lorry_no": "MH-01 A 1", "capacity": "heavy"},
+        {"lorry_no": "MH-01 A 2", "owner_id": {"id": 1}},
+        {"lorry_no": "MH-01 A 3", "chassis_no": "X" * 65},
+        {"lorry_no": "MH-01 A 4", "capacity": "9.5"},
+    ]).get_json()
+    assert [error["index"] for error in payload["errors"]] == [0, 1, 2]
+    assert payload["ids"][:3] == [None, None, None] and payload["ids"][3]
+    assert payload["created"] == 1
@@ -0,0 +1,68 @@
+import re
+
+
+def _lr_numbers(response):
+    return re.findall(rb"LR-\d+", response.data)
+
+
+def test_register_pages_newest_first_without_overlap(auth_client, make_builty):
+    for n in range(1, 6):
+        make_builty(lr_no=f"LR-{n}")
+
+    first = auth_client.get("/builty/?per_page=2&view=table")
+    assert first.status_code == 200
+    assert set(_lr_numbers(first)) == {b"LR-5", b"LR-4"}
+
+    cursor = re.search(rb"after=(\d+)", first.data).group(1).decode()
+    second = auth_client.get(f"/builty/?per_page=2&view=table&after={cursor}")
+    assert set(_lr_numbers(second)) == {b"LR-3", b"LR-2"}
+
+
+def test_eligible_orders_skip_dispatched_and_match_order_numbers(auth_client, make_order):
+    open_orders = [make_order() for _ in range(12)]
+    dispatched = make_order(status="DISPATCHED")
+
+    recent = auth_client.get("/builty/eligible-orders").get_json()
+    assert [o["id"] for o in recent] == [o.id for o in reversed(open_orders)]
+    assert dispatched.id not in {o["id"] for o in recent}
+
+    # "#1" is a prefix of orders 1 and 10-12
+    found = auth_client.get("/builty/eligible-orders?q=%231").get_json()
+    assert [o["id"] for o in found] == [12, 11, 10, 1]
+    assert len(auth_client.get("/builty/eligible-orders?q=%231&limit=-1").get_json()) == 1
+
+
+def test_recent_open_orders_follow_order_writes_without_a_version_row(app, make_order):
+    from app.blueprints.builty import recent_open_orders
+    from app.extensions import db
+    from app.models import ChoiceVersion, Consignor
+
+    def recent():
+        with app.app_context():
+            return [(o["id"], o["party"]) for o in recent_open_orders()]
+
+    first = make_order(consignor=Consignor(name="Tata Motors"))
+    assert recent() == [(first.id, "Tata Motors")]
+
+    second = make_order()
+    assert [order_id for order_id, _ in recent()] == [second.id, first.id]
+
+    second.status = "DISPATCHED"
+    db.session.commit()
+    assert recent() == [(first.id, "Tata Motors")]
+
+    first.consignor.name = "Tata Steel"
+    db.session.commit()
+    assert recent() == [(first.id, "Tata Steel")]
+
+    # Order writes never touch the shared version rows
+    assert db.session.get(ChoiceVersion, "orders") is None
+
+
+def test_order_picker_matches_numbers_and_clamps_limit(client, make_order):
+    for _ in range(12):
+        make_order()
+    # The exact number first, then the longer ones it prefixes, newest first
+    assert [o["id"] for o in client.get("/api/orders?q=%231").get_json()] == [1, 12, 11, 10]
+    assert len(client.get("/api/orders?limit=-1").get_json()) == 1
+    assert len(client.get("/api/orders?status=open&limit=5").get_json()) == 5
@@ -0,0 +1,47 @@
+from app.choices import TrigramIndex, get_choices
+from app.extensions import db
+from app.models import Consignor
+
+
+def _fuzzy_ids(client, q):
+    response = client.get(f"/api/consignors?q={q}&fuzzy=1")
+    assert response.status_code == 200
+    return [row["id"] for row in response.get_json()]
+
+
+def test_patched_readds_word_it_removed():
+    index = TrigramIndex.build([(1, "Reliance Industries")])
+    patched = index.patched({1: (1, "Reliance Industries")}, {1: (1, "Reliance Industries")})
+    assert patched.search("industries") == index.search("industries")
+    assert set(index.words) == {"reliance", "industries"}
+
+
+def test_fuzzy_index_survives_update_and_rename(client):
+    consignor = Consignor(name="Reliance Industries")
+    db.session.add(consignor)
+    db.session.commit()
+    assert _fuzzy_ids(client, "Relaince") == [consignor.id]
+
+    consignor.phone = "9876543210"
+    db.session.commit()
+    assert _fuzzy_ids(client, "Relaince") == [consignor.id]
+
+    consignor.name = "Tata Motors"
+    db.session.commit()
+    assert _fuzzy_ids(client, "Relaince") == []
+    assert _fuzzy_ids(client, "Tatta") == [consignor.id]
+
+
+def test_choices_follow_writes_from_this_and_other_workers(app):
+    db.session.add(Consignor(name="Tata Motors"))
+    db.session.commit()
+    with app.app_context():
+        assert [label for _, label in get_choices("consignors")["consignors"]] == ["Tata Motors"]
+
+    # Another worker's write: the row plus a version bump, bypassing this process
+    db.session.execute(db.text("INSERT INTO consignors (name, created_at, updated_at) "
+                               "VALUES ('Adani Ports', '2024-01-01', '2024-01-01')"))
+    db.session.execute(db.text("UPDATE choice_versions SET version = version + 1 WHERE name = 'consignors'"))
+    db.session.commit()
+    with app.app_context():
+        assert [label for _, label in get_choices("consignors")["consignors"]] == ["Adani Ports", "Tata Motors"]
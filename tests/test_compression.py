@@ -0,0 +1,33 @@
+import gzip
+import shutil
+
+from app.compression import precompress_static
+from app.extensions import db
+from app.models import Consignor
+
+
+def test_json_responses_are_gzipped_when_accepted(client):
+    db.session.add_all([Consignor(name=f"Consignor {n}") for n in range(50)])
+    db.session.commit()
+
+    plain = client.get("/api/consignors")
+    assert "Content-Encoding" not in plain.headers
+
+    packed = client.get("/api/consignors", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["Vary"]
+    assert gzip.decompress(packed.data) == plain.data
+
+
+def test_static_files_are_served_from_precompressed_copies(app, client, tmp_path):
+    static = tmp_path / "static"
+    shutil.copytree(app.static_folder, static)
+    app.static_folder = str(static)
+    assert precompress_static(str(static)) > 0
+
+    plain = client.get("/static/js/app.js")
+    packed = client.get("/static/js/app.js", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.data) == plain.data
+    plain.close()
+    packed.close()
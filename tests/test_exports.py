@@ -0,0 +1,31 @@
+import csv
+import io
+import zipfile
+
+
+def test_csv_export_applies_list_filters(auth_client, make_order):
+    make_order(goods="Cotton")
+    make_order(goods="Steel", status="DISPATCHED")
+
+    response = auth_client.get("/orders/export?format=csv&status=all")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip("\ufeff"))))
+    assert [row["Goods"] for row in rows] == ["Cotton", "Steel"]
+
+    response = auth_client.get("/orders/export?format=csv&status=DISPATCHED")
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip("\ufeff"))))
+    assert [row["Goods"] for row in rows] == ["Steel"]
+
+
+def test_xlsx_export_is_a_valid_workbook(auth_client, make_order):
+    make_order(goods="Cotton & Yarn")
+    response = auth_client.get("/orders/export?format=xlsx&status=all")
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.data)) as workbook:
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+    assert "Cotton &amp; Yarn" in sheet
+
+
+def test_unknown_export_format_is_rejected(auth_client):
+    assert auth_client.get("/orders/export?format=pdf").status_code == 400
@@ -0,0 +1,31 @@
+from werkzeug.datastructures import MultiDict
+
+from app.extensions import db
+from app.forms import OrderForm
+from app.models import Consignor
+
+
+def _order_form(app, **data):
+    with app.test_request_context(method="POST"):
+        form = OrderForm(formdata=MultiDict({
+            "date": "2024-03-05", "firm": "Jalaram Cargo", "order_type": "PARTY", **data,
+        }))
+        valid = form.validate()
+        rendered = str(form.consignor_id)
+    return form, valid, rendered
+
+
+def test_lazy_selects_accept_existing_ids_and_render_only_the_selection(app):
+    tata, other = Consignor(name="Tata Motors"), Consignor(name="Adani Ports")
+    db.session.add_all([tata, other])
+    db.session.commit()
+
+    form, valid, rendered = _order_form(app, consignor_id=str(tata.id))
+    assert not form.consignor_id.errors
+    assert "Tata Motors" in rendered and "Adani Ports" not in rendered
+
+
+def test_lazy_selects_reject_unknown_ids(app):
+    form, valid, _ = _order_form(app, consignor_id="999")
+    assert not valid
+    assert form.consignor_id.errors == ["Not a valid choice."]
@@ -0,0 +1,21 @@
+from datetime import date
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Consignor
+
+
+def test_rows_format_matches_the_object_format(client):
+    db.session.add_all([Consignor(name="Tata Motors"), Consignor(name="Adani Ports")])
+    db.session.commit()
+
+    objects = client.get("/api/consignors").get_json()
+    compact = client.get("/api/consignors?format=rows").get_json()
+    assert compact["fields"][:2] == ["id", "label"]
+    assert [dict(zip(compact["fields"], row)) for row in compact["rows"]] == objects
+
+
+def test_provider_serializes_rows_dates_and_decimals(app):
+    row = db.session.execute(db.select(db.literal(1).label("id"), db.literal("x").label("label"))).one()
+    body = app.json.dumps({"row": row, "on": date(2024, 3, 5), "rate": Decimal("12.50")})
+    assert app.json.loads(body) == {"row": [1, "x"], "on": "2024-03-05", "rate": "12.50"}
@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.models import Driver
+
+
+def test_drivers_list_renders_validity(auth_client):
+    db.session.add_all([
+        Driver(name="Ramesh", license_no="DL-1", validity=date.today() + timedelta(days=30)),
+        Driver(name="Suresh", license_no="DL-2", validity=date.today() - timedelta(days=1)),
+    ])
+    db.session.commit()
+    response = auth_client.get("/fleet/drivers")
+    assert response.status_code == 200
+    assert b"Ramesh" in response.data and b"Suresh" in response.data
+
+
+def test_master_list_pages_sorts_and_filters_as_json(auth_client):
+    db.session.add_all([Driver(name=f"Driver {n}", license_no=f"DL-{n}") for n in range(1, 6)])
+    db.session.commit()
+
+    page = auth_client.get("/fleet/drivers?format=json&per_page=2&sort=name&dir=desc").get_json()
+    assert [item["name"] for item in page["items"]] == ["Driver 5", "Driver 4"]
+    assert (page["total"], page["pages"]) == (5, 3)
+
+    found = auth_client.get("/fleet/drivers?format=json&q=DL-3").get_json()
+    assert [item["name"] for item in found["items"]] == ["Driver 3"]
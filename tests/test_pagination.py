@@ -0,0 +1,28 @@
+from app.models import Order
+from app.pagination import keyset_paginate
+
+
+def test_keyset_pages_are_stable_across_inserts(make_order):
+    ids = [make_order().id for _ in range(5)]
+
+    first = keyset_paginate(Order.query, Order.id, 2)
+    assert [o.id for o in first] == ids[:-3:-1]
+    assert first.has_next and not first.has_prev
+
+    # A new order arriving between requests must not shift the next page
+    make_order()
+    second = keyset_paginate(Order.query, Order.id, 2, after=first.next_cursor)
+    assert [o.id for o in second] == [ids[2], ids[1]]
+    third = keyset_paginate(Order.query, Order.id, 2, after=second.next_cursor)
+    assert [o.id for o in third] == [ids[0]]
+    assert not third.has_next and third.has_prev
+
+    back = keyset_paginate(Order.query, Order.id, 2, before=third.prev_cursor)
+    assert [o.id for o in back] == [o.id for o in second]
+
+
+def test_orders_list_links_to_next_page(auth_client, make_order):
+    ids = [make_order().id for _ in range(3)]
+    response = auth_client.get("/orders/?status=all&per_page=2")
+    assert response.status_code == 200
+    assert f"after={ids[1]}".encode() in response.data
@@ -0,0 +1,106 @@
+def _search(client, q, **args):
+    response = client.get("/phonebook/api/search", query_string={"q": q, **args})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_search_returns_entity_names_in_one_query(auth_client, make_contact):
+    make_contact("Tata Motors", "Ravi Kumar", "+91 98765 43210")
+    result = _search(auth_client, "ravi")
+    assert [(r["person_name"], r["entity_name"], r["phone_number"]) for r in result["results"]] == [
+        ("Ravi Kumar", "Tata Motors", "+91 98765 43210"),
+    ]
+    assert result["total"] == 1 and result["total_exact"]
+
+
+def test_search_limit_is_clamped(auth_client, make_contact):
+    for n in range(1, 4):
+        make_contact(f"Tata Motors {n}", "Ravi", f"900000000{n}")
+    assert len(_search(auth_client, "ravi", limit=-1)["results"]) == 1
+
+
+def test_phone_lookups_ignore_formatting_and_rank_exact_prefix_suffix(auth_client, make_contact):
+    exact = make_contact("Tata Motors", "Ravi", "+91 98765-43210").phone_numbers[0]
+    prefix = make_contact("Adani Ports", "Mohan", "98765 11111").phone_numbers[0]
+    suffix = make_contact("Reliance", "Suresh", "022 4321 0").phone_numbers[0]
+
+    # Country code and punctuation are dropped before matching
+    assert [r["id"] for r in _search(auth_client, "09876543210", type="phone")["results"]] == [exact.id]
+    assert [r["id"] for r in _search(auth_client, "98765", type="phone")["results"]] == [exact.id, prefix.id]
+    assert [r["id"] for r in _search(auth_client, "43210", type="phone")["results"]] == [exact.id, suffix.id]
+
+
+def test_duplicate_numbers_are_found_however_formatted(app, make_contact):
+    from app.blueprints.phonebook import find_phone_number
+
+    phone = make_contact("Tata Motors", "Ravi", "+91 98765 43210").phone_numbers[0]
+    assert find_phone_number("098765-43210") == phone
+    assert find_phone_number("98765 43210", exclude_id=phone.id) is None
+
+
+def test_company_search_matches_name_prefixes_only(auth_client, make_contact):
+    make_contact("Tata Motors", "Ravi", "9000000001")
+    make_contact("50% Logistics", "Mohan", "9000000002")
+    make_contact("500 Logistics", "Suresh", "9000000003")
+
+    def companies(q):
+        return [r["entity_name"] for r in _search(auth_client, q, type="company")["results"]]
+
+    assert companies("tata") == ["Tata Motors"]
+    assert companies("Motors") == []
+    # LIKE wildcards in the query are matched literally
+    assert companies("50%") == ["50% Logistics"]
+
+
+def test_search_cursor_pages_through_ranks_without_overlap(auth_client, make_contact):
+    company = make_contact("Ravi Traders", "Mohan", "9000000001").phone_numbers[0]
+    names = [make_contact(f"Tata Motors {n}", f"Ravi {n}", f"900000001{n}").phone_numbers[0]
+             for n in range(1, 3)]
+
+    first = _search(auth_client, "Ravi", limit=1)
+    assert first["total"] == 3 and first["total_exact"]
+    seen, cursor = [r["id"] for r in first["results"]], first["next_cursor"]
+    while cursor:
+        result = _search(auth_client, "Ravi", limit=1, cursor=cursor)
+        assert "total" not in result
+        seen += [r["id"] for r in result["results"]]
+        cursor = result["next_cursor"]
+    # Person-name matches come before the company match, by id within a rank
+    assert seen == [names[0].id, names[1].id, company.id]
+
+
+def test_contacts_of_several_entities_come_back_in_one_call(auth_client, make_contact):
+    ravi = make_contact("Tata Motors", "Ravi", "+91 98765 43210")
+    mohan = make_contact("Adani Ports", "Mohan")
+
+    entities = f"consignor:{ravi.entity_id},CONSIGNOR:{mohan.entity_id},CONSIGNEE:99"
+    response = auth_client.get("/phonebook/api/contacts", query_string={"entities": entities})
+    assert response.status_code == 200
+    assert response.get_json() == {
+        f"CONSIGNOR:{ravi.entity_id}": [{
+            "id": ravi.id, "name": "Ravi", "designation": "", "is_primary": ravi.is_primary,
+            "phones": [{"id": ravi.phone_numbers[0].id, "phone_number": "+91 98765 43210",
+                        "label": "Primary", "is_primary": ravi.phone_numbers[0].is_primary}],
+        }],
+        f"CONSIGNOR:{mohan.entity_id}": [{
+            "id": mohan.id, "name": "Mohan", "designation": "", "is_primary": mohan.is_primary, "phones": [],
+        }],
+        "CONSIGNEE:99": [],
+    }
+
+
+def test_contacts_rejects_missing_entities(auth_client):
+    assert auth_client.get("/phonebook/api/contacts", query_string={"entities": "NOPE:1"}).status_code == 400
+
+
+def test_entity_name_copy_follows_renames(app, make_contact):
+    from app.extensions import db
+    from app.models import ConcernedPerson, Consignor
+
+    ravi = make_contact("Tata Motors", "Ravi", "9000000001")
+    assert ravi.entity_name == "Tata Motors"
+
+    db.session.get(Consignor, ravi.entity_id).name = "Tata Motors Ltd"
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(ConcernedPerson, ravi.id).entity_name == "Tata Motors Ltd"
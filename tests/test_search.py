@@ -0,0 +1,61 @@
+from app.extensions import db
+from app.models import Consignor, Order
+from app.search import SearchIndex, builty_index, order_index
+
+
+def _matches(index, query):
+    return set(db.session.execute(index.matching_ids(query)).scalars())
+
+
+def test_order_index_follows_inserts_updates_and_deletes(make_order):
+    order = make_order(goods="Cotton Bales")
+    assert _matches(order_index, "cotton") == {order.id}
+    assert _matches(order_index, "Mar 2024") == {order.id}
+
+    # Renaming a master record rewrites the documents that mention it
+    order.consignor = Consignor(name="Reliance Industries")
+    db.session.commit()
+    assert _matches(order_index, "relia") == {order.id}
+    order.consignor.name = "Tata Motors"
+    db.session.commit()
+    assert _matches(order_index, "relia") == set()
+    assert _matches(order_index, "tata") == {order.id}
+
+    db.session.delete(order)
+    db.session.commit()
+    assert _matches(order_index, "tata") == set()
+
+
+def test_short_tokens_fall_back_on_mysql():
+    assert SearchIndex.can_match("mysql", "Order 12") is False
+    assert SearchIndex.can_match("mysql", "Jalaram") is True
+    assert SearchIndex.can_match("sqlite", "12") is True
+
+
+def test_order_search_limit_is_clamped(auth_client, make_order):
+    for _ in range(3):
+        make_order(firm="Jalaram")
+    assert len(auth_client.get("/orders/search?q=Jalaram&limit=-1").get_json()) == 1
+    assert len(auth_client.get("/orders/search?q=Jalaram&limit=2").get_json()) == 2
+    assert Order.query.count() == 3
+
+
+def test_builty_index_follows_inserts_updates_and_deletes(make_builty):
+    builty = make_builty(lorry_no="MH-12 AB 1234", lr_no="LR-77")
+    assert _matches(builty_index, "MH12AB1234") == {builty.id}
+
+    builty.vehicle.lorry_no = "GJ-01 XY 9"
+    db.session.commit()
+    assert _matches(builty_index, "MH12AB1234") == set()
+    assert _matches(builty_index, "GJ01XY9") == {builty.id}
+
+    db.session.delete(builty)
+    db.session.commit()
+    assert _matches(builty_index, "GJ01XY9") == set()
+
+
+def test_builty_search_puts_exact_lr_first_and_clamps_limit(auth_client, make_builty):
+    make_builty(lr_no="LR-100", lorry_no="MH-01 A 1")
+    exact = make_builty(lr_no="LR-10", lorry_no="MH-01 A 2")
+    assert auth_client.get("/builty/search?q=LR-10").get_json()[0]["id"] == exact.id
+    assert len(auth_client.get("/builty/search?q=MH&limit=-1").get_json()) == 1